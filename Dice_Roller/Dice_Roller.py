@@ -1,8 +1,185 @@
 import random
+import re
+import sys # for reading command line arguments
+from array import array # compact arrays of rolls when NumPy isn't installed
+from collections import Counter
+
+try:
+    import numpy as np # optional, rolls dice in bulk much faster
+except ImportError:
+    np = None
 
 yes = ['yes', 'y', 'yeah', 'ye', 'yep']
 
+DICE_ENGINE = 'numpy' if np is not None else 'python' # how roll_notation rolls, falls back to plain python without numpy
+ROLL_CHUNK = 1_000_000 # dice rolled at a time, so memory stays the same however many dice there are
+TERM_PATTERN = re.compile(r"\s*([+-]?)\s*(?:(\d*)[dD](\d+)|(\d+))\s*") # one part of the notation: 4d8, +2d12, d20, +3 or -1
+ROLL_OUTPUTS = ('total', 'rolls', 'histogram')
+
+def roll(dice_sides): #rolls one die for each number of sides in the list
+    return [random.randint(1, sides) for sides in dice_sides] #list comprehension. This rolls each die and adds it to a new list, all in one line
+
+def parse_notation(notation):
+    """
+    Reads dice notation like "100000d6+3", "4d8 2d12" or "d20 - 1d4 + 2" and returns (groups, modifier):
+    groups is a list of (count, sides, sign) for each group of dice, sign being 1 or -1 for subtracted dice,
+    and modifier is the total of the plain numbers. Raises ValueError if the notation can't be read.
+    """
+
+    groups = []
+    modifier = 0
+    position = 0
+
+    while position < len(notation):
+        match = TERM_PATTERN.match(notation, position)
+        if match is None or match.end() == position:
+            raise ValueError(f'"{notation}" is not dice notation, try something like 3d6+2.')
+
+        sign = -1 if match.group(1) == '-' else 1
+
+        if match.group(3) is not None:
+            count = int(match.group(2) or 1) #"d20" means one d20
+            sides = int(match.group(3))
+            if count < 1 or sides < 2:
+                raise ValueError('Each group needs at least 1 die and each die at least 2 sides.')
+            groups.append((count, sides, sign))
+        else:
+            modifier += sign * int(match.group(4))
+
+        position = match.end()
+
+    if not groups:
+        raise ValueError(f'"{notation}" has no dice in it, try something like 3d6+2.')
+
+    return groups, modifier
+
+def make_generator(seed=None): #the random number generator for the current engine, seeded for repeatable simulations
+    return np.random.default_rng(seed) if DICE_ENGINE == 'numpy' else random.Random(seed)
+
+def roll_chunks(count, sides, generator):
+    """
+    Yields the rolls of count dice with the given number of sides, at most ROLL_CHUNK at a time:
+    NumPy arrays from generator.integers(), or lists from random.choices() without NumPy.
+    """
+
+    faces = range(1, sides + 1)
+
+    for start in range(0, count, ROLL_CHUNK):
+        size = min(ROLL_CHUNK, count - start)
+        if DICE_ENGINE == 'numpy':
+            yield generator.integers(1, sides, size=size, dtype=roll_dtype(sides), endpoint=True)
+        else:
+            yield generator.choices(faces, k=size)
+
+def roll_dtype(sides): #the smallest NumPy type that holds every face, e.g. 1 byte a die for anything up to a d255
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if sides <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+def roll_typecode(sides): #the same for array.array when NumPy isn't installed
+    for typecode in ('B', 'H', 'I'):
+        if sides < 1 << (8 * array(typecode).itemsize):
+            return typecode
+    return 'Q'
+
+def roll_notation(notation, output='total', seed=None):
+    """
+    Rolls the dice in a piece of dice notation (see parse_notation). output is one of ROLL_OUTPUTS:
+    - 'total' returns the total of every die plus the modifier, as an int
+    - 'rolls' returns a list with each group's rolls, as a NumPy array (or an array.array without NumPy)
+    - 'histogram' returns a list with each group's histogram: a list of how many times each face came up,
+      face 1 first
+    The dice are rolled in chunks, so 'total' and 'histogram' use the same memory for any number of dice.
+    """
+
+    if output not in ROLL_OUTPUTS:
+        raise ValueError(f"output must be one of {', '.join(ROLL_OUTPUTS)}.")
+
+    groups, modifier = parse_notation(notation)
+    generator = make_generator(seed)
+
+    if output == 'total':
+        total = modifier
+        for count, sides, sign in groups:
+            for chunk in roll_chunks(count, sides, generator):
+                total += sign * int(chunk.sum(dtype=np.int64) if DICE_ENGINE == 'numpy' else sum(chunk))
+        return total
+
+    if output == 'rolls':
+        all_rolls = []
+        for count, sides, sign in groups:
+            if DICE_ENGINE == 'numpy':
+                rolls = np.empty(count, dtype=roll_dtype(sides))
+                position = 0
+                for chunk in roll_chunks(count, sides, generator):
+                    rolls[position:position + len(chunk)] = chunk
+                    position += len(chunk)
+            else:
+                rolls = array(roll_typecode(sides))
+                for chunk in roll_chunks(count, sides, generator):
+                    rolls.extend(chunk)
+            all_rolls.append(rolls)
+        return all_rolls
+
+    histograms = []
+    for count, sides, sign in groups:
+        if DICE_ENGINE == 'numpy':
+            counts = np.zeros(sides + 1, dtype=np.int64)
+            for chunk in roll_chunks(count, sides, generator):
+                counts += np.bincount(chunk, minlength=sides + 1)
+            histograms.append(counts[1:].tolist())
+        else:
+            counts = Counter()
+            for chunk in roll_chunks(count, sides, generator):
+                counts.update(chunk)
+            histograms.append([counts[face] for face in range(1, sides + 1)])
+    return histograms
+
+def print_roll(notation, output='total', seed=None):
+    """
+    Rolls some dice notation and prints the result, used by the --roll command line option.
+    """
+
+    groups, modifier = parse_notation(notation)
+    result = roll_notation(notation, output, seed)
+
+    if output == 'total':
+        print(result)
+        return
+
+    for (count, sides, sign), group_result in zip(groups, result):
+        print(f"{'-' if sign < 0 else ''}{count}d{sides}:")
+        if output == 'rolls':
+            for start in range(0, count, 20): #20 rolls a line
+                print(' '.join(str(value) for value in group_result[start:start + 20].tolist()))
+        else:
+            for face, times in enumerate(group_result, start=1):
+                print(f"  {face}: {times}")
+
+    if modifier:
+        print(f"Modifier: {modifier:+d}")
+
 def roll_dice():
+    notation = input("Type dice notation like 3d6+2, or press enter to choose the dice one at a time: ").strip()
+    if notation:
+        try:
+            groups, modifier = parse_notation(notation)
+        except ValueError as error:
+            print(error)
+            return
+
+        if sum(count for count, sides, sign in groups) > 100: #too many to list, so just the total
+            print(f"Total: {roll_notation(notation)}")
+            return
+
+        outcomes = []
+        for count, sides, sign in groups:
+            outcomes += [sign * value for value in roll([sides] * count)]
+        print(f"Your die rolls are: {outcomes}")
+        print(f"Total: {sum(outcomes) + modifier}")
+        return
+
     while True:
         try:
             number_of_dice = int(input("How many dice do you want to roll? "))
@@ -42,14 +219,29 @@ def roll_dice():
             except ValueError:
                 print("Please make sure all numbers are positive integers.")
 
-    outcomes = [random.randint(1, sides) for sides in dice_sides] #list comprehension. This rolls each die and adds it to a new list, all in one line
+    outcomes = roll(dice_sides)
 
     print(f"Your die rolls are: {outcomes}")
     print(f"Total: {sum(outcomes)}")
 
-while True:
-    roll_dice()
-    again = input("\nWould you like to go again? (yes/no): ").strip().lower()
-    if again not in yes:
-        print("Thanks for playing!")
-        break
\ No newline at end of file
+if __name__ == "__main__" and len(sys.argv) > 2 and sys.argv[1] == "--roll": # python Dice_Roller.py --roll "100000d6+3" [--total|--rolls|--histogram] [--seed N]
+    options = sys.argv[3:]
+    output = next((option[2:] for option in options if option[2:] in ROLL_OUTPUTS), 'total')
+    try:
+        seed = None
+        if '--seed' in options:
+            try:
+                seed = int(options[options.index('--seed') + 1])
+            except (IndexError, ValueError): #nothing after --seed, or not a whole number
+                raise ValueError('--seed needs a whole number after it, e.g. --seed 42.')
+        print_roll(sys.argv[2], output, seed)
+    except ValueError as error:
+        sys.exit(str(error))
+
+elif __name__ == "__main__": #only runs the game when the file is run directly, not when it's imported
+    while True:
+        roll_dice()
+        again = input("\nWould you like to go again? (yes/no): ").strip().lower()
+        if again not in yes:
+            print("Thanks for playing!")
+            break
\ No newline at end of file
@@ -1,31 +1,688 @@
+import csv # for importing and exporting logs as csv
+import html # escapes text for the html report
 import json
 import os # For file operations
+import sqlite3 # built in database, used by the 'sqlite' storage backend
+import sys # for reading command line arguments
+import threading # the habit store saves changes on a background timer
+from array import array # compact arrays of numbers, much smaller than lists of python objects
+from collections.abc import MutableMapping, Sequence # base classes for things that behave like a dictionary or a list
+from concurrent.futures import ProcessPoolExecutor, as_completed # runs batch reports on several processes at once
+from bisect import bisect_left, bisect_right # binary search on sorted lists
 from datetime import date, timedelta # timedelta represents a difference in time
 
+try:
+    import numpy as np # optional, only used by the 'numpy' stats engine for large histories
+except ImportError:
+    np = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # file_storage.py is shared by the projects and lives one folder up
+import file_storage # atomic saves, a lock between running copies of the program and write-behind saving
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) # Directory of the current script
 data_file = os.path.join(BASE_DIR, "habits_data.json") # Full path to the data file
+db_file = os.path.join(BASE_DIR, "habits_data.db") # database used instead of the json file by the 'sqlite' backend
+
+archive_dir = os.path.join(BASE_DIR, "habits_archive") # one logs file per month plus a manifest, used by the 'partitioned' backend
+
+STORAGE_BACKEND = 'json' # 'json' keeps everything in habits_data.json, 'sqlite' uses habits_data.db, 'partitioned' uses habits_archive/
+STATS_ENGINE = 'numpy' if np is not None else 'python' # how the json backend calculates stats, falls back to plain python without numpy
 
 today = date.today() #this is a date object, not a string
 today_str = today.isoformat() #converts the date object into a string in the format YYYY-MM-DD
 
+journal_file = os.path.join(BASE_DIR, "habits_journal.jsonl") # changes since the last snapshot, one JSON record per line
+weekly_cache_file = os.path.join(BASE_DIR, "habits_weekly_cache.json") # each habit's totals per week, so the weekly summary doesn't recalculate them
+FLUSH_DELAY_SECONDS = 2 # the habit store saves changes once nothing has changed for this long
+IMPORT_BATCH_SIZE = 10000 # rows applied at a time when importing logs
+WEEKLY_CACHE_VERSION = 1 # change this whenever the cache layout changes, caches with a different version are thrown away
+JOURNAL_COMPACT_BYTES = 256 * 1024 # once the journal grows past this size it is folded back into the snapshot
+
 def load_data():
-    if not os.path.exists(data_file): #creates the file if it doesn't exist
-        data = {
-            "habits": {},
-            "logs": {}
-        }
-        save_data(data)
-        return data
+    if STORAGE_BACKEND == 'sqlite':
+        return load_data_sqlite()
+
+    if STORAGE_BACKEND == 'partitioned':
+        return load_data_partitioned()
+
+    data = {}
+    load_journal(open_journal(data))
+    return data
+
+def read_snapshot(data):
+    """
+    Replaces the contents of data with the snapshot in habits_data.json (empty if there isn't one yet).
+    """
+
+    data.clear()
+    data.update({"habits": {}, "logs": {}})
+
+    if os.path.exists(data_file):
+        with open(data_file, "r") as file: #'with ... as file' is a context manager, it closes the file automatically, temporarily calls the file 'file'
+            data.update(json.load(file)) #reads the json data and converts it into a python dictionary
+
+def open_journal(data):
+    """
+    Returns the file_storage.AppendLog of habits_data.json and the journal of changes made since it was written,
+    reading into and saving from the data dictionary.
+    """
 
-    with open(data_file, "r") as file: #'with ... as file' is a context manager, it closes the file automatically, temporarily calls the file 'file'
-        return json.load(file) #reads the json data and converts it into a python dictionary
+    return file_storage.AppendLog(
+        data_file, journal_file,
+        lambda: read_snapshot(data),
+        lambda record: apply_journal_record(data, record),
+        lambda: file_storage.write_json(data_file, data, indent=2) #indent=2 makes the json file easier to read
+    )
+
+def load_journal(journal):
+    """
+    Loads the snapshot and replays the journal on top of it (a half-written last line is dropped by compacting),
+    then creates the file if it doesn't exist or folds a long journal into a fresh snapshot.
+    """
+
+    with journal.lock: #so no other copy appends between reading the journal and compacting it
+        journal.load()
+
+        if not os.path.exists(data_file) or (os.path.exists(journal_file) and os.path.getsize(journal_file) > JOURNAL_COMPACT_BYTES):
+            journal.compact()
 
 def save_data(data):
-    with open(data_file, "w") as file:
-        json.dump(data, file, indent=2) #converts the python dictionary into json, indent=2 makes the json file easier to read
+    """
+    Writes a full snapshot of the data and clears the journal, as the snapshot now contains every change.
+    """
+
+    if STORAGE_BACKEND == 'sqlite':
+        save_data_sqlite(data)
+        return
+
+    if STORAGE_BACKEND == 'partitioned':
+        save_data_partitioned(data)
+        return
+
+    with file_storage.file_lock(data_file): #the journal is only cleared along with writing the snapshot it went into
+        file_storage.write_json(data_file, data, indent=2) #converts the python dictionary into json, indent=2 makes the json file easier to read
+
+        if os.path.exists(journal_file):
+            os.remove(journal_file)
+
+def save_changes(data, records):
+    """
+    Applies a list of change records (see apply_journal_record) to the data dictionary and saves just those changes.
+    """
+
+    for record in records:
+        apply_journal_record(data, record)
+
+    persist_changes(data, records)
+
+def persist_changes(data, records):
+    """
+    Saves change records that have already been applied to the data dictionary.
+    """
+
+    if STORAGE_BACKEND == 'sqlite':
+        save_records_sqlite(records)
+    elif STORAGE_BACKEND == 'partitioned':
+        save_records_partitioned(data, records)
+    else:
+        append_journal(data, records)
+
+def apply_journal_record(data, record):
+    """
+    Applies a single journal record to the data dictionary.
+    """
+
+    if record['op'] == 'habit': #a created or edited habit definition
+        data['habits'][record['name']] = record['info']
+
+    elif record['op'] == 'log': #a single logged value for one habit on one day
+        data['logs'].setdefault(record['date'], {})[record['habit']] = record['value']
+
+def append_journal(data, records, compact=True):
+    """
+    Appends records (already applied to the data dictionary) to the journal,
+    so saving a change costs the same no matter how long the history is.
+    compact=False leaves a long journal for the caller to compact, e.g. once at the end of an import.
+    """
+
+    if not records:
+        return
+
+    journal = store.journal if data is store.data else None # the store keeps its place in the journal past its own records
+
+    with file_storage.file_lock(data_file):
+        if journal is not None:
+            journal.append(records)
+            size = journal.size
+        else:
+            size = file_storage.append_lines(journal_file, [json.dumps(record) for record in records]) #adds to the end of the file instead of rewriting it
+
+        if compact and size > JOURNAL_COMPACT_BYTES:
+            compact_journal(journal) #folds the journal into the snapshot once it gets too big
+
+def compact_journal(journal=None):
+    """
+    Folds the journal into a fresh snapshot. The store's journal saves the store's data, which has every other
+    copy's changes once it has synced. Without one, the snapshot and journal are read again while holding the lock,
+    so nothing another copy journaled is lost.
+    """
+
+    with file_storage.file_lock(data_file):
+        if journal is None:
+            journal = open_journal({})
+            journal.load()
+        journal.compact()
+
+db_connection = None # opened the first time the database is needed and then reused
+
+def get_db_connection():
+    """
+    Returns the connection to habits_data.db, creating the tables and indexes the first time.
+    """
+
+    global db_connection # global lets the function change the variable defined outside it
+
+    if db_connection is not None:
+        return db_connection
+
+    db_connection = sqlite3.connect(db_file, check_same_thread=False) #the habit store saves from a timer thread, its lock keeps the saves in order
+    db_connection.executescript('''
+        CREATE TABLE IF NOT EXISTS habits (
+            name TEXT PRIMARY KEY,
+            type TEXT NOT NULL,
+            unit TEXT,
+            created TEXT NOT NULL,
+            active INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS logs (
+            habit TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            completed INTEGER,
+            value REAL,
+            PRIMARY KEY (habit, day)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS logs_by_day ON logs (day, habit);
+    ''') # completed is set for binary logs, value for quantitative ones, day is the date ordinal
+
+    return db_connection
+
+def habit_row(habit_name, habit_info):
+    return (habit_name, habit_info['type'], habit_info.get('unit'), habit_info['created'], int(habit_info.get('active', True)))
+
+def log_row(log_date_str, habit_name, value):
+    ordinal = date.fromisoformat(log_date_str).toordinal()
+
+    if isinstance(value, bool): #checked first because True and False also count as numbers in python
+        return (habit_name, ordinal, int(value), None)
+    return (habit_name, ordinal, None, value)
+
+def load_data_sqlite():
+    """
+    Reads the habits and logs from the database into the same dictionary layout as habits_data.json.
+    If the database doesn't exist yet it is filled from habits_data.json first (a one-off migration).
+    """
+
+    if not os.path.exists(db_file) and os.path.exists(data_file):
+        migrate_json_to_sqlite(data_file)
+
+    connection = get_db_connection()
+    data = {'habits': {}, 'logs': {}}
+
+    for name, habit_type, unit, created, active in connection.execute('SELECT name, type, unit, created, active FROM habits'):
+        habit_info = {'type': habit_type, 'created': created, 'active': bool(active)}
+        if unit is not None:
+            habit_info['unit'] = unit
+        data['habits'][name] = habit_info
+
+    for habit_name, day, completed, value in connection.execute('SELECT habit, day, completed, value FROM logs ORDER BY day'):
+        log_date_str = date.fromordinal(day).isoformat()
+        data['logs'].setdefault(log_date_str, {})[habit_name] = bool(completed) if completed is not None else value
+
+    return data
+
+def save_data_sqlite(data):
+    """
+    Replaces everything in the database with the contents of the data dictionary.
+    """
+
+    connection = get_db_connection()
+
+    with connection: #commits at the end of the block, or rolls back if something goes wrong
+        connection.execute('DELETE FROM logs')
+        connection.execute('DELETE FROM habits')
+        connection.executemany('INSERT INTO habits VALUES (?, ?, ?, ?, ?)',
+                               (habit_row(name, info) for name, info in data['habits'].items()))
+        connection.executemany('INSERT INTO logs VALUES (?, ?, ?, ?)',
+                               (log_row(log_date_str, habit_name, value)
+                                for log_date_str, daily_log in data['logs'].items()
+                                for habit_name, value in daily_log.items()))
+
+def save_records_sqlite(records):
+    """
+    Writes change records to the database, only touching the rows that changed.
+    """
+
+    connection = get_db_connection()
+
+    with connection:
+        for record in records:
+            if record['op'] == 'habit':
+                connection.execute('INSERT OR REPLACE INTO habits VALUES (?, ?, ?, ?, ?)', habit_row(record['name'], record['info']))
+            elif record['op'] == 'log':
+                connection.execute('INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?)', log_row(record['date'], record['habit'], record['value']))
+
+def query_range_sqlite(habit_name, start_date, end_date):
+    """
+    Returns (days_logged, days_completed, total_units) for a habit between start_date and end_date inclusive,
+    using the (habit, day) primary key so only the rows in the range are read.
+    """
+
+    store.flush() #the database only has saved changes, so any still waiting in the store are written first
+
+    connection = get_db_connection()
+
+    days_logged, days_completed, total_units = connection.execute(
+        'SELECT COUNT(*), SUM(completed), SUM(value) FROM logs WHERE habit = ? AND day BETWEEN ? AND ?',
+        (habit_name, start_date.toordinal(), end_date.toordinal())
+    ).fetchone()
+
+    return days_logged, days_completed or 0, total_units or 0 #SUM() gives None when there are no matching rows
+
+def migrate_json_to_sqlite(json_path):
+    """
+    Copies a habits_data.json style file (e.g. habits_data.json or test_data.json) into the database.
+    """
+
+    with open(json_path, "r") as file:
+        data = json.load(file)
+
+    if os.path.abspath(json_path) == os.path.abspath(data_file):
+        open_journal(data).load() #includes changes that haven't been compacted into the json file yet
+
+    connection = get_db_connection()
+
+    with connection:
+        connection.executemany('INSERT OR REPLACE INTO habits VALUES (?, ?, ?, ?, ?)',
+                               (habit_row(name, info) for name, info in data['habits'].items()))
+        connection.executemany('INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?)',
+                               (log_row(log_date_str, habit_name, value)
+                                for log_date_str, daily_log in data['logs'].items()
+                                for habit_name, value in daily_log.items()))
+
+    print(f'Migrated {len(data["habits"])} habits and {len(data["logs"])} days of logs from {json_path} into {db_file}.')
+
+partition_cache = {} # month -> that month's logs, each partition file is only read once
+
+def month_key(log_date_str):
+    return log_date_str[:7] #'2026-02-17' -> '2026-02'
+
+def partition_path(month):
+    return os.path.join(archive_dir, f'logs-{month}.json')
+
+def load_partition(month):
+    """
+    Returns the logs of one month, reading its partition file the first time it's needed.
+    Months that don't have a file yet start empty.
+    """
+
+    if month not in partition_cache:
+        try:
+            with open(partition_path(month), "r") as file:
+                partition_cache[month] = json.load(file)
+        except FileNotFoundError:
+            partition_cache[month] = {}
+
+    return partition_cache[month]
+
+class PartitionedLogs(MutableMapping):
+    """
+    Behaves like the data['logs'] dictionary, but the logs are split into one file per month
+    and a month is only read the first time a date in it is used.
+    The manifest keeps the first and last logged date and the number of days of each month,
+    so range queries only open the months they overlap.
+    """
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+
+    def __getitem__(self, log_date_str):
+        if month_key(log_date_str) not in self.manifest['partitions']:
+            raise KeyError(log_date_str) #nothing was logged that month, so there's no file to read
+        return load_partition(month_key(log_date_str))[log_date_str]
+
+    def __setitem__(self, log_date_str, daily_log):
+        month = month_key(log_date_str)
+        partition = load_partition(month)
+        is_new_day = log_date_str not in partition
+        partition[log_date_str] = daily_log
+
+        if is_new_day: #keeps the manifest's date range and day count up to date
+            info = self.manifest['partitions'].setdefault(month, {'first': log_date_str, 'last': log_date_str, 'days': 0})
+            info['first'] = min(info['first'], log_date_str)
+            info['last'] = max(info['last'], log_date_str)
+            info['days'] += 1
+
+    def __delitem__(self, log_date_str):
+        del load_partition(month_key(log_date_str))[log_date_str]
+        self.manifest['partitions'][month_key(log_date_str)]['days'] -= 1
+
+    def __iter__(self): #goes through every date in order, reading every month
+        for month in sorted(self.manifest['partitions']):
+            yield from sorted(load_partition(month))
+
+    def __len__(self): #counted from the manifest, so checking if there are any logs reads no partitions
+        return sum(info['days'] for info in self.manifest['partitions'].values())
+
+    def months_between(self, start_date, end_date):
+        """
+        Returns the months whose logs overlap start_date to end_date, in order.
+        """
+
+        start_str, end_str = start_date.isoformat(), end_date.isoformat()
+        return [
+            month for month, info in sorted(self.manifest['partitions'].items())
+            if info['days'] > 0 and info['first'] <= end_str and info['last'] >= start_str
+        ]
+
+    def query_range(self, habit_name, habit_type, start_date, end_date):
+        """
+        Returns (days_logged, days_completed, total_units) for a habit between start_date and end_date inclusive,
+        only reading the months that overlap the range.
+        """
+
+        start_str, end_str = start_date.isoformat(), end_date.isoformat() #ISO date strings sort in date order
+        days_logged = 0
+        days_completed = 0
+        total_units = 0
+
+        for month in self.months_between(start_date, end_date):
+            partition = load_partition(month)
+
+            for log_date_str in sorted(partition): #date order, so float totals add up the same way as the other backends
+                if log_date_str < start_str or log_date_str > end_str or habit_name not in partition[log_date_str]:
+                    continue
+
+                value = partition[log_date_str][habit_name]
+                days_logged += 1
+
+                if habit_type == 'binary':
+                    if value is True:
+                        days_completed += 1
+                elif habit_type == 'quantitative':
+                    total_units += value
+
+        return days_logged, days_completed, total_units
+
+def manifest_path():
+    return os.path.join(archive_dir, 'manifest.json')
+
+def save_manifest(manifest):
+    file_storage.write_json(manifest_path(), manifest, indent=2)
+
+def save_partition(month):
+    file_storage.write_json(partition_path(month), partition_cache[month], indent=2)
+
+def load_data_partitioned():
+    """
+    Returns the habits from the manifest and the logs as a PartitionedLogs, so no logs are read yet.
+    If the archive doesn't exist yet it is created from habits_data.json first.
+    """
+
+    if not os.path.exists(manifest_path()):
+        data = {'habits': {}, 'logs': {}}
+
+        if os.path.exists(data_file): #one-off split of the existing json file and its journal into monthly partitions
+            open_journal(data).load()
+
+        save_data_partitioned(data)
+
+    with open(manifest_path(), "r") as file:
+        manifest = json.load(file)
+
+    return {'habits': manifest['habits'], 'logs': PartitionedLogs(manifest)}
+
+def save_data_partitioned(data):
+    """
+    Writes every month's partition and the manifest from a data dictionary.
+    """
+
+    os.makedirs(archive_dir, exist_ok=True)
+    manifest = {'habits': data['habits'], 'partitions': {}}
+    logs = PartitionedLogs(manifest)
+
+    items = list(data['logs'].items()) #read before the cache is cleared, so a partitioned data['logs'] keeps its unsaved days
+
+    partition_cache.clear() #the partitions are rebuilt from scratch below
+
+    for log_date_str, daily_log in items:
+        logs[log_date_str] = daily_log
+
+    for month in partition_cache:
+        save_partition(month)
+
+    save_manifest(manifest)
+
+def save_records_partitioned(data, records):
+    """
+    Saves change records (already applied to data) by rewriting only the months they touch and the manifest.
+    Logging today's habits therefore only ever rewrites the current month's file.
+    """
+
+    for month in sorted({month_key(record['date']) for record in records if record['op'] == 'log'}):
+        save_partition(month)
+
+    manifest = data['logs'].manifest
+    manifest['habits'] = data['habits']
+    save_manifest(manifest)
+
+class HabitStore:
+    """
+    Keeps the habit data in memory for the whole session, so menu actions don't re-read the data file.
+    Changes mark their habit or (date, habit) log as dirty, and only the dirty ones are written by flush().
+    flush() runs on demand, once nothing has changed for flush_delay seconds (a file_storage.WriteBehind),
+    and when the program exits.
+    The stats read a CompactLogs (or the numpy engine's matrix) the store keeps alongside the data dictionary,
+    while the menus and the saving code still work on the dictionary.
+    With the json backend, sync() picks up what other running copies journaled (flush() syncs first too),
+    and the store's own unsaved changes stay on top of theirs.
+    """
+
+    def __init__(self, flush_delay=FLUSH_DELAY_SECONDS):
+        self.data = None # loaded the first time it's needed
+        self.dirty_habits = set() # habit names whose definition changed
+        self.dirty_logs = set() # (date, habit) pairs whose logged value changed
+        self.overwritten = set() # dirty logs that replaced an earlier value, the weekly cache needs to know about these
+        self.range_index = None # a RangeIndex, built the first time a range query needs it
+        self.compact = None # a CompactLogs, built the first time the stats need it
+        self.matrix = None # the numpy engine's build_log_matrix(), built the first time the stats need it
+        self.journal = None # the file_storage.AppendLog of the json backend
+        self.outside_changes = 0 # counts the times changes from other copies were picked up, so caches of the data know to clear
+        self.lock = threading.RLock() # stops the timer saving while a change is half made
+        self.writer = file_storage.WriteBehind(self.flush, flush_delay) # also saves anything left over when the program exits
+
+    def load(self):
+        """
+        Returns the data dictionary, only reading it from disk the first time.
+        """
+
+        with self.lock:
+            if self.data is None and STORAGE_BACKEND == 'json':
+                self.data = {}
+                self.journal = file_storage.AppendLog(data_file, journal_file, self.reload, self.apply_saved, lambda: file_storage.write_json(data_file, self.data, indent=2))
+                load_journal(self.journal)
+            elif self.data is None:
+                self.data = load_data()
+            return self.data
+
+    def sync(self):
+        """
+        Picks up the changes other running copies of the program have saved since the data was loaded (json backend only).
+        """
+
+        with self.lock:
+            if self.journal is not None:
+                self.journal.sync()
+
+    def reload(self):
+        """
+        Reads the snapshot again when another copy has rewritten it, keeping the changes that haven't been saved yet.
+        """
+
+        unsaved = self.dirty_records()
+        read_snapshot(self.data) #the same dictionary, so anything holding it sees the new data
+        self.outside_changes += 1
+
+        for record in unsaved:
+            if record['op'] == 'log' and record['habit'] in self.data['logs'].get(record['date'], {}):
+                self.overwritten.add((record['date'], record['habit'])) #another copy saved this log too, and counted it in the weekly cache
+            apply_journal_record(self.data, record)
+
+        self.range_index = None #rebuilt the next time they're needed
+        self.compact = None
+        self.matrix = None
+
+    def apply_saved(self, record):
+        """
+        Applies a record another copy journaled, unless this copy has changed the same habit or log since.
+        """
+
+        self.outside_changes += 1
+
+        if record['op'] == 'habit' and record['name'] in self.dirty_habits:
+            return
+        if record['op'] == 'log' and (record['date'], record['habit']) in self.dirty_logs:
+            self.overwritten.add((record['date'], record['habit'])) #their value is already in the weekly cache, so ours replaces it
+            return
+
+        self.apply(record)
+
+    def ranges(self):
+        """
+        Returns the RangeIndex of the data, building it the first time.
+        Later changes update it one log at a time rather than rebuilding it.
+        """
+
+        with self.lock:
+            if self.range_index is None:
+                self.range_index = RangeIndex(self.load())
+            return self.range_index
+
+    def compact_logs(self):
+        """
+        Returns the CompactLogs of the data, building it the first time.
+        Later changes update it one log at a time, like the RangeIndex.
+        """
+
+        with self.lock:
+            if self.compact is None:
+                self.compact = CompactLogs.from_data(self.load())
+            return self.compact
+
+    def log_matrix(self):
+        """
+        Returns the numpy engine's matrix of the data, building it the first time.
+        Later logs are written into it in place, it's only rebuilt when one needs a new habit column or week.
+        """
+
+        with self.lock:
+            if self.matrix is None:
+                self.matrix = build_log_matrix(self.load())
+            return self.matrix
+
+    def record(self, records):
+        """
+        Applies change records (see apply_journal_record) to the data and marks them dirty to be saved later.
+        """
+
+        with self.lock:
+            data = self.load()
+
+            for record in records:
+                if record['op'] == 'habit':
+                    self.dirty_habits.add(record['name'])
+
+                elif record['op'] == 'log':
+                    if record['habit'] in data['logs'].get(record['date'], {}):
+                        self.overwritten.add((record['date'], record['habit']))
+                    self.dirty_logs.add((record['date'], record['habit']))
+
+                self.apply(record)
+
+        self.schedule_flush()
+
+    def apply(self, record):
+        """
+        Applies a record to the data and to the indexes built from it.
+        """
+
+        apply_journal_record(self.data, record)
+
+        if record['op'] == 'log' and self.range_index is not None:
+            self.range_index.update(record['date'], record['habit'], record['value']) #O(log n), no rebuild
+
+        if self.compact is not None:
+            if record['op'] == 'log':
+                self.compact.update(record['date'], record['habit'], record['value'])
+            elif record['op'] == 'habit':
+                self.compact.update_habit(record['name'], record['info'])
+
+        if self.matrix is not None:
+            if record['op'] == 'log' and not update_log_matrix(self.matrix, record['date'], record['habit'], record['value']):
+                self.matrix = None #rebuilt the next time the stats need it
+            elif record['op'] == 'habit' and record['name'] in self.matrix['columns']:
+                if self.matrix['is_binary'][self.matrix['columns'][record['name']]] != (record['info'].get('type') == 'binary'):
+                    self.matrix = None #the habit's type changed, so its logs are counted differently
+
+    def schedule_flush(self):
+        """
+        Restarts the countdown to the next save, so a burst of changes is saved all together.
+        A flush_delay of None turns the countdown off, for callers that run flush() on their own schedule.
+        """
+
+        self.writer.schedule()
+
+    def is_dirty(self):
+        return bool(self.dirty_habits or self.dirty_logs)
+
+    def flush(self):
+        """
+        Saves the dirty habits and logs, along with the weekly cache, and clears the dirty sets.
+        """
+
+        with self.lock:
+            if not self.is_dirty():
+                return
+
+            if self.journal is None:
+                self.save_dirty()
+                return
+
+            with self.journal.lock: #no other copy can save between picking up its changes and appending these
+                self.journal.sync()
+                self.save_dirty()
+
+    def save_dirty(self):
+        records = self.dirty_records()
+
+        persist_changes(self.data, records)
+        update_weekly_cache(records, self.overwritten)
+
+        self.dirty_habits.clear()
+        self.dirty_logs.clear()
+        self.overwritten.clear()
+
+    def dirty_records(self): #the records that save the dirty habits and logs
+        records = [{'op': 'habit', 'name': habit_name, 'info': self.data['habits'][habit_name]} for habit_name in sorted(self.dirty_habits)]
+        records += [ #sorted by date so the weekly cache adds the values up in date order
+            {'op': 'log', 'date': log_date_str, 'habit': habit_name, 'value': self.data['logs'][log_date_str][habit_name]}
+            for log_date_str, habit_name in sorted(self.dirty_logs)
+        ]
+        return records
+
+store = HabitStore() # the menu actions and stats share this, so the data is only read once
 
 def create_habit():
-    data = load_data()
+    data = store.load()
 
     print('\nCreate a new habit')
     habit_name = input('Enter habit name: ').strip().lower()
@@ -70,19 +727,18 @@ def create_habit():
         print('\nInvalid choice. Habit not created.')
         return
     
-    data['habits'][habit_name] = habit_data #adds the new habit to the habits section of the data dictionary
-    save_data(data)
+    store.record([{'op': 'habit', 'name': habit_name, 'info': habit_data}]) #adds the new habit to the habits section of the data dictionary
     print(f'\nHabit "{habit_name}" created successfully!') #f-string lets you put variables inside strings
 
 def log_today_habits():
-    data = load_data()
+    data = store.load()
 
     if not data['habits']:
         print('\nNo habits found. Please create a habit first.')
         return #cancels the whole function and returns to the main menu loop
     
-    if today_str not in data['logs']: #checks if there is already a log for today
-        data['logs'][today_str] = {} #creates an empty log for today if not
+    todays_log = data['logs'].get(today_str, {}) #today's log so far, empty if nothing has been logged yet
+    records = [] #the values logged below, saved to the journal all at once at the end
 
     for habit_name, habit_info in data['habits'].items(): #habit_name becomes the key, habit_info becomes the value (dictionary in this case)
         # .items() returns both the key and value from the dictionary
@@ -93,7 +749,7 @@ def log_today_habits():
         habit_type = habit_info['type'] #binary or quantitive
         unit = habit_info.get('unit', '') #gets the unit if it exists, otherwise returns '' - an empty string
 
-        if habit_name in data ['logs'][today_str]:
+        if habit_name in todays_log:
             while True:
                 choice = input (f'"{habit_name}" already logged. Overwrite? (y = overwrite, s = skip): ').strip().lower()
 
@@ -118,11 +774,11 @@ def log_today_habits():
                 completed = input(f'Did you complete "{habit_name}" today? (y/n): ').strip().lower()
 
                 if completed == 'y':
-                    data['logs'][today_str][habit_name] = True #marks the habit as done
+                    records.append({'op': 'log', 'date': today_str, 'habit': habit_name, 'value': True}) #marks the habit as done
                     break #exits the inner while loop
                 
                 elif completed == 'n':
-                    data['logs'][today_str][habit_name] = False #marks the habit as not done
+                    records.append({'op': 'log', 'date': today_str, 'habit': habit_name, 'value': False}) #marks the habit as not done
                     break #exits the inner while loop
 
                 else:
@@ -137,17 +793,17 @@ def log_today_habits():
                     if value < 0:
                         print('Value cannot be negative. Please enter a valid number.')
                         continue #repeats the inner while loop
-                    data['logs'][today_str][habit_name] = value
+                    records.append({'op': 'log', 'date': today_str, 'habit': habit_name, 'value': value})
                     break #exits the inner while loop
 
                 except ValueError: #loops back to the start of the inner while loop if the value cannot be converted to a float
                     print('Invalid input. Please enter a numeric value.')
         
-    save_data(data)
+    store.record(records) #saved in the background, along with the weekly cache
     print("\nToday's habits logged successfully!")
 
 def edit_habit_status():
-    data = load_data()
+    data = store.load()
 
     if not data['habits']:
         print('\nNo habits found. Please create a habit first.')
@@ -182,63 +838,82 @@ def edit_habit_status():
     habit_name = habit_list[choice - 1] #gets the habit name based on the user's choice
     current_status = data['habits'][habit_name]['active'] #gets the current status
     new_status = not current_status #toggles the status
-    data['habits'][habit_name]['active'] = new_status #updates the status in the data dictionary
-    save_data(data)
+    habit_data = dict(data['habits'][habit_name], active=new_status) #copy of the habit definition with the new status
+    store.record([{'op': 'habit', 'name': habit_name, 'info': habit_data}]) #updates the status in the data dictionary
 
     print(f"\n{habit_name} is now {'active' if new_status else 'inactive'}.")
 
-def view_habit_stats():
-    data = load_data()
+def calculate_habit_stats(data):
+    """
+    Calculates the overall stats of every active habit.
+    Returns a dictionary of habit_name -> stats dictionary (the same layout as calculate_stats_for_range).
+    """
 
-    if not data['habits']: #stops the function if there are no habits
-        print('\nNo habits found. Please create a habit first.')
-        return #cancels the whole function and returns to the main menu loop
-    
-    print('\nHabit Statistics (active only):\n')
+    index = None
+    if STORAGE_BACKEND == 'json':
+        index = build_stats_index(data) #built once and shared by every habit below
+
+    habit_stats = {}
 
     for habit_name, habit_info in data['habits'].items(): # .items() returns both the key and value from the dictionary
         if not habit_info.get('active', True):
             continue #skips the iteration of the for loop for inactive habits
 
         habit_type = habit_info['type']
-        created = habit_info['created']
-        unit = habit_info.get('unit', '') #only for quantative habits, empty string otherwise
 
         days_logged = 0 #defining variables to be used in the loop below
         days_completed = 0
         total_units = 0
 
-        for log_date, daily_log in data['logs'].items(): # runs through each date and looks for the specific habit
-            if habit_name not in daily_log:
-                continue #skips that iteration of the for loop if the habit wasn't logged that day
-            days_logged += 1
-            value = daily_log[habit_name] #gets the logged value for that habit on that day
+        if STORAGE_BACKEND == 'sqlite': #the database adds everything up with one query
+            days_logged, days_completed, total_units = query_range_sqlite(habit_name, date.min, date.max)
 
-            if habit_type == 'binary': #counts days completed for binary habits
-                if value is True:
-                    days_completed += 1
-                
-            elif habit_type == 'quantitative': #counts totals for quantitative habits
-                total_units += value
+        elif STORAGE_BACKEND == 'partitioned':
+            days_logged, days_completed, total_units = data['logs'].query_range(habit_name, habit_type, date.min, date.max)
+
+        elif STATS_ENGINE == 'numpy': #numpy adds up the habit's whole column at once
+            days_logged, days_completed, total_units = query_range_numpy(index, habit_name, habit_type, date.min, date.max)
+
+        else: #bisects and bit counts on the habit's compact column
+            days_logged, days_completed, total_units = index.query_range(habit_name, habit_type, date.min, date.max)
+
+        habit_stats[habit_name] = stats_from_totals(habit_info, days_logged, days_completed, total_units)
+
+    return habit_stats
+
+def view_habit_stats():
+    data = store.load()
+
+    if not data['habits']: #stops the function if there are no habits
+        print('\nNo habits found. Please create a habit first.')
+        return #cancels the whole function and returns to the main menu loop
+    
+    print('\nHabit Statistics (active only):\n')
+
+    consistency = calculate_consistency(data, date.today()) #streaks of every binary habit in one pass
+
+    for habit_name, stats in calculate_habit_stats(data).items():
+        habit_info = data['habits'][habit_name]
+        habit_type = habit_info['type']
+        unit = habit_info.get('unit', '') #only for quantative habits, empty string otherwise
         
         print(f'Habit: {habit_name}')
         print(f'Type: {habit_type}')
-        print(f'Created on: {created}')
-        print(f'Days logged: {days_logged}')
+        print(f'Created on: {habit_info["created"]}')
+        print(f'Days logged: {stats["days_logged"]}')
 
         if habit_type == 'binary': #days completed for binary habits
-            print(f'Days completed: {days_completed}')
-            if days_logged > 0:
-                completion_rate = (days_completed / days_logged) * 100
-                print(f'Completion rate: {completion_rate:.2f}%') #:.2f limits to 2 decimal places
+            print(f'Days completed: {stats["days_completed"]}')
+            if stats['completion_rate'] is not None:
+                print(f'Completion rate: {stats["completion_rate"]:.2f}%') #:.2f limits to 2 decimal places
             else:
                 print('Completion rate: N/A')
+            print_consistency(consistency[habit_name])
         
         elif habit_type == 'quantitative': #averages for quantative habits
-            print(f'Total: {total_units} {unit}')
-            if days_logged > 0:
-                average = total_units / days_logged
-                print(f'Average per day logged: {average:.2f} {unit}')
+            print(f'Total: {stats["total_units"]} {unit}')
+            if stats['average'] is not None:
+                print(f'Average per day logged: {stats["average"]:.2f} {unit}')
             else:
                 print('Average per day logged: N/A')
 
@@ -257,151 +932,923 @@ def get_week_range(date_obj):
 
 def get_dates_in_range(start_date, end_date):
     """
-    Returns a list of date objects from start_date to end_date inclusive.
+    Yields date objects from start_date to end_date inclusive, one at a time instead of building a list.
     """
 
-    dates = [] # this will store the date objects in the range
     current_date = start_date # define loop variable
 
     while current_date <= end_date: # loop until the current date is after the end date
-        dates.append(current_date)
+        yield current_date
         current_date += timedelta(days=1) # adds one day and keeps it as a date object
-    
-    return dates #returns a list of date objects
 
-def calculate_stats_for_range(habit_name, habit_info, start_date, end_date, data):
+def make_bitset(positions):
     """
-    Calculates statistics for a single habit between start_date and end_date inclusive.
-    Returns a dictionary of computed stats.
+    Returns an int with the given bit positions set, built in one go rather than one bit at a time.
     """
 
-    habit_type = habit_info['type'] #used to determine how the stats are calculated
-    unit = habit_info.get('unit', '') #only for quantative habits, empty string otherwise
-
-    days_logged = 0 #define counters to be used in the loop below
-    days_completed = 0
-    total_units = 0
-
-    for log_date_str, daily_log in data['logs'].items(): # loops through each log and looks for the specific habit
-        log_date = date.fromisoformat(log_date_str) #converts the date string back into a date object
+    if not positions:
+        return 0
 
-        if log_date < start_date or log_date > end_date:
-            continue #skips the iteration of the for loop if the log date is outside the specified range
+    bits = bytearray(max(positions) // 8 + 1) # 8 bits per byte
+    for position in positions:
+        bits[position // 8] |= 1 << (position % 8)
 
-        if habit_name not in daily_log:
-            continue #skips the iteration of the for loop if the habit wasn't logged that day
+    return int.from_bytes(bits, 'little') # byte 0 holds bits 0 to 7
 
-        days_logged += 1
-        value = daily_log[habit_name] #gets the logged value for that habit on that day
+class HabitDefinition:
+    """
+    A habit definition. __slots__ stops every habit from carrying its own attribute dictionary.
+    unit and active are None when the json definition didn't have them.
+    """
 
-        if habit_type == 'binary':
-            if value is True:
-                days_completed += 1
+    __slots__ = ('name', 'type', 'unit', 'created', 'active')
 
-        elif habit_type == 'quantitative':
-            total_units += value
-    
-    if habit_type == 'binary':
-        completion_rate = None
-        if days_logged > 0:
-            completion_rate = (days_completed / days_logged) * 100
-        
-        return { #returns a dictionary of the calculated stats
-            'type': 'binary',
-            'days_logged': days_logged,
-            'days_completed': days_completed,
-            'completion_rate': completion_rate
-        }
-    
-    elif habit_type == 'quantitative':
-        average = None
-        if days_logged > 0:
-            average = total_units / days_logged
-        
-        return { #returns a dictionary of the calculated stats
-            'type': 'quantitative',
-            'days_logged': days_logged,
-            'total_units': total_units,
-            'average': average,
-            'unit': unit
-        }
+    def __init__(self, name, habit_type, unit, created, active):
+        self.name = name
+        self.type = habit_type
+        self.unit = unit
+        self.created = created # day ordinal
+        self.active = active
 
-def get_completed_weeks(habit_created_date, today):
-    """
-    Returns a list of (week_start, week_end) tuples for completed weeks,
-    Starting after the habit was created and excluding the current week.
-    """
+    @classmethod
+    def from_dict(cls, habit_name, habit_info):
+        return cls(habit_name, habit_info['type'], habit_info.get('unit'), date.fromisoformat(habit_info['created']).toordinal(), habit_info.get('active'))
 
-    completed_weeks = [] #this will store the completed weeks as tuples of (week_start, week_end)
+    def to_dict(self):
+        habit_info = {'type': self.type}
 
-    creation_week_start, _ = get_week_range(habit_created_date) #gets the start of the week for the habit creation date
-    first_week_start = creation_week_start + timedelta(days=7) # avoids the incomplete week of the habit creation
+        if self.unit is not None:
+            habit_info['unit'] = self.unit
 
-    current_week_start, _ = get_week_range(today) #gets the start of the current week, to exclude it from the completed weeks
+        habit_info['created'] = date.fromordinal(self.created).isoformat()
 
-    current_week = first_week_start # define loop variable
+        if self.active is not None:
+            habit_info['active'] = self.active
 
-    while current_week < current_week_start: #loops through all completed weeks
-        week_start = current_week #date object for the start of the week
-        week_end = week_start + timedelta(days=6) #date object for the end of the week
-        completed_weeks.append((week_start, week_end))
-        current_week += timedelta(days=7) #moves to the next week by adding 7 days
-    
-    return completed_weeks #returns a list of tuples of (week_start, week_end)
+        return habit_info
 
-def print_week_stats(habit_info, stats):
+class HabitColumn:
     """
-    Prints formatted weekly stats for a single habit.
+    Every log of one habit, in date order.
+      ordinals      - array of the day ordinals the habit was logged on
+      values        - array('d') of the logged values, None for binary habits
+      whole_numbers - bitset of the positions in values that were ints (not floats) in the json
+      origin        - the first ordinal, bit 0 of the day bitsets below
+      logged        - bitset of the days the habit was logged
+      completed     - bitset of the days a binary habit was completed
+    A column is binary when every logged value is True or False.
     """
 
-    if habit_info['type'] == 'binary': #prints the stats for a binary habit
-        print(f"  Days logged: {stats['days_logged']}")
-        print(f"  Completed days: {stats['days_completed']}")
+    __slots__ = ('ordinals', 'values', 'whole_numbers', 'origin', 'logged', 'completed')
 
-        if stats ['completion_rate'] is not None:
-            print(f"  Completion rate: {stats['completion_rate']:.2f}%")
-        else:
-            print("  Completion rate: N/A")
-    
-    elif habit_info['type'] == 'quantitative': #prints the stats for a quantative habit
-        unit = habit_info['unit']
-        print(f"  Days logged: {stats['days_logged']}")
-        print(f"  Total {unit}: {stats['total_units']}")
+    def __init__(self, ordinals, values):
+        self.ordinals = array('i', ordinals)
+        self.origin = ordinals[0] if ordinals else 0
+        self.logged = make_bitset([ordinal - self.origin for ordinal in ordinals])
 
-        if stats['average'] is not None:
-            print(f"  Average per day: {stats['average']:.2f} {unit}")
+        if all(type(value) is bool for value in values):
+            self.values = None
+            self.whole_numbers = 0
+            self.completed = make_bitset([ordinal - self.origin for ordinal, value in zip(ordinals, values) if value])
         else:
-            print("  Average per day: N/A")
+            self.values = array('d', values)
+            self.whole_numbers = make_bitset([position for position, value in enumerate(values) if type(value) is int])
+            self.completed = 0
 
-def average_weekly_stats(habit_name, habit_info, data, completed_weeks):
-    """
-    Calculates average weekly stats across all completed weeks for a habit.
-    Returns a stats dictionary or None if no valid weeks exist.
-    """
+    def __len__(self):
+        return len(self.ordinals)
 
-    if not completed_weeks:
-        return None
-    
-    total_days_logged = 0 #define counters to be used in the loop below
-    total_days_completed = 0
-    total_overall_units = 0
-    valid_weeks = 0
+    def value_at(self, position):
+        """
+        Returns the logged value at a position exactly as it was in the json.
+        """
 
-    for week_start, week_end in completed_weeks: #loops through each completed week and calculates the stats
-        stats = calculate_stats_for_range(habit_name, habit_info, week_start, week_end, data)
+        if self.values is None:
+            return bool(self.completed >> (self.ordinals[position] - self.origin) & 1)
 
-        if stats['days_logged'] == 0:
-            continue #skips weeks where the habit wasn't logged at all
+        if self.whole_numbers >> position & 1:
+            return int(self.values[position])
 
-        valid_weeks += 1
-        total_days_logged += stats['days_logged']
+        return self.values[position]
 
-        if habit_info['type'] == 'binary': #completed days for binary habits
-            total_days_completed += stats['days_completed']
-        
-        elif habit_info['type'] == 'quantitative': #total units for quantitative habits
-            total_overall_units += stats['total_units']
+    def set(self, ordinal, value):
+        """
+        Logs value on a day, replacing the day's value if it already has one. O(n) at worst for the array
+        insert, but a new day is usually the last one so it's just an append.
+        """
+
+        binary_value = type(value) is bool
+
+        if binary_value != (self.values is None) or not self.ordinals:
+            # the column changes between binary and quantitative, which is rare enough to just rebuild it
+            logs = {day: self.value_at(position) for position, day in enumerate(self.ordinals)}
+            logs[ordinal] = value
+            self.__init__(sorted(logs), [logs[day] for day in sorted(logs)])
+            return
+
+        if ordinal < self.origin: #a day before the first log, every day bitset moves up to make room
+            shift = self.origin - ordinal
+            self.logged <<= shift
+            self.completed <<= shift
+            self.origin = ordinal
+
+        position = bisect_left(self.ordinals, ordinal)
+        bit = 1 << (ordinal - self.origin)
+        new_day = position == len(self.ordinals) or self.ordinals[position] != ordinal
+
+        if new_day:
+            self.ordinals.insert(position, ordinal)
+            self.logged |= bit
+
+        if self.values is None:
+            self.completed = self.completed | bit if value else self.completed & ~bit
+            return
+
+        if new_day:
+            self.values.insert(position, value)
+            below = self.whole_numbers & ((1 << position) - 1)
+            self.whole_numbers = below | (self.whole_numbers >> position << (position + 1)) #the positions after the new one move up by one
+        else:
+            self.values[position] = value
+
+        if type(value) is int:
+            self.whole_numbers |= 1 << position
+        else:
+            self.whole_numbers &= ~(1 << position)
+
+    def query_range(self, habit_type, start_ordinal, end_ordinal):
+        """
+        Returns (days_logged, days_completed, total_units) between two day ordinals inclusive.
+        """
+
+        lo = bisect_left(self.ordinals, start_ordinal) #first log on or after start_ordinal
+        hi = max(bisect_right(self.ordinals, end_ordinal), lo) #first log after end_ordinal, never before lo
+
+        days_logged = hi - lo
+        days_completed = 0
+        total_units = 0
+
+        if days_logged == 0:
+            return 0, 0, 0
+
+        if self.values is None:
+            first_bit = self.ordinals[lo] - self.origin
+            width = self.ordinals[hi - 1] - self.ordinals[lo] + 1
+            completed = (self.completed >> first_bit & ((1 << width) - 1)).bit_count() #counts the completed days without looking at them one by one
+
+            if habit_type == 'binary':
+                days_completed = completed
+            elif habit_type == 'quantitative':
+                total_units = completed #adding up True/False values counts the Trues
+
+        elif habit_type == 'quantitative':
+            # added up one by one in date order (not with a prefix sum) so float totals come out exactly the same as before
+            for value in self.values[lo:hi]:
+                total_units += value
+
+            if ((self.whole_numbers >> lo) & ((1 << days_logged) - 1)) == (1 << days_logged) - 1:
+                total_units = int(total_units) #every value was a whole number, so the json total would have been an int too
+
+        return days_logged, days_completed, total_units
+
+class CompactLogs:
+    """
+    A compact copy of the habit data for the stats loops: one HabitColumn per habit instead of a
+    dictionary per day, and integer day ordinals instead of date strings.
+    Converts back to the json layout with to_data() without losing anything, and update() and
+    update_habit() apply changes to it without rebuilding it.
+    """
+
+    __slots__ = ('habits', 'days', 'columns')
+
+    def __init__(self, habits, days, columns):
+        self.habits = habits # habit_name -> HabitDefinition
+        self.days = days # array of every logged day ordinal, including days where nothing was logged
+        self.columns = columns # habit_name -> HabitColumn
+
+    @classmethod
+    def from_data(cls, data):
+        habits = {habit_name: HabitDefinition.from_dict(habit_name, habit_info) for habit_name, habit_info in data['habits'].items()}
+        days = array('i')
+        logs_by_habit = {} # habit_name -> (ordinals, values) lists, turned into columns at the end
+
+        for log_date_str in sorted(data['logs']): # ISO date strings sort in date order
+            ordinal = date.fromisoformat(log_date_str).toordinal() # parses each date only once per load
+            days.append(ordinal)
+
+            for habit_name, value in data['logs'][log_date_str].items():
+                if habit_name not in logs_by_habit:
+                    logs_by_habit[habit_name] = ([], [])
+                logs_by_habit[habit_name][0].append(ordinal)
+                logs_by_habit[habit_name][1].append(value)
+
+        columns = {habit_name: HabitColumn(ordinals, values) for habit_name, (ordinals, values) in logs_by_habit.items()}
+        return cls(habits, days, columns)
+
+    def to_data(self):
+        logs = {date.fromordinal(ordinal).isoformat(): {} for ordinal in self.days}
+
+        for habit_name, column in self.columns.items():
+            for position, ordinal in enumerate(column.ordinals):
+                logs[date.fromordinal(ordinal).isoformat()][habit_name] = column.value_at(position)
+
+        return {'habits': {habit_name: habit.to_dict() for habit_name, habit in self.habits.items()}, 'logs': logs}
+
+    def update(self, log_date_str, habit_name, value):
+        ordinal = date.fromisoformat(log_date_str).toordinal()
+
+        position = bisect_left(self.days, ordinal)
+        if position == len(self.days) or self.days[position] != ordinal:
+            self.days.insert(position, ordinal)
+
+        if habit_name in self.columns:
+            self.columns[habit_name].set(ordinal, value)
+        else:
+            self.columns[habit_name] = HabitColumn([ordinal], [value])
+
+    def update_habit(self, habit_name, habit_info):
+        self.habits[habit_name] = HabitDefinition.from_dict(habit_name, habit_info)
+
+    def query_range(self, habit_name, habit_type, start_date, end_date):
+        """
+        Returns (days_logged, days_completed, total_units) for a habit between start_date and end_date inclusive.
+        """
+
+        column = self.columns.get(habit_name)
+
+        if column is None:
+            return 0, 0, 0 #the habit has never been logged
+
+        return column.query_range(habit_type, start_date.toordinal(), end_date.toordinal())
+
+def build_log_matrix(data):
+    """
+    Builds a dense day x habit matrix of the logs for the numpy stats engine.
+    Row 0 is the Monday on or before the first log, so every 7 rows make up one Monday to Sunday week.
+    Returns a dictionary of the arrays along with their prefix sums and weekly totals.
+    """
+
+    habit_names = [] # one entry per logged value, in the same order as the logs
+    values = []
+    day_counts = [] # how many values were logged on each day
+
+    for daily_log in data['logs'].values():
+        habit_names.extend(daily_log) # .extend() adds every item rather than the dictionary itself
+        values.extend(daily_log.values())
+        day_counts.append(len(daily_log))
+
+    ordinals = np.array([date.fromisoformat(log_date_str).toordinal() for log_date_str in data['logs']], dtype=np.int64)
+    start = get_week_range(date.fromordinal(int(ordinals.min())))[0].toordinal() if len(ordinals) else today.toordinal()
+    weeks = int(ordinals.max() - start) // 7 + 1 if len(ordinals) else 1
+
+    columns = {habit_name: column for column, habit_name in enumerate(dict.fromkeys(habit_names))} # dict.fromkeys removes duplicates but keeps the order
+    is_binary = np.array([data['habits'].get(habit_name, {}).get('type') == 'binary' for habit_name in columns], dtype=bool)
+
+    rows = np.repeat(ordinals - start, day_counts) # the row of every logged value
+    cols = np.fromiter(map(columns.__getitem__, habit_names), dtype=np.int64, count=len(habit_names)) # the column of every logged value
+    is_float = np.fromiter((type(value) is float for value in values), dtype=bool, count=len(values)) # the rest are ints or True/False
+    values = np.array(values, dtype=np.float64) # True/False become 1.0/0.0
+    binary_values = is_binary[cols]
+
+    shape = (weeks * 7, len(columns))
+
+    logged = np.zeros(shape, dtype=bool) # True where the habit was logged that day
+    completed = np.zeros(shape, dtype=bool) # True where a binary habit was completed that day
+    units = np.zeros(shape, dtype=np.float64) # logged value of quantitative habits, 0 everywhere else
+    fractional = np.zeros(shape, dtype=bool) # True where a quantitative value was a float in the json, not a whole number
+
+    logged[rows, cols] = True
+    completed[rows[binary_values], cols[binary_values]] = values[binary_values] == 1.0
+    units[rows[~binary_values], cols[~binary_values]] = values[~binary_values] # ~ flips a boolean array
+    fractional[rows[~binary_values], cols[~binary_values]] = is_float[~binary_values]
+
+    logged_prefix = np.zeros((shape[0] + 1, shape[1]), dtype=np.int64) # row i holds the totals of the first i days
+    completed_prefix = np.zeros((shape[0] + 1, shape[1]), dtype=np.int64)
+    fractional_prefix = np.zeros((shape[0] + 1, shape[1]), dtype=np.int64)
+    np.cumsum(logged, axis=0, out=logged_prefix[1:])
+    np.cumsum(completed, axis=0, out=completed_prefix[1:])
+    np.cumsum(fractional, axis=0, out=fractional_prefix[1:])
+
+    return {
+        'start': start,
+        'columns': columns,
+        'is_binary': is_binary,
+        'units': units,
+        'logged_prefix': logged_prefix,
+        'completed_prefix': completed_prefix,
+        'fractional_prefix': fractional_prefix,
+        # reshaping to (weeks, 7, habits) and adding up the middle axis gives every week's totals at once,
+        # the 7 days are added in order so float totals match adding them up one by one
+        'weekly_logged': logged.reshape(weeks, 7, -1).sum(axis=1),
+        'weekly_completed': completed.reshape(weeks, 7, -1).sum(axis=1),
+        'weekly_units': units.reshape(weeks, 7, -1).sum(axis=1),
+        'weekly_fractional': fractional.reshape(weeks, 7, -1).sum(axis=1)
+    }
+
+def update_log_matrix(matrix, log_date_str, habit_name, value):
+    """
+    Writes one logged value into a matrix from build_log_matrix() in place: the prefix sums from that day on
+    and that week's totals. Returns False if the matrix has no column for the habit or no row for the day,
+    in which case it has to be rebuilt.
+    """
+
+    column = matrix['columns'].get(habit_name)
+    row = date.fromisoformat(log_date_str).toordinal() - matrix['start']
+
+    if column is None or not 0 <= row < matrix['units'].shape[0]:
+        return False
+
+    week = row // 7
+    is_binary = matrix['is_binary'][column]
+
+    new = { #this day's new logged, completed and fractional counts, worked out the same way as build_log_matrix()
+        'logged': 1,
+        'completed': int(is_binary and float(value) == 1.0),
+        'fractional': int(not is_binary and type(value) is float)
+    }
+
+    for name, count in new.items():
+        prefix = matrix[f'{name}_prefix']
+        change = count - int(prefix[row + 1, column] - prefix[row, column]) #the old count is the difference of the prefix sums
+        if change:
+            prefix[row + 1:, column] += change
+            matrix[f'weekly_{name}'][week, column] += change
+
+    matrix['units'][row, column] = 0.0 if is_binary else float(value)
+    matrix['weekly_units'][week, column] = matrix['units'][week * 7:week * 7 + 7, column].sum() #added up again in day order, so floats match a rebuild
+
+    return True
+
+def query_range_numpy(matrix, habit_name, habit_type, start_date, end_date):
+    """
+    Returns (days_logged, days_completed, total_units) for a habit between start_date and end_date inclusive,
+    using a matrix from build_log_matrix().
+    """
+
+    column = matrix['columns'].get(habit_name)
+    day_count = matrix['units'].shape[0]
+
+    lo = min(max(start_date.toordinal() - matrix['start'], 0), day_count) #clamps the range to the rows in the matrix
+    hi = min(max(end_date.toordinal() - matrix['start'] + 1, 0), day_count)
+
+    if column is None or hi <= lo:
+        return 0, 0, 0
+
+    days_logged = int(matrix['logged_prefix'][hi, column] - matrix['logged_prefix'][lo, column])
+    days_completed = int(matrix['completed_prefix'][hi, column] - matrix['completed_prefix'][lo, column])
+    total_units = 0
+
+    if habit_type == 'quantitative' and days_logged > 0:
+        total_units = float(np.cumsum(matrix['units'][lo:hi, column])[-1]) #cumsum adds in order, unlike sum()
+
+        if matrix['fractional_prefix'][hi, column] == matrix['fractional_prefix'][lo, column]:
+            total_units = int(total_units) #every value was a whole number, so the json total would have been an int too
+
+    return days_logged, days_completed, total_units
+
+def sum_weeks_numpy(matrix, habit_name, completed_weeks):
+    """
+    Adds up the weekly totals of a habit over Monday to Sunday weeks using a matrix from build_log_matrix().
+    Returns (valid_weeks, total_days_logged, total_days_completed, total_units), only counting weeks with logs.
+    """
+
+    column = matrix['columns'].get(habit_name)
+
+    if column is None:
+        return 0, 0, 0, 0
+
+    week_numbers = np.array([(week_start.toordinal() - matrix['start']) // 7 for week_start, _ in completed_weeks], dtype=np.int64)
+    week_numbers = week_numbers[(week_numbers >= 0) & (week_numbers < matrix['weekly_logged'].shape[0])] #weeks before the first log have no data
+
+    weekly_logged = matrix['weekly_logged'][week_numbers, column]
+    valid = weekly_logged > 0 #skips weeks where the habit wasn't logged at all
+
+    valid_weeks = int(valid.sum())
+
+    if valid_weeks == 0:
+        return 0, 0, 0, 0
+
+    total_days_logged = int(weekly_logged.sum())
+    total_days_completed = int(matrix['weekly_completed'][week_numbers, column].sum())
+    total_units = float(np.cumsum(matrix['weekly_units'][week_numbers, column][valid])[-1])
+
+    if not matrix['weekly_fractional'][week_numbers, column].any():
+        total_units = int(total_units) #every value was a whole number, as in the python engine
+
+    return valid_weeks, total_days_logged, total_days_completed, total_units
+
+def build_stats_index(data):
+    """
+    Builds whatever the current storage backend and stats engine use to answer range queries.
+    """
+
+    if STORAGE_BACKEND != 'json':
+        return None #the database and the partitioned archive answer range queries themselves
+    
+    if STATS_ENGINE == 'numpy':
+        return store.log_matrix() if data is store.data else build_log_matrix(data) #the store keeps its matrix up to date, like its CompactLogs
+
+    return get_compact_logs(data)
+
+def get_compact_logs(data):
+    """
+    Returns the CompactLogs of data. The store keeps one up to date as changes are recorded, so that one is
+    used when data is the store's data, anything else gets a new one.
+    """
+
+    if data is store.data:
+        return store.compact_logs()
+
+    return CompactLogs.from_data(data)
+
+class FenwickTree:
+    """
+    A Fenwick (binary indexed) tree of integers over positions 0 to size-1.
+    Adding to one position and adding up the first n positions both take O(log n) steps.
+    """
+
+    __slots__ = ('tree',)
+
+    def __init__(self, values=()):
+        self.tree = [0] + list(values) # tree[i] holds the total of a block of positions ending at i-1
+
+        for i in range(1, len(self.tree)): #builds every block in one pass by passing each total up to its parent
+            parent = i + (i & -i)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[i]
+
+    def __len__(self):
+        return len(self.tree) - 1
+
+    def add(self, position, amount):
+        i = position + 1
+        while i < len(self.tree):
+            self.tree[i] += amount
+            i += i & -i # i & -i is the lowest set bit of i, the size of the block at i
+
+    def prefix_sum(self, count):
+        """
+        Returns the total of positions 0 to count-1.
+        """
+
+        total = 0
+        while count > 0:
+            total += self.tree[count]
+            count -= count & -count
+        return total
+
+    def range_sum(self, lo, hi):
+        return self.prefix_sum(hi) - self.prefix_sum(lo) #positions lo to hi-1
+
+    def extend(self, size):
+        """
+        Grows the tree to size positions, the new positions start at 0.
+        """
+
+        while len(self.tree) <= size:
+            i = len(self.tree)
+            self.tree.append(self.prefix_sum(i - 1) - self.prefix_sum(i - (i & -i))) #the block's total without the new (zero) position
+
+    def scale(self, bits):
+        self.tree = [total << bits for total in self.tree] #multiplies every total by 2 ** bits
+
+def unit_bits(value):
+    """
+    Returns how many binary places a logged value needs to be stored as an exact whole number.
+    A float is always a whole number divided by a power of 2, e.g. 1.25 = 5 / 2 ** 2.
+    """
+
+    if value is None or isinstance(value, bool):
+        return 0
+    return value.as_integer_ratio()[1].bit_length() - 1
+
+class HabitRangeTree:
+    """
+    Fenwick trees over the days of one habit (position 0 = origin day ordinal) counting
+    logged days, completed days and units. Units are stored as exact whole numbers
+    (value * 2 ** shift), so overwriting a log never leaves float rounding errors behind.
+    """
+
+    __slots__ = ('origin', 'values', 'shift', 'logged', 'completed', 'units')
+
+    def __init__(self, origin, logs):
+        self.origin = origin
+        self.values = [None] * (logs[-1][0] - origin + 1 if logs else 0) # the logged value of each day, None if not logged
+
+        for ordinal, value in logs:
+            self.values[ordinal - origin] = value
+
+        self.shift = max((unit_bits(value) for value in self.values), default=0)
+        self.logged = FenwickTree(0 if value is None else 1 for value in self.values)
+        self.completed = FenwickTree(1 if value is True else 0 for value in self.values)
+        self.units = FenwickTree(self.scaled(value) for value in self.values)
+
+    def scaled(self, value):
+        if value is None:
+            return 0
+        if isinstance(value, bool):
+            return int(value) << self.shift #adding up True/False values counts the Trues, like the other stats
+        numerator, denominator = value.as_integer_ratio()
+        return numerator << (self.shift - (denominator.bit_length() - 1))
+
+    def update(self, ordinal, value):
+        """
+        Sets the logged value of one day (a new log or an overwritten one) in O(log n).
+        """
+
+        if ordinal < self.origin: #a log before the first one, rebuilt around the new first day
+            logs = [(self.origin + position, old) for position, old in enumerate(self.values) if old is not None]
+            self.__init__(ordinal, [(ordinal, value)] + logs)
+            return
+
+        position = ordinal - self.origin
+
+        if position >= len(self.values): #a day after the last one, usually today
+            self.values.extend([None] * (position + 1 - len(self.values)))
+            for tree in (self.logged, self.completed, self.units):
+                tree.extend(position + 1)
+
+        if unit_bits(value) > self.shift: #needs more binary places, so every stored total is scaled up
+            self.units.scale(unit_bits(value) - self.shift)
+            self.shift = unit_bits(value)
+
+        old = self.values[position]
+
+        if old is not None: #takes the old value back out first
+            self.logged.add(position, -1)
+            self.completed.add(position, -1 if old is True else 0)
+            self.units.add(position, -self.scaled(old))
+
+        self.values[position] = value
+        self.logged.add(position, 1)
+        self.completed.add(position, 1 if value is True else 0)
+        self.units.add(position, self.scaled(value))
+
+    def query(self, habit_type, start_ordinal, end_ordinal):
+        """
+        Returns (days_logged, days_completed, total_units) between two day ordinals inclusive in O(log n).
+        """
+
+        lo = max(start_ordinal - self.origin, 0)
+        hi = min(end_ordinal - self.origin + 1, len(self.values))
+
+        if hi <= lo:
+            return 0, 0, 0
+
+        days_logged = self.logged.range_sum(lo, hi)
+        days_completed = self.completed.range_sum(lo, hi) if habit_type == 'binary' else 0
+        total_units = self.units.range_sum(lo, hi) / (1 << self.shift) if habit_type == 'quantitative' else 0 #dividing two ints rounds correctly
+
+        return days_logged, days_completed, total_units
+
+class RangeIndex:
+    """
+    A HabitRangeTree for every logged habit, so the stats of any date range take O(log n),
+    and a new or overwritten log is applied in O(log n) with update().
+    """
+
+    def __init__(self, data):
+        self.data = data
+        logs_by_habit = {} # habit_name -> [(ordinal, value)] in date order
+
+        for log_date_str in sorted(data['logs']): # one pass over the logs for every habit
+            ordinal = date.fromisoformat(log_date_str).toordinal()
+            for habit_name, value in data['logs'][log_date_str].items():
+                logs_by_habit.setdefault(habit_name, []).append((ordinal, value))
+
+        self.trees = {habit_name: HabitRangeTree(logs[0][0], logs) for habit_name, logs in logs_by_habit.items()}
+
+    def update(self, log_date_str, habit_name, value):
+        ordinal = date.fromisoformat(log_date_str).toordinal()
+
+        if habit_name in self.trees:
+            self.trees[habit_name].update(ordinal, value)
+        else:
+            self.trees[habit_name] = HabitRangeTree(ordinal, [(ordinal, value)])
+
+    def query(self, habit_name, start_date, end_date):
+        """
+        Returns the stats dictionary of a habit between start_date and end_date inclusive.
+        """
+
+        habit_info = self.data['habits'][habit_name]
+        tree = self.trees.get(habit_name)
+        totals = tree.query(habit_info['type'], start_date.toordinal(), end_date.toordinal()) if tree is not None else (0, 0, 0)
+
+        return stats_from_totals(habit_info, *totals)
+
+    def month_to_date(self, habit_name, today):
+        return self.query(habit_name, today.replace(day=1), today)
+
+    def year_to_date(self, habit_name, today):
+        return self.query(habit_name, today.replace(month=1, day=1), today)
+
+    def rolling(self, habit_name, days, today):
+        return self.query(habit_name, today - timedelta(days=days - 1), today) #the last `days` days including today
+
+    def rolling_series(self, habit_name, days, count, today):
+        """
+        Returns [(end_date, stats)] for the `count` rolling windows of `days` days ending on each of the last `count` days, oldest first.
+        """
+
+        return [
+            (end_date, self.rolling(habit_name, days, end_date))
+            for end_date in (today - timedelta(days=count - 1 - i) for i in range(count))
+        ]
+
+def calculate_stats_for_range(habit_name, habit_info, start_date, end_date, data, index=None):
+    """
+    Calculates statistics for a single habit between start_date and end_date inclusive.
+    Pass an index from build_stats_index() to answer the query without rescanning all the logs.
+    Returns a dictionary of computed stats.
+    """
+
+    habit_type = habit_info['type'] #used to determine how the stats are calculated
+
+    if STORAGE_BACKEND == 'sqlite': #the database answers range queries itself, no index needed
+        days_logged, days_completed, total_units = query_range_sqlite(habit_name, start_date, end_date)
+
+    elif STORAGE_BACKEND == 'partitioned': #only reads the months that overlap the range, no index needed
+        days_logged, days_completed, total_units = data['logs'].query_range(habit_name, habit_type, start_date, end_date)
+
+    else:
+        if index is None:
+            index = build_stats_index(data) #one-off calls build their own index
+
+        if STATS_ENGINE == 'numpy':
+            days_logged, days_completed, total_units = query_range_numpy(index, habit_name, habit_type, start_date, end_date)
+        else:
+            days_logged, days_completed, total_units = index.query_range(habit_name, habit_type, start_date, end_date)
+
+    return stats_from_totals(habit_info, days_logged, days_completed, total_units)
+
+def stats_from_totals(habit_info, days_logged, days_completed, total_units):
+    """
+    Turns the totals for a range of days into the stats dictionary returned by calculate_stats_for_range().
+    """
+
+    habit_type = habit_info['type']
+    unit = habit_info.get('unit', '') #only for quantative habits, empty string otherwise
+
+    if habit_type == 'binary':
+        completion_rate = None
+        if days_logged > 0:
+            completion_rate = (days_completed / days_logged) * 100
+        
+        return { #returns a dictionary of the calculated stats
+            'type': 'binary',
+            'days_logged': days_logged,
+            'days_completed': days_completed,
+            'completion_rate': completion_rate
+        }
+    
+    elif habit_type == 'quantitative':
+        average = None
+        if days_logged > 0:
+            average = total_units / days_logged
+        
+        return { #returns a dictionary of the calculated stats
+            'type': 'quantitative',
+            'days_logged': days_logged,
+            'total_units': total_units,
+            'average': average,
+            'unit': unit
+        }
+
+class CompletedWeeks(Sequence):
+    """
+    The (week_start, week_end) tuples of a run of Monday to Sunday weeks.
+    Works like a list, but each tuple is only made when it's used.
+    """
+
+    __slots__ = ('first_ordinal', 'count')
+
+    def __init__(self, first_week_start, count):
+        self.first_ordinal = first_week_start.toordinal()
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self.count))]
+
+        if position < 0:
+            position += self.count
+        if not 0 <= position < self.count:
+            raise IndexError('week index out of range')
+
+        week_start = date.fromordinal(self.first_ordinal + 7 * position)
+        return week_start, week_start + timedelta(days=6) #(week_start, week_end)
+
+def get_completed_weeks(habit_created_date, today):
+    """
+    Returns the (week_start, week_end) tuples of completed weeks as a CompletedWeeks,
+    Starting after the habit was created and excluding the current week.
+    """
+
+    creation_week_start, _ = get_week_range(habit_created_date) #gets the start of the week for the habit creation date
+    first_week_start = creation_week_start + timedelta(days=7) # avoids the incomplete week of the habit creation
+
+    current_week_start, _ = get_week_range(today) #gets the start of the current week, to exclude it from the completed weeks
+
+    week_count = max((current_week_start - first_week_start).days // 7, 0) #both are Mondays, so the difference is whole weeks
+
+    return CompletedWeeks(first_week_start, week_count)
+
+ROLLING_WINDOWS = (7, 30, 90) # day windows for the rolling completion rates
+
+def count_days(bitset, origin, start_ordinal, day_count):
+    """
+    Counts the days set in a day bitset (bit 0 = origin) for day_count days starting at start_ordinal.
+    """
+
+    first_bit = start_ordinal - origin
+
+    if first_bit < 0: #days before the bitset starts are never set
+        day_count += first_bit
+        first_bit = 0
+
+    if day_count <= 0:
+        return 0
+
+    return ((bitset >> first_bit) & ((1 << day_count) - 1)).bit_count() #keeps only the window's bits and counts them
+
+def longest_run(bitset):
+    """
+    Returns the length of the longest run of set bits.
+    Every x & (x >> 1) makes each run one bit shorter, so the number of steps until nothing is left is the longest run.
+    """
+
+    run = 0
+
+    while bitset:
+        bitset &= bitset >> 1
+        run += 1
+
+    return run
+
+def trailing_run(bitset, end_bit):
+    """
+    Returns how many bits are set in a row going down from end_bit.
+    """
+
+    if end_bit < 0:
+        return 0
+
+    gaps = ~bitset & ((1 << (end_bit + 1)) - 1) #the unset bits up to end_bit
+    return end_bit + 1 - gaps.bit_length() #bit_length() is one more than the position of the highest gap
+
+def calculate_consistency(data, today, compact=None):
+    """
+    Calculates streaks and consistency of every active binary habit from their completed day bitsets.
+    The store's data uses the CompactLogs the store keeps up to date, so only other data reads the logs.
+    Everything after that is bit operations.
+    Returns a dictionary of habit_name -> {
+      'current_streak' - days completed in a row up to today (or yesterday if today isn't done yet),
+      'longest_streak' - most days completed in a row,
+      'rolling'        - {days: % of the last days completed, counting only days since the habit was created},
+      'best_week', 'worst_week' - (week_start, days_completed) over completed weeks, None if there aren't any yet
+    }
+    """
+
+    if compact is None:
+        compact = get_compact_logs(data) #no pass over the logs (or loading every partition) once the store has built it
+
+    today_ordinal = today.toordinal()
+    consistency = {}
+
+    for habit_name, habit_info in data['habits'].items():
+        if not habit_info.get('active', True) or habit_info['type'] != 'binary':
+            continue #only active binary habits have streaks
+
+        column = compact.columns.get(habit_name)
+        completed = column.completed if column is not None else 0 #0 if never logged, no days set
+        origin = column.origin if column is not None else today_ordinal
+        created = date.fromisoformat(habit_info['created'])
+
+        streak_end = today_ordinal if count_days(completed, origin, today_ordinal, 1) else today_ordinal - 1 #today still counts as in progress
+
+        rolling = {}
+        for window in ROLLING_WINDOWS:
+            window_start = max(today_ordinal - window + 1, created.toordinal()) #a new habit isn't marked down for days before it existed
+            window_days = today_ordinal - window_start + 1
+            rolling[window] = count_days(completed, origin, window_start, window_days) / window_days * 100 if window_days > 0 else None
+
+        best_week = None
+        worst_week = None
+
+        for week_start, _ in get_completed_weeks(created, today):
+            days_completed = count_days(completed, origin, week_start.toordinal(), 7)
+
+            if best_week is None or days_completed >= best_week[1]: #>= and <= so ties go to the most recent week
+                best_week = (week_start, days_completed)
+            if worst_week is None or days_completed <= worst_week[1]:
+                worst_week = (week_start, days_completed)
+
+        consistency[habit_name] = {
+            'current_streak': trailing_run(completed, streak_end - origin),
+            'longest_streak': longest_run(completed),
+            'rolling': rolling,
+            'best_week': best_week,
+            'worst_week': worst_week
+        }
+
+    return consistency
+
+def print_consistency(consistency, indent=''):
+    print(f"{indent}Current streak: {consistency['current_streak']} days")
+    print(f"{indent}Longest streak: {consistency['longest_streak']} days")
+
+    for window, rate in consistency['rolling'].items():
+        if rate is not None:
+            print(f'{indent}Last {window} days: {rate:.2f}% completed')
+        else:
+            print(f'{indent}Last {window} days: N/A')
+
+    if consistency['best_week'] is None:
+        print(f'{indent}Best and worst week: Not enough data yet.')
+    else:
+        print(f"{indent}Best week: week of {consistency['best_week'][0]} ({consistency['best_week'][1]}/7 days)")
+        print(f"{indent}Worst week: week of {consistency['worst_week'][0]} ({consistency['worst_week'][1]}/7 days)")
+
+def print_week_stats(habit_info, stats):
+    """
+    Prints formatted weekly stats for a single habit.
+    """
+
+    if habit_info['type'] == 'binary': #prints the stats for a binary habit
+        print(f"  Days logged: {stats['days_logged']}")
+        print(f"  Completed days: {stats['days_completed']}")
+
+        if stats ['completion_rate'] is not None:
+            print(f"  Completion rate: {stats['completion_rate']:.2f}%")
+        else:
+            print("  Completion rate: N/A")
+    
+    elif habit_info['type'] == 'quantitative': #prints the stats for a quantative habit
+        unit = habit_info['unit']
+        print(f"  Days logged: {stats['days_logged']}")
+        print(f"  Total {unit}: {stats['total_units']}")
+
+        if stats['average'] is not None:
+            print(f"  Average per day: {stats['average']:.2f} {unit}")
+        else:
+            print("  Average per day: N/A")
+
+def average_weekly_stats(habit_name, habit_info, data, completed_weeks, index=None, weekly_cache=None):
+    """
+    Calculates average weekly stats across all completed weeks for a habit.
+    Pass a weekly_cache from load_weekly_cache() to add up the cached weekly totals instead of querying the logs.
+    Returns a stats dictionary or None if no valid weeks exist.
+    """
+
+    if not completed_weeks:
+        return None
+
+    if weekly_cache is not None:
+        fill_weekly_cache(weekly_cache, data, {habit_name: [week_start for week_start, _ in completed_weeks]}) #only does anything if weeks are missing
+
+    elif index is None:
+        index = build_stats_index(data) #built once here rather than once per week
+    
+    total_days_logged = 0 #define counters to be used in the loop below
+    total_days_completed = 0
+    total_overall_units = 0
+    valid_weeks = 0
+
+    if weekly_cache is None and STORAGE_BACKEND == 'json' and STATS_ENGINE == 'numpy': #adds up every week at once from the weekly totals
+        valid_weeks, total_days_logged, total_days_completed, total_overall_units = sum_weeks_numpy(index, habit_name, completed_weeks)
+
+    else:
+        for week_start, week_end in completed_weeks: #loops through each completed week and calculates the stats
+            if weekly_cache is not None:
+                days_logged, days_completed, total_units = weekly_cache['habits'][habit_name][week_key(week_start)]
+            else:
+                stats = calculate_stats_for_range(habit_name, habit_info, week_start, week_end, data, index)
+                days_logged, days_completed, total_units = stats['days_logged'], stats.get('days_completed', 0), stats.get('total_units', 0)
+
+            if days_logged == 0:
+                continue #skips weeks where the habit wasn't logged at all
+
+            valid_weeks += 1
+            total_days_logged += days_logged
+
+            if habit_info['type'] == 'binary': #completed days for binary habits
+                total_days_completed += days_completed
+            
+            elif habit_info['type'] == 'quantitative': #total units for quantitative habits
+                total_overall_units += total_units
     
+    return average_from_totals(habit_info, valid_weeks, total_days_logged, total_days_completed, total_overall_units)
+
+def average_from_totals(habit_info, valid_weeks, total_days_logged, total_days_completed, total_overall_units):
+    """
+    Turns the totals of the valid (logged) completed weeks into the average week's stats dictionary.
+    Returns None if there are no valid weeks.
+    """
+
     if valid_weeks == 0:
         return None #if there are no valid weeks, return None to indicate that average stats cannot be calculated
     
@@ -425,8 +1872,617 @@ def average_weekly_stats(habit_name, habit_info, data, completed_weeks):
     
     return average_stats
 
-def view_weekly_summary():
+def week_key(date_obj):
+    """
+    Returns the ISO week a date is in, e.g. '2026-W07', used as the key for that week in the weekly cache.
+    """
+
+    return date_obj.strftime('%G-W%V') #%G is the ISO year and %V the ISO week number
+
+def load_weekly_cache():
+    """
+    Loads the weekly totals cache, starting an empty one if it's missing or was written by a different version.
+    The cache looks like {'version': 1, 'habits': {habit_name: {week_key: [days_logged, days_completed, total_units]}}}
+    """
+
+    try:
+        with open(weekly_cache_file, "r") as file:
+            cache = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError): #a missing or damaged cache is simply rebuilt
+        cache = None
+
+    if cache is None or cache.get('version') != WEEKLY_CACHE_VERSION:
+        cache = {'version': WEEKLY_CACHE_VERSION, 'habits': {}}
+
+    return cache
+
+def save_weekly_cache(cache):
+    file_storage.write_json(weekly_cache_file, cache)
+
+def fill_weekly_cache(cache, data, week_starts_by_habit):
+    """
+    Works out the totals of any weeks missing from the cache. week_starts_by_habit maps habit names to lists of Mondays.
+    The stats index is only built if something is missing. Returns True if the cache changed.
+    """
+
+    index = None
+    changed = False
+
+    for habit_name, week_starts in week_starts_by_habit.items():
+        habit_info = data['habits'][habit_name]
+        habit_weeks = cache['habits'].setdefault(habit_name, {})
+
+        for week_start in week_starts:
+            key = week_key(week_start)
+
+            if key in habit_weeks:
+                continue #already cached
+
+            if index is None:
+                index = build_stats_index(data)
+
+            stats = calculate_stats_for_range(habit_name, habit_info, week_start, week_start + timedelta(days=6), data, index)
+            habit_weeks[key] = [stats['days_logged'], stats.get('days_completed', 0), stats.get('total_units', 0)]
+            changed = True
+
+    return changed
+
+def cached_week_stats(cache, habit_name, habit_info, week_start):
+    """
+    Returns the stats dictionary for one week from the cache (the week must already be filled in).
+    """
+
+    days_logged, days_completed, total_units = cache['habits'][habit_name][week_key(week_start)]
+    return stats_from_totals(habit_info, days_logged, days_completed, total_units)
+
+def update_weekly_cache(records, overwritten):
+    """
+    Adds newly logged values onto the cached totals of their week, so the cache stays up to date without a rebuild.
+    Weeks where a value was overwritten (overwritten is a set of (date, habit) pairs) are removed instead,
+    and get recalculated from the logs the next time they're needed.
+    New values must be the latest log in their week (like today's logs) so the totals add up in date order.
+    """
+
+    if not os.path.exists(weekly_cache_file):
+        return #nothing has been cached yet
+
+    cache = load_weekly_cache()
+
+    for record in records:
+        if record['op'] != 'log':
+            continue
+
+        habit_weeks = cache['habits'].get(record['habit'], {})
+        key = week_key(date.fromisoformat(record['date']))
+
+        if key not in habit_weeks:
+            continue #weeks that aren't cached yet are worked out from the logs when the summary needs them
+
+        if (record['date'], record['habit']) in overwritten:
+            del habit_weeks[key] #the old value is already in the totals, so the week has to be recalculated
+            continue
+
+        totals = habit_weeks[key]
+        value = record['value']
+        totals[0] += 1 #days logged
+
+        if value is True:
+            totals[1] += 1 #days completed
+        elif not isinstance(value, bool):
+            totals[2] += value #total units
+
+    save_weekly_cache(cache)
+
+def rebuild_weekly_cache():
+    """
+    Throws the weekly cache away and recalculates every week of every habit from the logs.
+    Use this if the cache ever gets out of sync with the data (e.g. after editing the data file by hand).
+    """
+
+    data = load_data()
+    cache = {'version': WEEKLY_CACHE_VERSION, 'habits': {}}
+    current_week_start, _ = get_week_range(date.today())
+
+    week_starts_by_habit = {}
+    for habit_name, habit_info in data['habits'].items():
+        week_start, _ = get_week_range(date.fromisoformat(habit_info['created']))
+        week_starts_by_habit[habit_name] = []
+
+        while week_start <= current_week_start: #every week from the one the habit was created in up to this week
+            week_starts_by_habit[habit_name].append(week_start)
+            week_start += timedelta(days=7)
+
+    fill_weekly_cache(cache, data, week_starts_by_habit)
+    save_weekly_cache(cache)
+    print(f'Rebuilt the weekly cache for {len(data["habits"])} habits.')
+
+def read_log_rows(file, file_format):
+    """
+    Reads (line_number, row) pairs one at a time from an open csv or jsonl file of logs.
+    CSV files need a header with date, habit and value columns (unit is optional), jsonl files have one object per line.
+    """
+
+    if file_format == 'csv':
+        reader = csv.DictReader(file) #reads one row at a time, using the header line for the keys
+        for row in reader:
+            yield reader.line_num, row #yield hands back one row at a time instead of building a list of them all
+    else:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue #skips blank lines
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError:
+                yield line_number, None #reported as an invalid row by validate_log_row
+
+def validate_log_row(data, row):
+    """
+    Checks one imported row against the habit it's for and returns it as a journal record.
+    Raises ValueError with a message explaining what's wrong if the row can't be imported.
+    """
+
+    if not isinstance(row, dict):
+        raise ValueError('not a valid row')
+
+    habit_name = str(row.get('habit') or '').strip().lower() #habit names are stored in lower case
+
+    if habit_name not in data['habits']:
+        raise ValueError(f'unknown habit "{habit_name}"')
+
+    try:
+        log_date = date.fromisoformat(str(row.get('date') or '').strip())
+    except ValueError:
+        raise ValueError(f'invalid date "{row.get("date")}", expected YYYY-MM-DD')
+
+    if log_date > date.today():
+        raise ValueError(f'date {log_date} is in the future')
+
+    habit_info = data['habits'][habit_name]
+    value = row.get('value')
+    unit = str(row.get('unit') or '').strip().lower()
+
+    if habit_info['type'] == 'binary':
+        if isinstance(value, bool): #jsonl files can use true/false directly
+            pass
+        elif str(value).strip().lower() in ('true', 'yes', 'y', '1'):
+            value = True
+        elif str(value).strip().lower() in ('false', 'no', 'n', '0'):
+            value = False
+        else:
+            raise ValueError(f'"{value}" is not a yes/no value for binary habit "{habit_name}"')
+
+    elif habit_info['type'] == 'quantitative':
+        if unit and unit != habit_info['unit']:
+            raise ValueError(f'unit "{unit}" doesn\'t match "{habit_info["unit"]}" for habit "{habit_name}"')
+
+        try:
+            if isinstance(value, bool):
+                raise ValueError #true/false isn't a number, even though python treats it as one
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'"{value}" is not a number for quantitative habit "{habit_name}"')
+
+        if value < 0:
+            raise ValueError(f'value for "{habit_name}" cannot be negative')
+
+    return {'op': 'log', 'date': log_date.isoformat(), 'habit': habit_name, 'value': value}
+
+def invalidate_weekly_cache(touched_weeks):
+    """
+    Removes weeks from the weekly cache so they get recalculated, touched_weeks is a set of (habit_name, week_key) pairs.
+    """
+
+    if not touched_weeks or not os.path.exists(weekly_cache_file):
+        return
+
+    cache = load_weekly_cache()
+
+    for habit_name, key in touched_weeks:
+        cache['habits'].get(habit_name, {}).pop(key, None) #.pop() with a default doesn't mind if the week isn't cached
+
+    save_weekly_cache(cache)
+
+def import_logs(path, file_format=None):
+    """
+    Imports logs from a csv or jsonl file (or '-' for standard input) without going through the menu.
+    Rows are read one at a time and checked against their habit, invalid rows are reported and skipped.
+    Existing values for the same habit and day are overwritten.
+    """
+
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    data = load_data()
+
+    batch = [] #records waiting to be applied
+    touched_weeks = set() #weeks whose cached totals are now out of date
+    imported = 0
+    skipped = 0
+
+    file = sys.stdin if path == '-' else open(path, "r", newline='') #newline='' is what the csv module expects
+
+    try:
+        for line_number, row in read_log_rows(file, file_format):
+            try:
+                record = validate_log_row(data, row)
+            except ValueError as error:
+                skipped += 1
+                if skipped <= 10: #only shows the first few problems so a bad file doesn't flood the screen
+                    print(f'Line {line_number}: {error}')
+                continue
+
+            batch.append(record)
+            touched_weeks.add((record['habit'], week_key(date.fromisoformat(record['date']))))
+            imported += 1
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                apply_import_batch(data, batch)
+                batch = []
+
+        apply_import_batch(data, batch)
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+    if STORAGE_BACKEND == 'json':
+        compact_journal() #one snapshot for the whole import, read again from disk so other copies' changes are kept
+
+    invalidate_weekly_cache(touched_weeks)
+
+    if skipped > 10:
+        print(f'...and {skipped - 10} more invalid rows.')
+    print(f'Imported {imported} logs ({skipped} rows skipped).')
+
+def apply_import_batch(data, batch):
+    """
+    Applies a batch of imported records and saves it straight away. The json backend journals the batch
+    and leaves compacting the journal until the end of the import.
+    """
+
+    if STORAGE_BACKEND != 'json':
+        save_changes(data, batch)
+    else:
+        for record in batch:
+            apply_journal_record(data, record)
+        append_journal(data, batch, compact=False)
+
+def iter_log_rows(data):
+    """
+    Yields every log as a {'date', 'habit', 'value', 'unit'} dictionary in date order, one at a time.
+    """
+
+    for log_date_str in sorted(data['logs']):
+        for habit_name, value in data['logs'][log_date_str].items():
+            yield {
+                'date': log_date_str,
+                'habit': habit_name,
+                'value': value,
+                'unit': data['habits'].get(habit_name, {}).get('unit', '')
+            }
+
+def export_logs(path, file_format=None):
+    """
+    Writes every log to a csv or jsonl file (or '-' for standard output) in the format import_logs() reads.
+    Rows are written as they are generated, so the output is never built up in memory.
+    """
+
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    data = load_data()
+
+    file = sys.stdout if path == '-' else open(path, "w", newline='')
+    count = 0
+
+    try:
+        if file_format == 'csv':
+            writer = csv.DictWriter(file, fieldnames=['date', 'habit', 'value', 'unit'])
+            writer.writeheader()
+            for row in iter_log_rows(data):
+                if isinstance(row['value'], bool):
+                    row['value'] = 'true' if row['value'] else 'false'
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in iter_log_rows(data):
+                file.write(json.dumps(row) + '\n')
+                count += 1
+    finally:
+        if file is not sys.stdout:
+            file.close()
+
+    if file is not sys.stdout:
+        print(f'Exported {count} logs to {path}.')
+
+REPORT_PERIODS = ['overall', 'last_week', 'current_week', 'average_week']
+REPORT_STATS = ['days_logged', 'days_completed', 'completion_rate', 'total_units', 'average']
+REPORT_FIELDS = ['habit', 'type', 'unit', 'created'] + [f'{period}_{stat}' for period in REPORT_PERIODS for stat in REPORT_STATS]
+
+def iter_habit_reports(data, today):
+    """
+    Makes one pass over the logs, adding up every active habit's overall and weekly totals together,
+    then yields one {'habit', 'type', 'unit', 'created', 'overall', 'last_week', 'current_week', 'average_week'}
+    dictionary per habit. The stats are the same as view_habit_stats() and view_weekly_summary() print.
+    """
+
+    current_week_start, _ = get_week_range(today)
+    last_week_start = current_week_start - timedelta(days=7)
+    today_ordinal = today.toordinal()
+
+    active_habits = {habit_name: habit_info for habit_name, habit_info in data['habits'].items() if habit_info.get('active', True)}
+    overall = {habit_name: [0, 0, 0] for habit_name in active_habits} # habit_name -> [days_logged, days_completed, total_units]
+    weeks = {habit_name: {} for habit_name in active_habits} # habit_name -> {week start ordinal: [days_logged, days_completed, total_units]}
+
+    for log_date_str in sorted(data['logs']): # date order, so float totals add up the same way as the console stats
+        ordinal = date.fromisoformat(log_date_str).toordinal()
+        week_start = ordinal - date.fromordinal(ordinal).weekday() #the Monday of that week
+
+        for habit_name, value in data['logs'][log_date_str].items():
+            if habit_name not in active_habits:
+                continue
+
+            totals = [overall[habit_name]]
+            if ordinal <= today_ordinal: #weeks only count days up to today, like the weekly summary
+                totals.append(weeks[habit_name].setdefault(week_start, [0, 0, 0]))
+
+            for counters in totals:
+                counters[0] += 1
+                if active_habits[habit_name]['type'] == 'binary':
+                    if value is True:
+                        counters[1] += 1
+                elif active_habits[habit_name]['type'] == 'quantitative':
+                    counters[2] += value
+
+    for habit_name, habit_info in active_habits.items():
+        habit_weeks = weeks.pop(habit_name) #frees each habit's weeks once its report is made
+        valid_weeks = 0
+        week_totals = [0, 0, 0]
+
+        for week_start, _ in get_completed_weeks(date.fromisoformat(habit_info['created']), today):
+            counters = habit_weeks.get(week_start.toordinal())
+
+            if counters is None or counters[0] == 0:
+                continue #skips weeks where the habit wasn't logged at all, like average_weekly_stats()
+
+            valid_weeks += 1
+            week_totals[0] += counters[0]
+            if habit_info['type'] == 'binary':
+                week_totals[1] += counters[1]
+            elif habit_info['type'] == 'quantitative':
+                week_totals[2] += counters[2]
+
+        yield {
+            'habit': habit_name,
+            'type': habit_info['type'],
+            'unit': habit_info.get('unit', ''),
+            'created': habit_info['created'],
+            'overall': stats_from_totals(habit_info, *overall[habit_name]),
+            'last_week': stats_from_totals(habit_info, *habit_weeks.get(last_week_start.toordinal(), [0, 0, 0])),
+            'current_week': stats_from_totals(habit_info, *habit_weeks.get(current_week_start.toordinal(), [0, 0, 0])),
+            'average_week': average_from_totals(habit_info, valid_weeks, *week_totals)
+        }
+
+def flatten_report(reports):
+    """
+    Turns each habit report into one flat row with the REPORT_FIELDS columns, for csv and html.
+    Stats that don't apply to the habit (or average weeks without enough data) are left as None.
+    """
+
+    for report in reports:
+        row = {'habit': report['habit'], 'type': report['type'], 'unit': report['unit'], 'created': report['created']}
+
+        for period in REPORT_PERIODS:
+            stats = report[period] or {}
+            for stat in REPORT_STATS:
+                row[f'{period}_{stat}'] = stats.get(stat)
+
+        yield row
+
+TYPE_STATS = {'binary': ('days_completed', 'completion_rate'), 'quantitative': ('total_units', 'average')} # stats that only one habit type has
+
+def format_report_value(habit_type, stat, value):
+    """
+    Formats a stat the way the console shows it, for the html report.
+    """
+
+    if stat not in ('days_logged',) + TYPE_STATS[habit_type]:
+        return '' #the stat is for the other habit type
+    if value is None:
+        return 'N/A'
+    if stat == 'completion_rate':
+        return f'{value:.2f}%'
+    if stat == 'average':
+        return f'{value:.2f}'
+    return str(value)
+
+def write_report_csv(reports, file):
+    writer = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    for row in flatten_report(reports):
+        writer.writerow(row)
+
+def write_report_json(reports, file):
+    """
+    Writes the reports as a JSON list, one habit at a time rather than building the whole list first.
+    """
+
+    file.write('[')
+    for i, report in enumerate(reports):
+        file.write((',\n' if i else '\n') + json.dumps(report))
+    file.write('\n]\n')
+
+def write_report_html(reports, file, today):
+    file.write('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n')
+    file.write(f'<title>Habit report {today}</title>\n')
+    file.write('<style>body{font-family:sans-serif} table{border-collapse:collapse} th,td{border:1px solid #ccc;padding:4px 8px;text-align:right} td:first-child{text-align:left}</style>\n')
+    file.write(f'</head>\n<body>\n<h1>Habit report {today}</h1>\n<table>\n<tr>')
+    file.write(''.join(f'<th>{html.escape(field.replace("_", " "))}</th>' for field in REPORT_FIELDS))
+    file.write('</tr>\n')
+
+    for row in flatten_report(reports):
+        cells = [row['habit'], row['type'], row['unit'], row['created']]
+        cells += [format_report_value(row['type'], stat, row[f'{period}_{stat}']) for period in REPORT_PERIODS for stat in REPORT_STATS]
+        file.write('<tr>' + ''.join(f'<td>{html.escape(cell)}</td>' for cell in cells) + '</tr>\n')
+
+    file.write('</table>\n</body>\n</html>\n')
+
+def write_report(path, report_format=None):
+    """
+    Writes a csv, json or html report of every active habit to a file (or '-' for standard output).
+    The format comes from the file extension unless it's given.
+    """
+
+    report_format = report_format or os.path.splitext(path)[1].lstrip('.').lower() or 'csv'
+
+    if report_format not in ('csv', 'json', 'html'):
+        print(f'Unknown report format "{report_format}", use csv, json or html.')
+        return
+
     data = load_data()
+    today = date.today()
+    reports = iter_habit_reports(data, today)
+
+    file = sys.stdout if path == '-' else open(path, "w", newline='')
+
+    try:
+        if report_format == 'csv':
+            write_report_csv(reports, file)
+        elif report_format == 'json':
+            write_report_json(reports, file)
+        else:
+            write_report_html(reports, file, today)
+    finally:
+        if file is not sys.stdout:
+            file.close()
+
+    if file is not sys.stdout:
+        print(f'Wrote the {report_format} report to {path}.')
+
+def calculate_weekly_summary(data, today, weekly_cache=None):
+    """
+    Calculates last week's, this week's and the average completed week's stats of every active habit.
+    With a weekly_cache from load_weekly_cache() the weeks come from the cache (missing weeks are filled in first),
+    otherwise they are calculated from a stats index.
+    Returns a dictionary of habit_name -> {'last_week': stats, 'current_week': stats, 'average_week': stats or None}.
+    """
+
+    # --- week ranges ---
+    current_week_start, current_week_end = get_week_range(today) #gets the monday and sunday of the current week
+
+    last_week_end = current_week_start - timedelta(days=1)
+    last_week_start, _ = get_week_range(last_week_end) #gets the monday and sunday of the last week
+
+    completed_weeks_by_habit = {} #completed weeks of each active habit
+
+    for habit_name, habit_info in data['habits'].items():
+        if habit_info.get('active', True): #skips inactive habits
+            completed_weeks_by_habit[habit_name] = get_completed_weeks(date.fromisoformat(habit_info['created']), today)
+
+    if weekly_cache is not None:
+        week_starts_by_habit = { #every week the summary needs for each active habit
+            habit_name: [last_week_start, current_week_start] + [week_start for week_start, _ in completed_weeks]
+            for habit_name, completed_weeks in completed_weeks_by_habit.items()
+        }
+        fill_weekly_cache(weekly_cache, data, week_starts_by_habit) #only recalculates weeks that aren't cached yet
+        index = None
+    else:
+        index = build_stats_index(data) #built once and shared by every range query below
+
+    summary = {}
+
+    for habit_name, completed_weeks in completed_weeks_by_habit.items():
+        habit_info = data['habits'][habit_name]
+
+        if weekly_cache is not None:
+            last_week_stats = cached_week_stats(weekly_cache, habit_name, habit_info, last_week_start)
+            current_week_stats = cached_week_stats(weekly_cache, habit_name, habit_info, current_week_start) #nothing is logged after today, so the whole week is the week so far
+        else:
+            last_week_stats = calculate_stats_for_range(habit_name, habit_info, last_week_start, last_week_end, data, index)
+            current_week_stats = calculate_stats_for_range(habit_name, habit_info, current_week_start, today, data, index)
+
+        summary[habit_name] = {
+            'last_week': last_week_stats,
+            'current_week': current_week_stats,
+            'average_week': average_weekly_stats(habit_name, habit_info, data, completed_weeks, index, weekly_cache)
+        }
+
+    return summary
+
+def report_for_file(path, output_dir):
+    """
+    Works out the habit stats and weekly summary of one habits_data.json style file and writes them to
+    <output_dir>/<file name>_report.json. This runs in a worker process, so any error is caught and returned
+    instead of stopping the other files. Returns a short summary of the file for the rollup report.
+    """
+
+    global STORAGE_BACKEND
+    STORAGE_BACKEND = 'json' #batch files are always plain json files, whichever backend the tracker itself uses
+
+    user = os.path.splitext(os.path.basename(path))[0] #the file name without .json
+
+    try:
+        with open(path, "r") as file:
+            data = json.load(file)
+
+        today = date.today()
+        habit_stats = calculate_habit_stats(data)
+
+        report = {
+            'user': user,
+            'file': path,
+            'generated': today.isoformat(),
+            'habit_stats': habit_stats,
+            'weekly_summary': calculate_weekly_summary(data, today)
+        }
+
+        report_path = os.path.join(output_dir, f'{user}_report.json')
+        with open(report_path, "w") as file:
+            json.dump(report, file, indent=2)
+
+        return {'user': user, 'file': path, 'report': report_path, 'active_habits': len(habit_stats), 'days_logged': len(data['logs'])}
+
+    except Exception as error: #one broken file shouldn't stop the rest of the batch
+        return {'user': user, 'file': path, 'error': f'{type(error).__name__}: {error}'}
+
+def batch_report(input_dir, output_dir=None, workers=None):
+    """
+    Writes a report for every .json data file in input_dir, plus a rollup.json covering all of them.
+    The files are processed in parallel by `workers` processes (default: one per CPU core).
+    """
+
+    output_dir = output_dir or os.path.join(input_dir, 'reports')
+    os.makedirs(output_dir, exist_ok=True) #creates the folder if it doesn't exist yet
+
+    paths = sorted(os.path.join(input_dir, name) for name in os.listdir(input_dir) if name.endswith('.json'))
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(report_for_file, path, output_dir): path for path in paths} #future -> the file it's working on
+
+        for future in as_completed(futures): #gives back each future as soon as it finishes
+            try:
+                results.append(future.result())
+            except Exception as error: #e.g. the worker process was killed
+                path = futures[future]
+                results.append({'user': os.path.splitext(os.path.basename(path))[0], 'file': path, 'error': f'{type(error).__name__}: {error}'})
+
+    results.sort(key=lambda result: result['file']) #as_completed returns them in whatever order they finished
+    failed = [result for result in results if 'error' in result]
+
+    rollup = {
+        'generated': date.today().isoformat(),
+        'files': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': len(failed),
+        'active_habits': sum(result.get('active_habits', 0) for result in results),
+        'users': results
+    }
+
+    with open(os.path.join(output_dir, 'rollup.json'), "w") as file:
+        json.dump(rollup, file, indent=2)
+
+    for result in failed:
+        print(f'{result["file"]}: {result["error"]}')
+    print(f'Wrote {rollup["succeeded"]} reports to {output_dir} ({rollup["failed"]} failed).')
+
+def view_weekly_summary():
+    data = store.load()
 
     if not data['habits']:
         print('\nNo habits found. Please create a habit first.')
@@ -436,101 +2492,174 @@ def view_weekly_summary():
         print('\nNo logs found yet. Please log some habits first.')
         return #cancels the function and returns to the main menu loop
     
-    today = date.today()
+    with store.lock, file_storage.file_lock(data_file): #update_weekly_cache in another copy can't change the cache between loading and saving it (same lock order as flush)
+        store.sync() #weeks missing from the cache are worked out from the data, so it needs the other copies' changes
+        store.flush() #the weekly cache is only updated when changes are saved
+        weekly_cache = load_weekly_cache()
+        cached_weeks = sum(len(habit_weeks) for habit_weeks in weekly_cache['habits'].values()) #to tell if anything new gets cached
 
-    # --- week ranges ---
-    current_week_start, current_week_end = get_week_range(today) #gets the monday and sunday of the current week
+        summary = calculate_weekly_summary(data, date.today(), weekly_cache)
 
-    last_week_end = current_week_start - timedelta(days=1)
-    last_week_start, _ = get_week_range(last_week_end) #gets the monday and sunday of the last week
+        if sum(len(habit_weeks) for habit_weeks in weekly_cache['habits'].values()) != cached_weeks:
+            save_weekly_cache(weekly_cache) #only rewrites the cache if weeks were added to it
+
+    consistency = calculate_consistency(data, date.today())
 
     print('\n\n===== WEEKLY SUMMARY =====')
 
-    for habit_name, habit_info in data['habits'].items():
-        if not habit_info.get('active', True):
-            continue #skips inactive habits
+    for habit_name, habit_summary in summary.items():
+        habit_info = data['habits'][habit_name]
 
         print('\n-----------------------------------')
         print(f'Habit: {habit_name}')
 
-        habit_created = date.fromisoformat(habit_info['created']) #converts the habit creation date from a string back into a date object
-
-        # --- Last completed week ---
-        last_week_stats = calculate_stats_for_range( #calculates the stats for the last week using the function defined above
-            habit_name,
-            habit_info,
-            last_week_start,
-            last_week_end,
-            data
-        )
-
         print('\nLast Week:')
-        print_week_stats(habit_info, last_week_stats) #uses the function defined above to print the stats for the last week
-
-        # --- Current week so far ---
-        current_week_stats = calculate_stats_for_range( #calculates the stats for the current week using the function defined above
-            habit_name,
-            habit_info,
-            current_week_start,
-            today,
-            data
-        )
+        print_week_stats(habit_info, habit_summary['last_week']) #uses the function defined above to print the stats for the last week
 
         print('\nCurrent week (so far):')
-        print_week_stats(habit_info, current_week_stats) #uses the function defined above to print the stats for the current week
-
-        # --- Average completed week ---
-        completed_weeks = get_completed_weeks(habit_created, today) #gets the completed weeks for that habit using the function defined above
-        avg_stats = average_weekly_stats(
-            habit_name,
-            habit_info,
-            data,
-            completed_weeks
-        )
+        print_week_stats(habit_info, habit_summary['current_week']) #uses the function defined above to print the stats for the current week
 
         print('\nAverage completed week:')
 
-        if avg_stats is None:
+        if habit_summary['average_week'] is None:
             print('  Not enough data yet.')
         else:
-            print_week_stats(habit_info, avg_stats) #uses the function defined above to print the average weekly stats
+            print_week_stats(habit_info, habit_summary['average_week']) #uses the function defined above to print the average weekly stats
+
+        if habit_name in consistency: #binary habits only
+            print('\nConsistency:')
+            print_consistency(consistency[habit_name], '  ')
+
+def view_range_stats():
+    data = store.load()
+
+    if not data['habits']:
+        print('\nNo habits found. Please create a habit first.')
+        return #cancels the function and returns to the main menu loop
 
+    print('\nSelect a habit:')
 
-print(f'\nHello! Today is {today_str}. Welcome to your Habit Tracker!')
+    habit_list = list(data['habits'].keys())
+
+    for i, habit_name in enumerate(habit_list, start=1):
+        print(f'{i}. {habit_name}')
+
+    choice = input('\nEnter number: ').strip()
+
+    if not choice.isdigit() or not 1 <= int(choice) <= len(habit_list):
+        print('\nInvalid choice.')
+        return
+
+    habit_name = habit_list[int(choice) - 1]
+    today = date.today()
+
+    print('\nSelect a range:')
+    print('1. Custom dates')
+    print('2. Month to date')
+    print('3. Year to date')
+    print('4. Last N days')
+    range_choice = input('Enter choice (1-4): ').strip()
+
+    ranges = store.ranges() #answers every range in O(log n)
 
-#main menu loop
-while True:
     try:
-        print('\n\n\nWhat would you like to do?\n'
-      '\nCreate habits'
-      '\nLog today\'s habits'
-      '\nEdit habits'
-      '\nView habit stats'
-      '\nView weekly summary'
-      '\nExit')
-        choice = input('\nEnter your choice: ').strip().lower()
-
-        if choice == 'edit habits' or choice == 'edit habit' or choice == 'edit':
-            edit_habit_status()
-
-        elif choice == 'create habits' or choice == 'create habit' or choice == 'create':
-            create_habit()
-
-        elif choice == 'log today\'s habits' or choice == 'log habits' or choice == 'log habit' or choice == 'log':
-            log_today_habits()
-
-        elif choice == 'view habit stats' or choice == 'view stats' or choice == 'habit stats' or choice == 'stats':
-            view_habit_stats()
-        
-        elif choice == 'view weekly summary' or choice == 'weekly summary' or choice == 'view summary' or choice == 'summary':
-            view_weekly_summary()
+        if range_choice == '1':
+            start_date = date.fromisoformat(input('Start date (YYYY-MM-DD): ').strip())
+            end_date = date.fromisoformat(input('End date (YYYY-MM-DD): ').strip())
+            title = f'{start_date} to {end_date}'
+            stats = ranges.query(habit_name, start_date, end_date)
+
+        elif range_choice == '2':
+            title = 'Month to date'
+            stats = ranges.month_to_date(habit_name, today)
+
+        elif range_choice == '3':
+            title = 'Year to date'
+            stats = ranges.year_to_date(habit_name, today)
+
+        elif range_choice == '4':
+            days = int(input('Number of days: ').strip())
+            if days < 1:
+                raise ValueError
+            title = f'Last {days} days'
+            stats = ranges.rolling(habit_name, days, today)
+
+        else:
+            print('\nInvalid choice.')
+            return
+
+    except ValueError:
+        print('\nInvalid input.')
+        return
+
+    print(f'\n{habit_name} - {title}:')
+    print_week_stats(data['habits'][habit_name], stats)
+
+if __name__ == '__main__': #only runs the menu when the file is run directly, not when it's imported
+    if len(sys.argv) > 1 and sys.argv[1] == 'migrate': # python Habit_Tracker.py migrate [path/to/habits_data.json]
+        migrate_json_to_sqlite(sys.argv[2] if len(sys.argv) > 2 else data_file)
+        sys.exit()
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild-cache': # python Habit_Tracker.py rebuild-cache
+        rebuild_weekly_cache()
+        sys.exit()
 
-        elif choice == 'exit' or choice == 'end':
-            print('Goodbye!')
-            break
+    if len(sys.argv) > 2 and sys.argv[1] == 'batch': # python Habit_Tracker.py batch data_folder [reports_folder] [workers]
+        batch_report(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None, int(sys.argv[4]) if len(sys.argv) > 4 else None)
+        sys.exit()
 
+    if len(sys.argv) > 2 and sys.argv[1] in ('import', 'export'): # python Habit_Tracker.py import|export logs.csv|logs.jsonl|- [csv|jsonl]
+        file_format = sys.argv[3] if len(sys.argv) > 3 else None
+        if sys.argv[1] == 'import':
+            import_logs(sys.argv[2], file_format)
         else:
-            print('\nPlease enter a valid input.')
+            export_logs(sys.argv[2], file_format)
+        sys.exit()
+
+    if len(sys.argv) > 2 and sys.argv[1] == 'report': # python Habit_Tracker.py report report.csv|report.json|report.html|- [csv|json|html]
+        write_report(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        sys.exit()
+
+    print(f'\nHello! Today is {today_str}. Welcome to your Habit Tracker!')
+
+    #main menu loop
+    while True:
+        try:
+            store.sync() #picks up changes saved by another copy of the program that's running
+            print('\n\n\nWhat would you like to do?\n'
+          '\nCreate habits'
+          '\nLog today\'s habits'
+          '\nEdit habits'
+          '\nView habit stats'
+          '\nView weekly summary'
+          '\nView range stats'
+          '\nExit')
+            choice = input('\nEnter your choice: ').strip().lower()
+
+            if choice == 'edit habits' or choice == 'edit habit' or choice == 'edit':
+                edit_habit_status()
+
+            elif choice == 'create habits' or choice == 'create habit' or choice == 'create':
+                create_habit()
+
+            elif choice == 'log today\'s habits' or choice == 'log habits' or choice == 'log habit' or choice == 'log':
+                log_today_habits()
+
+            elif choice == 'view habit stats' or choice == 'view stats' or choice == 'habit stats' or choice == 'stats':
+                view_habit_stats()
+        
+            elif choice == 'view weekly summary' or choice == 'weekly summary' or choice == 'view summary' or choice == 'summary':
+                view_weekly_summary()
+
+            elif choice == 'view range stats' or choice == 'range stats' or choice == 'range':
+                view_range_stats()
+
+            elif choice == 'exit' or choice == 'end':
+                print('Goodbye!')
+                break
+
+            else:
+                print('\nPlease enter a valid input.')
     
-    except ValueError:
-        print('Please enter a valid input.')
\ No newline at end of file
+        except ValueError:
+            print('Please enter a valid input.')
\ No newline at end of file
@@ -0,0 +1,330 @@
+"""
+A small local HTTP API for the Habit Tracker, so habits can be logged from scripts and dashboards.
+Only uses the standard library (asyncio), and works on the same data files as the menu.
+
+Run it with: python Habit_Tracker_API.py [port]
+
+Endpoints (all request and response bodies are JSON):
+  GET  /habits                 - every habit definition
+  POST /habits                 - create a habit: {"name": ..., "type": "binary" or "quantitative", "unit": ...}
+  POST /habits/<name>/toggle   - switch a habit between active and inactive
+  POST /logs                   - log a value: {"habit": ..., "value": ..., "date": "YYYY-MM-DD" (optional, defaults to today)}
+                                 or a list of those to log several at once
+  GET  /stats                  - overall stats and streaks of every active habit
+  GET  /summary                - last week, current week and average week of every active habit
+
+Logs are applied in memory straight away, and everything logged during one flush interval
+is saved together in a single write. Stats are cached until the next change, here or in another
+running copy of the tracker (each request picks up what the others have saved).
+"""
+
+import asyncio
+import json
+import sys
+import traceback # prints unexpected errors to the console, the client just gets a 500
+from datetime import date
+from urllib.parse import unquote # habit names in URLs can contain escaped spaces
+
+import Habit_Tracker as tracker
+
+HOST = '127.0.0.1' # only reachable from this computer
+PORT = 8765
+FLUSH_INTERVAL_SECONDS = 1 # how often the logged changes are written to disk
+MAX_BODY_BYTES = 1024 * 1024 # requests bigger than this are refused
+
+# no timer thread, flush_loop() saves on its own schedule. It also replaces the tracker's own store,
+# so the stats functions flush this one before they query the sqlite database
+store = tracker.store = tracker.HabitStore(flush_delay=None)
+stats_cache = {} # path -> encoded response body, cleared whenever something changes
+seen_outside_changes = 0 # store.outside_changes when the stats cache was last checked
+
+STATUS_TEXT = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+class ApiError(Exception):
+    """
+    Raised by the request handlers to send an error response with a status code.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def record_changes(records):
+    """
+    Applies change records to the in-memory data and clears the stats cache.
+    They are saved by the next flush, along with everything else logged since the last one.
+    """
+
+    store.record(records)
+    stats_cache.clear()
+
+def check_outside_changes():
+    """
+    Clears the stats cache if the store has picked up changes saved by another copy (e.g. the menu).
+    """
+
+    global seen_outside_changes
+
+    if store.outside_changes != seen_outside_changes:
+        seen_outside_changes = store.outside_changes
+        stats_cache.clear()
+
+def get_habits(body):
+    return 200, store.load()['habits']
+
+def create_habit(body):
+    """
+    Creates a habit, with the same rules as the create option in the menu.
+    """
+
+    data = store.load()
+
+    if not isinstance(body, dict):
+        raise ApiError(400, 'expected a JSON object')
+
+    habit_name = str(body.get('name') or '').strip().lower()
+    habit_type = body.get('type')
+
+    if not habit_name:
+        raise ApiError(400, 'habit name cannot be empty')
+
+    if habit_name in data['habits']:
+        raise ApiError(400, 'that habit already exists')
+
+    if habit_type == 'binary':
+        habit_data = {'type': habit_type, 'created': date.today().isoformat(), 'active': True}
+
+    elif habit_type == 'quantitative':
+        unit = str(body.get('unit') or '').strip().lower()
+
+        if not unit:
+            raise ApiError(400, 'unit cannot be empty')
+
+        habit_data = {'type': habit_type, 'unit': unit, 'created': date.today().isoformat(), 'active': True}
+
+    else:
+        raise ApiError(400, 'type must be "binary" or "quantitative"')
+
+    record_changes([{'op': 'habit', 'name': habit_name, 'info': habit_data}])
+    return 201, {habit_name: habit_data}
+
+def toggle_habit(body, habit_name):
+    data = store.load()
+    habit_name = habit_name.strip().lower()
+
+    if habit_name not in data['habits']:
+        raise ApiError(404, f'unknown habit "{habit_name}"')
+
+    habit_data = dict(data['habits'][habit_name], active=not data['habits'][habit_name].get('active', True))
+    record_changes([{'op': 'habit', 'name': habit_name, 'info': habit_data}])
+    return 200, {habit_name: habit_data}
+
+def log_habits(body):
+    """
+    Logs one value, or a list of values, using the same checks as importing logs.
+    Nothing is logged if any of them are invalid.
+    """
+
+    data = store.load()
+    rows = body if isinstance(body, list) else [body]
+    records = []
+
+    for row in rows:
+        if isinstance(row, dict) and not row.get('date'):
+            row = dict(row, date=date.today().isoformat()) #logs for today unless told otherwise
+
+        try:
+            records.append(tracker.validate_log_row(data, row))
+        except ValueError as error:
+            raise ApiError(400, str(error))
+
+    record_changes(records)
+    return 200, {'logged': len(records)}
+
+def get_stats(body):
+    data = store.load()
+    return 200, {
+        'stats': tracker.calculate_habit_stats(data),
+        'consistency': tracker.calculate_consistency(data, date.today())
+    }
+
+def get_summary(body):
+    return 200, tracker.calculate_weekly_summary(store.load(), date.today())
+
+ROUTES = { # (method, path) -> handler, /habits/<name>/toggle is matched separately
+    ('GET', '/habits'): get_habits,
+    ('POST', '/habits'): create_habit,
+    ('POST', '/logs'): log_habits,
+    ('GET', '/stats'): get_stats,
+    ('GET', '/summary'): get_summary
+}
+
+CACHED_PATHS = {'/stats', '/summary', '/habits'} # GET responses that are kept until the next change
+
+def handle_request(method, path, body):
+    """
+    Runs the handler for a request and returns (status, encoded JSON body).
+    """
+
+    path = path.split('?')[0].rstrip('/') or '/'
+
+    try:
+        with store.lock: #flush_loop saves on another thread, this stops it changing the data under a request
+            store.sync() #picks up what other copies have saved, a couple of os.stat calls when they haven't
+            check_outside_changes()
+
+            if method == 'GET' and path in stats_cache:
+                return 200, stats_cache[path] #nothing has changed since this was worked out
+
+            status, result = route_request(method, path, body)
+            encoded = json.dumps(result, default=str).encode() #default=str turns dates into YYYY-MM-DD
+
+    except ApiError as error:
+        return error.status, json.dumps({'error': str(error)}).encode()
+
+    except Exception: #a failed save or a bug, the client still gets an answer
+        traceback.print_exc()
+        return 500, json.dumps({'error': 'internal server error'}).encode()
+
+    if method == 'GET' and path in CACHED_PATHS:
+        stats_cache[path] = encoded
+
+    return status, encoded
+
+def route_request(method, path, body):
+    """
+    Decodes the body and runs the handler for a request, returning (status, result).
+    """
+
+    if body:
+        try:
+            body = json.loads(body)
+        except ValueError:
+            raise ApiError(400, 'request body is not valid JSON')
+    else:
+        body = {}
+
+    parts = path.split('/')
+
+    if (method, path) in ROUTES:
+        return ROUTES[(method, path)](body)
+
+    if len(parts) == 4 and parts[1] == 'habits' and parts[3] == 'toggle':
+        if method != 'POST':
+            raise ApiError(405, 'use POST to toggle a habit')
+        return toggle_habit(body, unquote(parts[2]))
+
+    if any(route_path == path for _, route_path in ROUTES):
+        raise ApiError(405, f'{method} is not supported on {path}')
+
+    raise ApiError(404, f'nothing at {path}')
+
+async def handle_client(reader, writer):
+    """
+    Serves the requests of one connection, keeping it open between requests (HTTP/1.1 keep-alive).
+    """
+
+    try:
+        while True:
+            request_line = await reader.readline()
+
+            if not request_line:
+                break #the client closed the connection
+
+            try:
+                method, path, version = request_line.decode('latin-1').split()
+            except ValueError:
+                break #not an HTTP request
+
+            headers = {}
+
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get('content-length') or 0)
+            except ValueError:
+                length = -1 #not a number, answered with a 400 below
+
+            if length < 0:
+                status, response = 400, json.dumps({'error': 'Content-Length must be a whole number of 0 or more'}).encode()
+                keep_alive = False #the body can't be found, so the rest of the connection can't be read
+            elif length > MAX_BODY_BYTES:
+                status, response = 413, json.dumps({'error': 'request body is too large'}).encode()
+                keep_alive = False
+            else:
+                body = await reader.readexactly(length) if length else b''
+                status, response = handle_request(method.upper(), path, body)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+            writer.write(
+                f'HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(response)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + response
+            )
+            await writer.drain()
+
+            if not keep_alive:
+                break
+
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass #the client went away half way through a request
+
+    finally:
+        writer.close()
+
+async def flush_loop(interval=FLUSH_INTERVAL_SECONDS):
+    """
+    Saves everything logged since the last flush, once per interval.
+    However many requests came in, that's one write per interval.
+    The save runs on another thread, so waiting for another copy's lock doesn't stop the server answering.
+    A failed save is printed and tried again next interval, the changes stay in memory until then.
+    """
+
+    while True:
+        await asyncio.sleep(interval)
+
+        if not store.is_dirty():
+            continue
+
+        try:
+            await asyncio.to_thread(store.flush)
+        except Exception:
+            print('Saving the habit data failed, trying again in the next interval:', file=sys.stderr)
+            traceback.print_exc()
+
+        check_outside_changes() #the flush syncs first, and may have picked up other copies' changes
+
+async def serve(host=HOST, port=PORT, ready=None):
+    """
+    Runs the server until it's cancelled, saving any unsaved changes on the way out.
+    If ready is an asyncio.Event it's set once the server is listening (used by the load test).
+    """
+
+    store.load() #reads the data before the first request rather than during it
+    server = await asyncio.start_server(handle_client, host, port, backlog=1024)
+    flusher = asyncio.create_task(flush_loop())
+
+    print(f'Habit Tracker API listening on http://{host}:{server.sockets[0].getsockname()[1]}')
+
+    if ready is not None:
+        ready.port = server.sockets[0].getsockname()[1] #lets port 0 (any free port) be used
+        ready.set()
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        flusher.cancel()
+        store.flush()
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else PORT))
+    except KeyboardInterrupt:
+        print('Goodbye!')
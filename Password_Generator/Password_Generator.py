@@ -1,106 +1,1066 @@
-import random
+import hashlib # sha1 hashes for the breached password check
+import heapq # merges the sorted chunks when building the breached password index
+import json # compiled policies are cached by their definition as JSON
+import math
+import mmap # reads the breached password files and the wordlist straight from disk without loading them
+import os # os.urandom gives cryptographically secure random bytes
+import secrets # picks the passphrase words
 import string #string is a set of pre-written lists of character types, so you don't have to write them out
+import struct # packs the headers of the bloom filter and wordlist index files
+import sys # for reading command line arguments
+import tempfile
+from array import array # the wordlist's line offsets
+from bisect import bisect_right # binary search on sorted lists
+from math import comb # comb(n, k) is the number of ways to choose k things from n
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent)) # file_storage.py is shared by the projects and lives one folder up
+import file_storage # atomic saves and a lock between running copies of the program
+
 BASE_DIR = Path(__file__).parent
 FILENAME = BASE_DIR / "passwords.txt"
 
-def load_list():
-    try: #try to do this, if not then move to except
-        with open(FILENAME, "r") as file: #opens FILENAME in read mode "r"
-            return [line.strip() for line in file.readlines()] #this loops through each line in the file
-    except FileNotFoundError: #incase the file doesn't exist yet
-        return [] #start with an empty file
+BREACH_HASH_FILE = BASE_DIR / "breached.sha1" # sorted 20 byte sha1 hashes of known breached passwords
+BREACH_BLOOM_FILE = BASE_DIR / "breached.bloom" # bloom filter of the same hashes, checked first
+BLOOM_FALSE_POSITIVE_RATE = 0.01 # how often the bloom filter says "maybe" for a password that isn't in the list
+BLOOM_MAGIC = b"PWBLOOM1"
+BLOOM_HEADER = struct.Struct("<8sQQI4x") # magic, bit count, hash count, probes per hash (padded to 32 bytes)
+BREACH_SORT_CHUNK = 2_000_000 # hashes sorted in memory at a time while building the index
+SHA1_SIZE = 20
+
+WORDLIST_FILE = BASE_DIR / "wordlist.txt" # one word per line, e.g. the EFF diceware list ("11111 abacus" lines work too)
+WORDLIST_INDEX_MAGIC = b"PWWORDS1"
+WORDLIST_INDEX_HEADER = struct.Struct("<8sQQQ") # magic, wordlist size, wordlist modified time, word count
+PASSPHRASE_CAPITALIZE = ("none", "all", "one") # capitalize no words, every word or one random word
+
+COMPACT_LOG_LINES = 1000 # the change log is folded back into passwords.txt once it has this many lines (or more lines than the vault has entries)
+RANDOM_BUFFER_SIZE = 64 * 1024 # bytes of randomness read from the operating system at a time
+REJECTION_MIN_ACCEPT = 0.25 # policies whose rules at least this share of plain random passwords already meet are generated by redrawing
+ARRANGE_CACHE_SIZE = 200_000 # the most run and repeat rule checks a policy keeps, see CompiledPolicy.arrange()
+
+DEFAULT_POLICY = { #every password has at least one character from each of these
+    'lower': string.ascii_lowercase,
+    'upper': string.ascii_uppercase,
+    'digit': string.digits,
+    'special': string.punctuation
+}
+
+def label_key(label): #labels are matched ignoring case, casefold() is a stronger lower() that also handles e.g. German ß
+    return label.strip().casefold()
+
+def entry_label(item): #the label part of a "label - password" line, the whole line if it doesn't have one
+    return item.rpartition(" - ")[0] if " - " in item else item #rpartition splits at the last " - ", generated passwords never contain spaces
+
+class PasswordVault:
+    """
+    The saved passwords, indexed by case-folded label so finding, replacing and deleting an entry is O(1).
+    Changes are appended to a change log next to passwords.txt instead of rewriting it, and the log is
+    folded back into passwords.txt (compacted) once it gets long. passwords.txt keeps the plain
+    "label - password" format, so older files load as they are. Every change is made while holding the
+    file's lock, after picking up anything another running copy of the program saved (sync), so two
+    copies never overwrite each other's changes.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = Path(filename or FILENAME)
+        self.log_filename = self.filename.with_name(self.filename.stem + "_changes.jsonl")
+        self.entries = {} # label key -> "label - password" line, in the order they were added
+        self.log = file_storage.AppendLog(self.filename, self.log_filename, self.read_file, self.apply, self.write_file)
+        self.lock = self.log.lock
+
+    def load(self):
+        self.log.load() #reads passwords.txt with read_file() and then applies the change log
+        return self
+
+    def read_file(self):
+        self.entries = {}
+
+        try:
+            with open(self.filename, "r") as file:
+                for line in file:
+                    line = line.strip()
+                    if line:
+                        self.entries[label_key(entry_label(line))] = line
+        except FileNotFoundError: #incase the file doesn't exist yet
+            pass
+
+    def write_file(self): #saves passwords.txt for log.compact()
+        file_storage.write_lines(self.filename, self.entries.values())
+
+    def sync(self):
+        """
+        Picks up changes saved by another running copy of the program: just the new log lines if it only
+        added to the log, or a fresh load if it rewrote passwords.txt.
+        """
+
+        self.log.sync()
 
-def save_list(password_list): #password_list is used inside this function as it makes it reusable and not locked to a global variable
-    with open(FILENAME, "w") as file: #opens FILENAME in write mode "w"
-        for item in password_list: #loops over every string in the list
-            file.write(item + "\n") #writes each item followed by a new line \n
+    def apply(self, change):
+        key = label_key(change["label"])
+        if change["op"] == "set":
+            self.entries[key] = f'{change["label"]} - {change["password"]}' #a replaced entry keeps its place
+        elif change["op"] == "delete":
+            self.entries.pop(key, None)
 
-passwords = load_list() #this is the main list variable
+    def record(self, change):
+        """
+        Applies a change and appends it to the change log, compacting the log once it's long enough.
+        """
+
+        with self.lock:
+            self.sync()
+            self.apply(change)
+            self.log.append([change])
+
+            if self.log.lines >= max(COMPACT_LOG_LINES, len(self.entries)): #keeps the total rewriting to O(1) per change on average
+                self.compact()
+
+    def compact(self):
+        """
+        Rewrites passwords.txt with every entry and removes the change log.
+        The new file is written next to the old one and then swapped in, so a crash never leaves half a file.
+        """
+
+        self.log.compact()
+
+    def find(self, label): #returns the "label - password" line for label, or None
+        return self.entries.get(label_key(label))
+
+    def set(self, label, password):
+        self.record({"op": "set", "label": label, "password": password})
+
+    def delete(self, label): #returns the removed line, or None if there wasn't one
+        with self.lock:
+            self.sync() #another copy of the program may have deleted it already
+            item = self.find(label)
+            if item is not None:
+                self.record({"op": "delete", "label": label})
+        return item
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __len__(self):
+        return len(self.entries)
+
+vault = None #this is the main vault variable, loaded when the menu or audit starts so importing this file doesn't create any files
+
+def entry_password(item): #the password part of a "label - password" line, None if it doesn't have one
+    return item.rpartition(" - ")[2] if " - " in item else None
 
 def show_list():
-    if not passwords:
+    if not vault:
         print("\nYour password list is empty.")
     else:
+        checker = get_breach_checker()
         print('\nHere is your List of passwords: ')
-        for item in passwords:
-            print(item)
+        for item in vault:
+            password = entry_password(item)
+            if checker is not None and password is not None and password in checker:
+                print(item, " <- found in the breached password list, please change it!")
+            else:
+                print(item)
+
+class CharacterStream:
+    """
+    An endless supply of characters picked uniformly at random from an alphabet (up to 256 characters), using os.urandom.
+    Random bytes are read in big buffers and turned into characters all at once with bytes.translate():
+    byte values below the biggest multiple of len(alphabet) become alphabet[byte % len(alphabet)], and the
+    rest are thrown away (rejection sampling), so every character is exactly as likely as every other.
+    """
+
+    def __init__(self, alphabet):
+        size = len(alphabet)
+        limit = 256 - 256 % size # bytes from limit up would make the first characters of the alphabet more likely
+        self.rejected = bytes(range(limit, 256))
+
+        if all(ord(char) < 256 for char in alphabet): #bytes map straight onto the characters
+            self.table = bytes(ord(alphabet[byte % size]) if byte < limit else 0 for byte in range(256))
+            self.characters = None
+        else: #bytes map onto positions in the alphabet, which str.translate() then turns into the characters
+            self.table = bytes(byte % size if byte < limit else 0 for byte in range(256))
+            self.characters = {position: char for position, char in enumerate(alphabet)}
+
+        self.buffer = ''
+        self.position = 0
+
+    def refill(self):
+        chars = os.urandom(RANDOM_BUFFER_SIZE).translate(self.table, self.rejected).decode('latin-1')
+        return chars if self.characters is None else chars.translate(self.characters)
+
+    def take(self, count):
+        """
+        Returns the next count random characters.
+        """
+
+        if len(self.buffer) - self.position < count: #tops the buffer up with a new batch of random characters
+            self.buffer = self.buffer[self.position:] + self.refill()
+            self.position = 0
+
+            while len(self.buffer) < count: #only for passwords longer than a whole buffer
+                self.buffer += self.refill()
+
+        chars = self.buffer[self.position:self.position + count]
+        self.position += count
+        return chars
+
+streams = {} # alphabet -> CharacterStream, so the translate tables are only built once
+
+def get_stream(alphabet):
+    if alphabet not in streams:
+        streams[alphabet] = CharacterStream(alphabet)
+    return streams[alphabet]
+
+class RandomSource:
+    """
+    Random whole numbers from buffered os.urandom bytes, for shuffling and for weighted choices.
+    """
+
+    def __init__(self):
+        self.buffer = b''
+        self.position = 0
+
+    def below(self, limit):
+        """
+        Returns a random number from 0 to limit - 1, every number equally likely.
+        Draws just enough random bits and tries again if the number is too big (rejection sampling).
+        """
+
+        if limit <= 256: #one byte is enough, the common case when shuffling
+            cutoff = 256 - 256 % limit # bytes from cutoff up would make the smaller numbers more likely
+
+            while True:
+                if self.position >= len(self.buffer):
+                    self.buffer = os.urandom(RANDOM_BUFFER_SIZE)
+                    self.position = 0
+
+                byte = self.buffer[self.position]
+                self.position += 1
+
+                if byte < cutoff:
+                    return byte % limit
+
+        bits = (limit - 1).bit_length()
+        size = (bits + 7) // 8
+        mask = (1 << bits) - 1
+
+        while True:
+            if self.position + size > len(self.buffer):
+                self.buffer = os.urandom(max(RANDOM_BUFFER_SIZE, size))
+                self.position = 0
+
+            value = int.from_bytes(self.buffer[self.position:self.position + size], 'little') & mask
+            self.position += size
+
+            if value < limit:
+                return value
+
+    def shuffle(self, items):
+        """
+        Shuffles a list in place (Fisher-Yates), with one buffered byte per swap for lists of up to 256 items.
+        """
+
+        buffer = self.buffer
+        position = self.position
+
+        for i in range(len(items) - 1, 0, -1):
+            if i >= 256: #bigger than a byte, rare for a password
+                self.buffer, self.position = buffer, position
+                j = self.below(i + 1)
+                buffer, position = self.buffer, self.position
+            else:
+                cutoff = 256 - 256 % (i + 1)
+
+                while True: #the same rejection sampling as below(), written out here as it runs for every character
+                    if position >= len(buffer):
+                        buffer = os.urandom(RANDOM_BUFFER_SIZE)
+                        position = 0
+                    byte = buffer[position]
+                    position += 1
+                    if byte < cutoff:
+                        break
+
+                j = byte % (i + 1)
+
+            items[i], items[j] = items[j], items[i]
+
+        self.buffer, self.position = buffer, position
+
+random_source = RandomSource()
+
+AMBIGUOUS_CHARS = "Il1|O0o" # characters that are easy to mix up, e.g. for a policy's 'exclude'
+
+class CompiledPolicy:
+    """
+    A password policy worked out once so generating passwords from it is fast.
+
+    A policy definition is either a dictionary of class name -> characters (like DEFAULT_POLICY),
+    or a dictionary with these keys:
+      'classes'   - class name -> characters, or -> {'chars': characters, 'min': 1, 'max': None}
+      'exclude'   - characters never used, e.g. AMBIGUOUS_CHARS
+      'no_repeat' - True to never put the same character twice in a row
+      'max_run'   - the most characters of the same class allowed in a row
+    Every class needs at least 'min' characters (1 unless given) and at most 'max' (no limit if None).
+    A character listed in more than one class only belongs to the first one.
+
+    Passwords are built directly rather than by redrawing ones that break the rules: the number of
+    characters from each class is picked from a precomputed table (weighted so every password that
+    meets the min/max counts is equally likely), and the characters are then placed in an order that
+    keeps to the run and repeat rules.
+    The exception is a policy without run or repeat rules that most random passwords already meet (like
+    DEFAULT_POLICY): drawing from all its characters and redrawing the few that miss a class is faster,
+    and gives every password that meets the policy the same chance too.
+    """
+
+    def __init__(self, definition):
+        classes = definition.get('classes', definition) if 'classes' in definition else definition
+        excluded = set(definition.get('exclude', '')) if 'classes' in definition else set()
+        self.no_repeat = bool(definition.get('no_repeat')) if 'classes' in definition else False
+        max_run = definition.get('max_run') if 'classes' in definition else None
+
+        used = set()
+        self.names = []
+        self.alphabets = []
+        self.minimums = []
+        self.maximums = []
+
+        for name, rules in classes.items():
+            if isinstance(rules, str):
+                rules = {'chars': rules}
+
+            alphabet = ''.join(char for char in dict.fromkeys(rules['chars']) if char not in excluded and char not in used)
+            used.update(alphabet)
+
+            minimum = rules.get('min', 1)
+            maximum = rules.get('max')
+
+            if len(alphabet) > 256:
+                raise ValueError(f"The '{name}' class has more than 256 characters.")
+            if not alphabet and minimum > 0:
+                raise ValueError(f"The '{name}' class has no characters left to use.")
+            if not alphabet:
+                continue #an optional class with nothing left in it
+
+            self.names.append(name)
+            self.alphabets.append(alphabet)
+            self.minimums.append(minimum)
+            self.maximums.append(maximum)
+
+        # the most characters of each class in a row, None for no limit
+        # (a class of a single character can't repeat at all if repeats aren't allowed)
+        self.run_limits = [1 if self.no_repeat and len(alphabet) == 1 else max_run for alphabet in self.alphabets]
+        self.constrained = self.no_repeat or any(limit is not None for limit in self.run_limits)
+
+        self.streams = [get_stream(alphabet) for alphabet in self.alphabets]
+        self.char_positions = [{char: position for position, char in enumerate(alphabet)} for alphabet in self.alphabets]
+        self.min_length = sum(self.minimums)
+        self.count_tables = {} # length -> class count table, see count_table()
+        self.redraw_lengths = {} # length -> True if passwords of that length are generated by redrawing, see use_redraw()
+        self.arrange_cache = {} # (characters left of each class, last class, run) -> candidates(), see arrange()
+
+        self.alphabet = ''.join(self.alphabets) # every character, for the redrawing path
+        self.class_tags = str.maketrans({char: str(j) for j, alphabet in enumerate(self.alphabets) for char in alphabet}) #character -> its class number as text
+        self.class_sets = [frozenset(alphabet) for alphabet in self.alphabets]
+        self.at_least_one = all(minimum <= 1 and maximum is None for minimum, maximum in zip(self.minimums, self.maximums)) #only needs set checks
+
+    def class_max(self, position, length):
+        """
+        The most characters class `position` can have in a password of this length.
+        With a run limit k there must be a character of another class between every k of them: c <= k * (length - c + 1).
+        """
+
+        maximum = length if self.maximums[position] is None else min(self.maximums[position], length)
+        limit = self.run_limits[position]
+
+        if limit is not None:
+            maximum = min(maximum, limit * (length + 1) // (limit + 1))
+
+        return maximum
+
+    def count_table(self, length):
+        """
+        Returns, for every class position j and number of characters left r, the possible counts c of class j
+        and their running total weights, where a count's weight is the number of ways to fill the rest of
+        the password with it: comb(r, c) * len(alphabet) ** c * ways(classes after j, r - c).
+        Worked out once per length and kept.
+        """
+
+        if length not in self.count_tables:
+            class_count = len(self.alphabets)
+            ways = [[0] * (length + 1) for _ in range(class_count + 1)] # ways[j][r] - passwords of r characters from classes j onwards
+            ways[class_count][0] = 1
+            choices = [[None] * (length + 1) for _ in range(class_count)]
+
+            for j in range(class_count - 1, -1, -1):
+                size = len(self.alphabets[j])
+
+                for r in range(length + 1):
+                    counts = []
+                    totals = [] # running totals of the weights, for bisect
+                    total = 0
+
+                    for c in range(self.minimums[j], min(self.class_max(j, length), r) + 1):
+                        weight = comb(r, c) * size ** c * ways[j + 1][r - c]
+                        if weight:
+                            total += weight
+                            counts.append(c)
+                            totals.append(total)
+
+                    ways[j][r] = total
+                    choices[j][r] = (counts, totals)
+
+            if ways[0][length] == 0:
+                raise ValueError(f"No {length} character password can meet this policy.")
+
+            self.count_tables[length] = choices
+
+        return self.count_tables[length]
+
+    def use_redraw(self, length):
+        """
+        True if passwords of this length are drawn from every character and redrawn until they meet the policy:
+        only without run or repeat rules, and only if at least REJECTION_MIN_ACCEPT of the draws would be kept.
+        """
+
+        if length not in self.redraw_lengths:
+            redraw = not self.constrained and len(self.alphabet) <= 256 and len(self.alphabets) <= 10
+            if redraw:
+                valid = self.count_table(length)[0][length][1][-1] #how many passwords meet the policy
+                redraw = valid >= REJECTION_MIN_ACCEPT * len(self.alphabet) ** length
+            self.redraw_lengths[length] = redraw
+
+        return self.redraw_lengths[length]
+
+    def meets_counts(self, password): #True if every class has between its min and max characters in the password
+        tags = password.translate(self.class_tags)
+        for j, (minimum, maximum) in enumerate(zip(self.minimums, self.maximums)):
+            count = tags.count(str(j))
+            if count < minimum or (maximum is not None and count > maximum):
+                return False
+        return True
+
+    def pick_counts(self, length):
+        choices = self.count_table(length)
+        counts = []
+        remaining = length
+
+        for j in range(len(self.alphabets)):
+            class_counts, totals = choices[j][remaining]
+            c = class_counts[bisect_right(totals, random_source.below(totals[-1]))]
+            counts.append(c)
+            remaining -= c
+
+        return counts
+
+    def fits(self, remaining, left, chosen, run):
+        """
+        Checks the characters still to place can be arranged without breaking a run limit,
+        after placing a character of class `chosen` that makes a run of `run`.
+        """
+
+        for j, count in enumerate(remaining):
+            limit = self.run_limits[j]
+            if not count or limit is None:
+                continue
+
+            others = left - count #characters of other classes that can separate this class's runs
+            if j == chosen:
+                if count > (limit - run) + limit * others:
+                    return False
+            elif count > limit * (others + 1):
+                return False
+
+        return True
+
+    def arrange(self, counts, length):
+        """
+        Places the characters one at a time: each position gets a class picked at random (weighted by how many
+        of its characters are left) from the classes that keep the rules, then the next of that class's characters,
+        which are all drawn up front.
+        """
+
+        remaining = list(counts)
+        pools = [stream.take(count) for stream, count in zip(self.streams, counts)] #each class's characters, used from the end
+        password = []
+        last = None
+        run = 0
+        cache = self.arrange_cache
+        below = random_source.below
+
+        for left in range(length - 1, -1, -1): #left is how many characters are still to place after this one
+            key = (tuple(remaining), last, run)
+            found = cache.get(key)
+
+            if found is None: #the same states come up again and again, so each one is only checked once
+                found = self.candidates(remaining, left, last, run)
+                if len(cache) >= ARRANGE_CACHE_SIZE:
+                    cache.clear()
+                cache[key] = found
+
+            classes, totals = found
+
+            if len(classes) == 1: #no choice to make, so no random number needed
+                j = classes[0]
+            elif classes:
+                j = classes[bisect_right(totals, below(totals[-1]))]
+            else:
+                raise ValueError("This policy's run and repeat rules can't all be kept.")
+
+            remaining[j] -= 1
+            char = pools[j][remaining[j]]
+
+            if j == last:
+                if self.no_repeat and char == password[-1]: #redrawn from every character of the class except the one before
+                    alphabet = self.alphabets[j]
+                    position = below(len(alphabet) - 1)
+                    if position >= self.char_positions[j][char]:
+                        position += 1
+                    char = alphabet[position]
+                run += 1
+            else:
+                run = 1
+
+            password.append(char)
+            last = j
+
+        return ''.join(password)
+
+    def candidates(self, remaining, left, last, run):
+        """
+        Returns the classes that can go next without breaking a rule, and the running totals of how many
+        characters each has left, which is how arrange() weights them.
+        """
+
+        classes = []
+        totals = []
+        total = 0
+
+        for j, count in enumerate(remaining):
+            if not count:
+                continue
+
+            new_run = run + 1 if j == last else 1
+            if self.run_limits[j] is not None and new_run > self.run_limits[j]:
+                continue
+
+            remaining[j] -= 1
+            if self.fits(remaining, left, j, new_run):
+                total += count
+                classes.append(j)
+                totals.append(total)
+            remaining[j] += 1
+
+        return classes, totals
+
+    def generate(self, length):
+        if self.use_redraw(length):
+            return next(self.redraw(1, length))
+
+        counts = self.pick_counts(length)
+
+        if self.constrained:
+            return self.arrange(counts, length)
+
+        chars = list(''.join(stream.take(count) for stream, count in zip(self.streams, counts)))
+        random_source.shuffle(chars)
+        return ''.join(chars)
+
+    def redraw(self, count, length):
+        """
+        Yields count passwords drawn from every character of the policy, redrawing any that don't meet it.
+        """
+
+        take = get_stream(self.alphabet).take
+        class_sets = self.class_sets
+        made = 0
+
+        while made < count:
+            password = take(length)
+
+            if self.at_least_one: #the common case, set checks are faster than counting
+                chars = set(password)
+                if not all(not chars.isdisjoint(class_set) for class_set in class_sets):
+                    continue
+            elif not self.meets_counts(password):
+                continue
+
+            yield password
+            made += 1
+
+compiled_policies = {} # policy definition (as JSON) -> CompiledPolicy
+
+def compile_policy(definition):
+    """
+    Returns the CompiledPolicy for a policy definition, only compiling each definition once.
+    """
+
+    key = json.dumps(definition)
+
+    if key not in compiled_policies:
+        compiled_policies[key] = CompiledPolicy(definition)
+
+    return compiled_policies[key]
+
+def iter_passwords(count, length, policy=None):
+    """
+    Yields count random passwords of the given length following a policy (DEFAULT_POLICY if not given,
+    see CompiledPolicy for the format). By default every password has at least one lower case letter,
+    upper case letter, digit and special character.
+    """
+
+    compiled = compile_policy(policy or DEFAULT_POLICY)
+
+    if length < compiled.min_length:
+        raise ValueError(f"Password must be at least {compiled.min_length} characters to include all character types.")
+
+    compiled.count_table(length) #raises ValueError before the first password if the policy can't be met
+
+    if compiled.use_redraw(length):
+        yield from compiled.redraw(count, length)
+        return
+
+    for _ in range(count):
+        yield compiled.generate(length)
+
+def generate_many(count, length, policy=None):
+    return list(iter_passwords(count, length, policy))
 
 def generate_password(length):
-    lower = random.choice(string.ascii_lowercase) #these choose one from each set
-    upper = random.choice(string.ascii_uppercase)
-    digit = random.choice(string.digits)
-    special = random.choice(string.punctuation)
-
-    remaining_length = length - 4
-    all_chars = string.ascii_letters + string.digits + string.punctuation
-    remaining_chars = [random.choice(all_chars) for _ in range(remaining_length)] #this chooses the remaining characters and puts them in a list
-    password_list = [lower, upper, digit, special] + remaining_chars #this combines all the characters for the password
-    random.shuffle(password_list) #this mixes it all up to make sure the password doesn't always start with lower, upper, digit, special
-    password = "".join(password_list) #this combines all the characters
-
-    return password
-
-while True:
-    view = input("\nWould you like to see your saved passwords, generate a new one, delete an entry or end? (see/generate/delete/end): ").strip().lower()
-    if view == "see":
-        show_list()
-    elif view == "generate":
-        while True: #this is the general loop for generating passwords
+    return next(iter_passwords(1, length)) #uses the same secure engine as bulk generation
+
+def write_passwords(count, length, path="-"):
+    """
+    Streams count passwords, one per line, to a file or to standard output ('-').
+    """
+
+    file = sys.stdout if path == "-" else open(path, "w")
+
+    try:
+        for password in iter_passwords(count, length):
+            file.write(password + "\n")
+    finally:
+        if file is not sys.stdout:
+            file.close()
+
+class Wordlist:
+    """
+    A big wordlist read lazily with mmap. The byte offset of every line is worked out once and cached
+    beside the wordlist (wordlist.txt.idx), so opening it is instant and only the picked words are read.
+    The index is rebuilt whenever the wordlist's size or modified time changes.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or WORDLIST_FILE)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+
+        with open(self.path, "rb") as file:
+            info = os.fstat(file.fileno())
+            self.words = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if info.st_size else b""
+
+        if not self.load_index(info):
+            self.build_index(info)
+
+        if not len(self):
+            raise ValueError(f"{self.path.name} has no words in it.")
+
+    def load_index(self, info):
+        """
+        Maps the cached offsets, returning False if there are none or they're out of date.
+        """
+
+        try:
+            with open(self.index_path, "rb") as file:
+                index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError): #missing, or an empty file that can't be mapped
+            return False
+
+        if len(index) < WORDLIST_INDEX_HEADER.size:
+            return False
+
+        magic, size, modified, count = WORDLIST_INDEX_HEADER.unpack(index[:WORDLIST_INDEX_HEADER.size])
+        if magic != WORDLIST_INDEX_MAGIC or size != info.st_size or modified != info.st_mtime_ns or len(index) != WORDLIST_INDEX_HEADER.size + 8 * count:
+            return False
+
+        self.offsets = memoryview(index)[WORDLIST_INDEX_HEADER.size:].cast("Q") #read straight from the file
+        return True
+
+    def build_index(self, info):
+        """
+        Finds where every non-empty line starts and saves the offsets beside the wordlist.
+        """
+
+        offsets = array("Q")
+        start = 0
+        end = len(self.words)
+
+        while start < end:
+            newline = self.words.find(b"\n", start)
+            if newline == -1:
+                newline = end
+            if self.words[start:newline].strip():
+                offsets.append(start)
+            start = newline + 1
+
+        header = WORDLIST_INDEX_HEADER.pack(WORDLIST_INDEX_MAGIC, info.st_size, info.st_mtime_ns, len(offsets))
+        file_storage.atomic_write(self.index_path, lambda file: file.write(header + offsets.tobytes()), mode="wb")
+
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, position):
+        start = self.offsets[position]
+        end = self.words.find(b"\n", start)
+        line = self.words[start:end if end != -1 else len(self.words)].decode("utf-8").split()
+        return line[-1] #drops the dice numbers at the start of diceware lists
+
+wordlists = {} # path -> Wordlist, so each wordlist is only opened once
+
+def get_wordlist(path=None):
+    path = Path(path or WORDLIST_FILE)
+    if path not in wordlists:
+        wordlists[path] = Wordlist(path)
+    return wordlists[path]
+
+def iter_passphrases(count, words, separator="-", capitalize="none", digit=False, wordlist=None):
+    """
+    Yields count passphrases of random words from the wordlist (WORDLIST_FILE if not given), picked with secrets.
+    capitalize is one of PASSPHRASE_CAPITALIZE, and digit=True adds a random digit to the end of a random word.
+    """
+
+    if words < 1:
+        raise ValueError("A passphrase needs at least 1 word.")
+    if " - " in separator:
+        raise ValueError('The separator can\'t contain " - ", saved entries use it between the label and the password.')
+    if capitalize not in PASSPHRASE_CAPITALIZE:
+        raise ValueError(f"capitalize must be one of {', '.join(PASSPHRASE_CAPITALIZE)}.")
+
+    wordlist = get_wordlist(wordlist)
+    size = len(wordlist)
+
+    for _ in range(count):
+        chosen = [wordlist[secrets.randbelow(size)] for _ in range(words)]
+
+        if capitalize == "all":
+            chosen = [word.capitalize() for word in chosen]
+        elif capitalize == "one":
+            position = secrets.randbelow(words)
+            chosen[position] = chosen[position].capitalize()
+
+        if digit:
+            chosen[secrets.randbelow(words)] += str(secrets.randbelow(10))
+
+        yield separator.join(chosen)
+
+def generate_passphrase(words, separator="-", capitalize="none", digit=False):
+    return next(iter_passphrases(1, words, separator, capitalize, digit)) #uses the same engine as bulk generation
+
+def passphrase_bits(words, digit=False, wordlist=None):
+    """
+    How many bits of randomness a passphrase has (capitalizing one word isn't counted).
+    """
+
+    bits = words * math.log2(len(get_wordlist(wordlist)))
+    return bits + math.log2(words * 10) if digit else bits
+
+def write_passphrases(count, words, path="-"):
+    """
+    Streams count passphrases, one per line, to a file or to standard output ('-').
+    """
+
+    file = sys.stdout if path == "-" else open(path, "w")
+
+    try:
+        for passphrase in iter_passphrases(count, words):
+            file.write(passphrase + "\n")
+    finally:
+        if file is not sys.stdout:
+            file.close()
+
+def read_dump_hashes(dump_path):
+    """
+    Yields the sha1 hash (20 bytes) of every line of a breached password dump.
+    Lines can be a sha1 in hex, optionally followed by ':count' (the Have I Been Pwned format),
+    anything else is taken as a plain password and hashed.
+    """
+
+    with open(dump_path, "r", encoding="utf-8", errors="replace") as file:
+        for line in file:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+
+            candidate = line.split(":", 1)[0]
+            if len(candidate) == 2 * SHA1_SIZE:
+                try:
+                    yield bytes.fromhex(candidate)
+                    continue
+                except ValueError:
+                    pass #not hex, so it's a password
+
+            yield hashlib.sha1(line.encode("utf-8")).digest()
+
+def write_run(hashes, folder):
+    """
+    Sorts a chunk of hashes and writes it to a temporary file, returning the file's path.
+    """
+
+    hashes.sort()
+    handle, path = tempfile.mkstemp(dir=folder, suffix=".run")
+    with os.fdopen(handle, "wb") as file:
+        file.write(b"".join(hashes))
+    return path
+
+def read_run(path):
+    """
+    Yields the hashes of a sorted chunk file, reading it in big blocks.
+    """
+
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(SHA1_SIZE * 65536)
+            if not block:
+                return
+            for start in range(0, len(block), SHA1_SIZE):
+                yield block[start:start + SHA1_SIZE]
+
+def bloom_positions(digest, bit_count, probes):
+    """
+    Returns the bloom filter bits for a hash. A sha1 is already random, so two 64 bit numbers taken
+    from it are enough to make every probe (double hashing: first + i * step).
+    """
+
+    first = int.from_bytes(digest[:8], "little")
+    step = int.from_bytes(digest[8:16], "little") | 1
+    return [(first + i * step) % bit_count for i in range(probes)]
+
+def build_breach_index(dump_path):
+    """
+    One-off build step: turns a breached password dump into BREACH_HASH_FILE (every hash once, sorted)
+    and BREACH_BLOOM_FILE. Dumps too big for memory are sorted in chunks that are merged at the end,
+    and the bloom filter is written through mmap, so memory use stays about the same for any dump size.
+    """
+
+    folder = BREACH_HASH_FILE.parent
+    runs = []
+    chunk = []
+    total = 0
+
+    with tempfile.TemporaryDirectory(dir=folder) as temp_folder:
+        for digest in read_dump_hashes(dump_path):
+            chunk.append(digest)
+            total += 1
+            if len(chunk) >= BREACH_SORT_CHUNK:
+                runs.append(write_run(chunk, temp_folder))
+                chunk = []
+
+        if runs: #big dumps: the last chunk is written too and every chunk is merged
+            runs.append(write_run(chunk, temp_folder))
+            hashes = heapq.merge(*(read_run(path) for path in runs))
+        else: #small dumps are sorted in memory
+            chunk.sort()
+            hashes = iter(chunk)
+
+        bit_count = max(8, math.ceil(-max(total, 1) * math.log(BLOOM_FALSE_POSITIVE_RATE) / math.log(2) ** 2))
+        probes = max(1, round(bit_count / max(total, 1) * math.log(2)))
+
+        hash_temp = BREACH_HASH_FILE.with_name(BREACH_HASH_FILE.name + ".tmp")
+        bloom_temp = BREACH_BLOOM_FILE.with_name(BREACH_BLOOM_FILE.name + ".tmp")
+        unique = 0
+        previous = None
+
+        with open(bloom_temp, "wb") as bloom_file:
+            bloom_file.truncate(BLOOM_HEADER.size + (bit_count + 7) // 8) #a file of zero bits
+
+        with open(hash_temp, "wb") as hash_file, open(bloom_temp, "r+b") as bloom_file, mmap.mmap(bloom_file.fileno(), 0) as bloom:
+            for digest in hashes:
+                if digest == previous:
+                    continue #the same password more than once in the dump
+                previous = digest
+
+                hash_file.write(digest)
+                for position in bloom_positions(digest, bit_count, probes):
+                    bloom[BLOOM_HEADER.size + (position >> 3)] |= 1 << (position & 7)
+                unique += 1
+
+            bloom[:BLOOM_HEADER.size] = BLOOM_HEADER.pack(BLOOM_MAGIC, bit_count, unique, probes)
+
+        os.replace(hash_temp, BREACH_HASH_FILE) #swapped in only once both files are complete
+        os.replace(bloom_temp, BREACH_BLOOM_FILE)
+
+    print(f"Indexed {unique} breached password hashes ({total - unique} duplicates skipped).")
+
+class BreachChecker:
+    """
+    Checks passwords against the breached password index using mmap, so nothing is loaded into memory:
+    the bloom filter answers most checks (a password that isn't in the list), and only a "maybe" goes on to
+    a binary search of the sorted hash file. `password in checker` does the check.
+    """
+
+    def __init__(self, hash_path=None, bloom_path=None):
+        with open(hash_path or BREACH_HASH_FILE, "rb") as file:
+            self.hashes = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else b""
+        with open(bloom_path or BREACH_BLOOM_FILE, "rb") as file:
+            self.bloom = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.bit_count, self.count, self.probes = BLOOM_HEADER.unpack(self.bloom[:BLOOM_HEADER.size])
+        if magic != BLOOM_MAGIC:
+            raise ValueError("Not a breached password bloom filter file.")
+
+    def contains_hash(self, digest):
+        for position in bloom_positions(digest, self.bit_count, self.probes):
+            if not self.bloom[BLOOM_HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False #definitely not in the list
+
+        lo = 0
+        hi = len(self.hashes) // SHA1_SIZE
+        while lo < hi: #binary search of the sorted hashes
+            middle = (lo + hi) // 2
+            found = self.hashes[middle * SHA1_SIZE:(middle + 1) * SHA1_SIZE]
+            if found == digest:
+                return True
+            if found < digest:
+                lo = middle + 1
+            else:
+                hi = middle
+        return False
+
+    def __contains__(self, password):
+        return self.contains_hash(hashlib.sha1(password.encode("utf-8")).digest())
+
+breach_checker = None # opened the first time it's needed
+
+def get_breach_checker():
+    """
+    Returns the BreachChecker, or None if the breached password index hasn't been built.
+    """
+
+    global breach_checker
+    if breach_checker is None and BREACH_HASH_FILE.exists() and BREACH_BLOOM_FILE.exists():
+        breach_checker = BreachChecker()
+    return breach_checker
+
+def audit_passwords():
+    """
+    Checks every saved password against the breached password list and prints the ones that were found.
+    """
+
+    checker = get_breach_checker()
+    if checker is None:
+        print("No breached password list yet. Build one with: python Password_Generator.py build-breach dump.txt")
+        return
+
+    found = [item for item in vault if entry_password(item) is not None and entry_password(item) in checker]
+
+    for item in found:
+        print(f"Breached: {entry_label(item)}")
+    print(f"Checked {len(vault)} passwords, {len(found)} found in the breached password list.")
+
+def offer_to_save(generated):
+    """
+    Asks whether to save a generated password or passphrase, and what it's for.
+    """
+
+    add_file = input("Would you like to add this to your passwords file? (yes/no): ").strip().lower()
+    if add_file == "yes":
+        password_use = input("What is this password for? ").strip()
+
+        if vault.find(password_use) is not None:
+            replace = input(f"An entry for '{password_use}' already exists. Would you like to replace it? (yes/no): ").strip().lower()
+            if replace == "yes":
+                vault.set(password_use, generated) #this replaces the entry in the same position
+                print(f"Entry for '{password_use}' updated.")
+            else:
+                print("Entry not changed.")
+        else:
+            vault.set(password_use, generated)
+            print(f"Entry for '{password_use}' added.")
+
+if __name__ == "__main__" and len(sys.argv) > 2 and sys.argv[1] == "bulk": # python Password_Generator.py bulk count [length] [file|-]
+    write_passwords(int(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) > 3 else 16, sys.argv[4] if len(sys.argv) > 4 else "-")
+
+elif __name__ == "__main__" and len(sys.argv) > 2 and sys.argv[1] == "passphrases": # python Password_Generator.py passphrases count [words] [file|-]
+    write_passphrases(int(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) > 3 else 6, sys.argv[4] if len(sys.argv) > 4 else "-")
+
+elif __name__ == "__main__" and len(sys.argv) > 2 and sys.argv[1] == "build-breach": # python Password_Generator.py build-breach dump.txt
+    build_breach_index(sys.argv[2])
+
+elif __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "audit": # python Password_Generator.py audit
+    vault = PasswordVault().load()
+    audit_passwords()
+
+elif __name__ == "__main__": #only runs the menu when the file is run directly, not when it's imported
+    vault = PasswordVault().load()
+    while True:
+        vault.sync() #picks up changes saved by another copy of the program that's running
+        view = input("\nWould you like to see your saved passwords, generate a new one, delete an entry or end? (see/generate/passphrase/delete/end): ").strip().lower()
+        if view == "see":
+            show_list()
+        elif view == "generate":
+            while True: #this is the general loop for generating passwords
+                try:
+                    length = int(input("\nHow many characters would you like your password to be? "))
+                    if length < 4:
+                        print("Password must be at least 4 characters to include all character types.")
+                    else:
+                        break
+                except ValueError:
+                    print("Please enter a valid number.")
+
+            generated = generate_password(length)
+            checker = get_breach_checker()
+            while checker is not None and generated in checker: #never hand out a password that's in the breached list
+                generated = generate_password(length)
+            print("Your password is: ",generated)  # generated used instead of password as password only exists within the function
+            offer_to_save(generated)
+
+        elif view == "passphrase":
             try:
-                length = int(input("\nHow many characters would you like your password to be? "))
-                if length < 4:
-                    print("Password must be at least 4 characters to include all character types.")
+                wordlist = get_wordlist()
+            except (OSError, ValueError) as error:
+                print(f"Passphrases need a wordlist, one word per line, saved as {WORDLIST_FILE.name} ({error}).")
+                continue
+
+            while True:
+                try:
+                    words = int(input("\nHow many words would you like your passphrase to be? "))
+                    if words < 1:
+                        print("A passphrase needs at least 1 word.")
+                    else:
+                        break
+                except ValueError:
+                    print("Please enter a valid number.")
+
+            while True:
+                separator = input("What should go between the words? (press enter for -): ") or "-"
+                if " - " in separator: #entry_label() and entry_password() split saved entries at " - "
+                    print('The separator can\'t contain " - ", as saved entries use it between the label and the password.')
                 else:
                     break
-            except ValueError:
-                print("Please enter a valid number.")
-
-        generated = generate_password(length)
-        print("Your password is: ",generated)  # generated used instead of password as password only exists within the function
 
-        add_file = input("Would you like to add this to your passwords file? (yes/no): ").strip().lower()
-        if add_file == "yes":
-            password_use = input("What is this password for? ").strip()
-            label_lower = password_use.lower()
-            existing_index = None
+            capitalize = input("Capitalize all words, one word or none? (all/one/none): ").strip().lower()
+            digit = input("Add a digit? (yes/no): ").strip().lower() == "yes"
 
-            for i, item in enumerate(passwords): #enumerate keeps track of the index 'i' and the element in the list 'item'
-                if item.lower().startswith(label_lower + " -"): # " -" used to make sure searching 'Google' doesn't trigger 'Google Mail'
-                    existing_index = i
-                    break
+            generated = generate_passphrase(words, separator, capitalize if capitalize in PASSPHRASE_CAPITALIZE else "none", digit)
+            checker = get_breach_checker()
+            while checker is not None and generated in checker:
+                generated = generate_passphrase(words, separator, capitalize if capitalize in PASSPHRASE_CAPITALIZE else "none", digit)
+            print("Your passphrase is: ", generated)
+            print(f"That's about {passphrase_bits(words, digit):.0f} bits of randomness from {len(wordlist)} words.")
 
-            list_entry = f"{password_use} - {generated}"
+            offer_to_save(generated)
 
-            if existing_index is not None:
-                replace = input(f"An entry for '{password_use}' already exists. Would you like to replace it? (yes/no): ").strip().lower()
-                if replace == "yes":
-                    passwords[existing_index] = list_entry #this replaces the item in the list in the same position
-                    print(f"Entry for '{password_use}' updated.")
-                else:
-                    print("Entry not changed.")
-            else:
-                passwords.append(list_entry)
-                print(f"Entry for '{password_use}' added.")
-
-            save_list(passwords)
-
-    elif view == "delete":
-        delete = input("Which entry would you like to delete? ").strip().lower()
-        found = False
-        for item in passwords:  # loops through each entry in the list
-            if item.lower().startswith(delete + " -"): # this searches to see if the input is in the line, not the full line
-                passwords.remove(item)
-                save_list(passwords)
+        elif view == "delete":
+            delete = input("Which entry would you like to delete? ").strip()
+            item = vault.delete(delete) # this looks the label up in the index, not the full line
+            if item is not None:
                 print(f'"{item}" has been removed.')  # f means evaluate the expression inside {} and put the values into this string
                 show_list()
-                found = True
-                break  # stops the loop
-        if not found:
-            print("Item wasn't found.")
-    elif view == "end":
-        print("Goodbye.")
-        break
-    else:
-        print("Please enter a valid input.")
\ No newline at end of file
+            else:
+                print("Item wasn't found.")
+        elif view == "end":
+            print("Goodbye.")
+            break
+        else:
+            print("Please enter a valid input.")
\ No newline at end of file
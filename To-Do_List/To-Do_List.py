@@ -1,58 +1,578 @@
+import heapq # picks out one page of search results without sorting them all
+import json # the search index cache is saved as JSON
+import re
+import sys
+from datetime import date
+from itertools import islice
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent)) # file_storage.py is shared by the projects and lives one folder up
+import file_storage # atomic saves and a lock between running copies of the program
+
 # Ensure the todo file is resolved relative to this script's directory so the
 # program will always use `To-Do_List/todo.txt` regardless of the current
 # working directory when the script is run.
 BASE_DIR = Path(__file__).parent
 FILENAME = BASE_DIR / "todo.txt"  # this uses a new variable so if the file name changes you only have to change it here
+WORD_PATTERN = re.compile(r"\w+") # what counts as a word when searching
+SEARCH_MODES = ("words", "prefix", "fuzzy")
+PAGE_SIZE = 20 # search results shown at a time
+META_SEPARATOR = " || " # separates an item from its priority and due date in todo.txt
+NO_PRIORITY = 1_000_000 # items without a priority come after every item with one
+COMPACT_LOG_LINES = 1000 # the change log is folded back into todo.txt once it has this many lines (or more lines than the list has items)
+
+def item_key(text): #items are matched ignoring case, casefold() is a stronger lower() that also handles e.g. German ß
+    return text.strip().casefold()
+
+def tokenize(text): #the words of an item, ignoring case and punctuation
+    return WORD_PATTERN.findall(text.casefold())
+
+def parse_item(line):
+    """
+    Splits a todo.txt line into (text, priority, due date). Priority and due date are None when the
+    line doesn't have them, which includes every line written before they existed.
+    Lines with metadata look like: Pay the bills || priority:1 due:2026-10-31
+    """
+
+    text, separator, metadata = line.rpartition(META_SEPARATOR)
+    if not separator:
+        return line, None, None
+
+    priority = None
+    due = None
+
+    for field in metadata.split():
+        name, _, value = field.partition(":")
+        try:
+            if name == "priority" and int(value) >= 1:
+                priority = int(value)
+            elif name == "due":
+                due = date.fromisoformat(value)
+            else:
+                return line, None, None #not metadata after all, just an item with || in it
+        except ValueError:
+            return line, None, None
+
+    return text, priority, due
+
+def format_item(text, priority=None, due=None): #the todo.txt line for an item, a plain line if it has no metadata
+    fields = []
+    if priority is not None:
+        fields.append(f"priority:{priority}")
+    if due is not None:
+        fields.append(f"due:{due.isoformat()}")
+    return f"{text}{META_SEPARATOR}{' '.join(fields)}" if fields else text
+
+def describe_item(line): #how an item is shown in the menu
+    text, priority, due = parse_item(line)
+    details = []
+    if priority is not None:
+        details.append(f"priority {priority}")
+    if due is not None:
+        details.append(f"due {due.isoformat()}")
+    return f"{text} ({', '.join(details)})" if details else text
+
+class ItemHeap:
+    """
+    A min-heap of (key, item id) that can also remove items. Removed items are left in the heap and
+    skipped (lazy deletion), and the heap is rebuilt once more than half of it is removed items,
+    so adding and removing are O(log n) on average.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.keys = {} # item id -> key, for the items still in the heap
+
+    def push(self, item_id, key):
+        self.keys[item_id] = key
+        heapq.heappush(self.heap, (key, item_id))
+
+    def remove(self, item_id):
+        if self.keys.pop(item_id, None) is not None and len(self.heap) > 2 * len(self.keys) + 16:
+            self.heap = [(key, item_id) for item_id, key in self.keys.items()]
+            heapq.heapify(self.heap)
+
+    def smallest(self):
+        """
+        Yields (key, item id) from the smallest key up, without changing the heap. Only the part of the
+        heap that is read is visited: a second small heap holds the positions that could come next
+        (the children of those already given), so the first k items take O(k log k).
+        """
+
+        if not self.heap:
+            return
+
+        frontier = [(self.heap[0], 0)]
+
+        while frontier:
+            entry, position = heapq.heappop(frontier)
+            key, item_id = entry
+
+            if self.keys.get(item_id) == key: #skips items that were removed
+                yield entry
+
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(self.heap):
+                    heapq.heappush(frontier, (self.heap[child], child))
+
+    def renumber(self, new_ids):
+        self.keys = {new_ids[item_id]: key for item_id, key in self.keys.items()}
+        self.heap = [(key, item_id) for item_id, key in self.keys.items()]
+        heapq.heapify(self.heap)
+
+class SearchIndex:
+    """
+    Word search over the To-Do items: an inverted index (word -> ids of the items containing it) and a
+    prefix trie of every word, both updated as items are added and deleted. The trie answers prefix
+    searches and fuzzy (close spelling) searches without going through every word.
+    """
+
+    def __init__(self):
+        self.postings = {} # word -> set of item ids
+        self.trie = {} # nested dicts, one level per character, "" marks the end of a word
+
+    def add(self, item_id, text):
+        for word in set(tokenize(text)):
+            if word not in self.postings:
+                self.postings[word] = set()
+                self.trie_add(word)
+            self.postings[word].add(item_id)
+
+    def remove(self, item_id, text):
+        for word in set(tokenize(text)):
+            ids = self.postings.get(word)
+            if ids is None:
+                continue
+            ids.discard(item_id)
+            if not ids: #no items have this word any more
+                del self.postings[word]
+                self.trie_remove(word)
+
+    def trie_add(self, word):
+        node = self.trie
+        for character in word:
+            node = node.setdefault(character, {})
+        node[""] = True
+
+    def trie_remove(self, word):
+        path = [self.trie]
+        for character in word:
+            path.append(path[-1][character])
+        del path[-1][""]
+
+        for depth in range(len(word), 0, -1): #removes the nodes no other word uses, from the end of the word back
+            if path[depth]:
+                break
+            del path[depth - 1][word[depth - 1]]
+
+    def words_with_prefix(self, prefix):
+        node = self.trie
+        for character in prefix:
+            node = node.get(character)
+            if node is None:
+                return
+
+        stack = [(prefix, node)]
+        while stack:
+            word, node = stack.pop()
+            for character, child in node.items():
+                if character == "":
+                    yield word
+                else:
+                    stack.append((word + character, child))
+
+    def words_near(self, target, max_distance):
+        """
+        Yields the words within max_distance edits (insert, delete or change a letter) of target.
+        Works down the trie a row of the edit distance table at a time, skipping any branch that is
+        already too far away, so only a small part of the trie is visited.
+        """
+
+        first_row = list(range(len(target) + 1))
+        stack = [("", self.trie, first_row)]
+
+        while stack:
+            word, node, row = stack.pop()
+
+            if "" in node and row[-1] <= max_distance:
+                yield word
+
+            for character, child in node.items():
+                if character == "":
+                    continue
+
+                next_row = [row[0] + 1]
+                for column in range(1, len(target) + 1):
+                    next_row.append(min(
+                        next_row[column - 1] + 1, #insert
+                        row[column] + 1, #delete
+                        row[column - 1] + (target[column - 1] != character) #change (or keep)
+                    ))
+
+                if min(next_row) <= max_distance:
+                    stack.append((word + character, child, next_row))
+
+    def matching_ids(self, query, mode="words"):
+        """
+        Returns the ids of the items containing every word of the query. mode is one of SEARCH_MODES:
+        'words' matches whole words, 'prefix' matches words starting with each query word and
+        'fuzzy' matches words spelt closely to each query word.
+        """
+
+        words = tokenize(query)
+        if not words:
+            return set()
+
+        matches = None
+
+        for query_word in sorted(words, key=len, reverse=True): #longer words usually match fewer items
+            if mode == "words":
+                ids = self.postings.get(query_word, set())
+            else:
+                if mode == "prefix":
+                    found = self.words_with_prefix(query_word)
+                else:
+                    found = self.words_near(query_word, 1 if len(query_word) <= 4 else 2)
+                ids = set()
+                for word in found:
+                    ids |= self.postings[word]
+
+            matches = set(ids) if matches is None else matches & ids
+            if not matches:
+                break
+
+        return matches
+
+    def to_data(self):
+        return {word: sorted(ids) for word, ids in self.postings.items()}
+
+    @classmethod
+    def from_data(cls, data):
+        index = cls()
+        for word, ids in data.items():
+            index.postings[word] = set(ids)
+            index.trie_add(word)
+        return index
+
+class TodoStore:
+    """
+    The To-Do list, in the order items were added, with an index by case-folded text so finding and
+    deleting an item is O(1). Adds and deletes are appended to a change log next to todo.txt (a delete is
+    a tombstone: a line saying which item went), and the log is folded back into todo.txt (compacted)
+    once it gets long. todo.txt keeps the plain one-item-per-line format, so older files load as they are.
+    A SearchIndex of the items is kept up to date as well, and saved beside todo.txt whenever todo.txt is
+    written, so it doesn't have to be rebuilt every time the list is loaded. Every change is made while
+    holding the file's lock, after picking up anything another running copy of the program saved (sync),
+    so two copies never overwrite each other's changes. Items can have a priority and
+    a due date (see parse_item), and two ItemHeaps keep them in "do next" and due date order.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = Path(filename or FILENAME)
+        self.log_filename = self.filename.with_name(self.filename.stem + "_changes.jsonl")
+        self.index_filename = self.filename.with_name(self.filename.stem + "_index.json")
+        self.log = file_storage.AppendLog(self.filename, self.log_filename, self.read_file, self.apply, self.write_file)
+        self.lock = self.log.lock
+        self.clear()
 
-def load_list():
-    try: #try to do this, if not then move to except
-        with open(FILENAME, "r") as file: #opens FILENAME in read mode "r"
-            return [line.strip() for line in file.readlines()] #this loops through each line in the file
-    except FileNotFoundError: #incase the file doesn't exist yet
-        return [] #start with an empty file
+    def clear(self): #back to an empty list, before todo.txt is read
+        self.items = {} # item id -> todo.txt line, in the order they were added (ids are just a counter)
+        self.index = {} # item key -> ids of the items with that text, oldest first, as the same item can be added twice
+        self.next_id = 0
+        self.search_index = SearchIndex()
+        self.indexing = True # False while items are loaded alongside a cached search index
+        self.next_heap = ItemHeap() # by priority, then due date, then the order they were added
+        self.due_heap = ItemHeap() # items with a due date, by due date
 
-def save_list(todo_list): #todo_list is used inside this function as it makes it reusable and not locked to a global variable
-    with open(FILENAME, "w") as file: #opens FILENAME in write mode "w"
-        for item in todo_list: #loops over every string in the list
-            file.write(item + "\n") #writes each item followed by a new line \n
+    def load(self):
+        self.log.load() #reads todo.txt with read_file() and then applies the change log
+        return self
 
-Todo = load_list() #this is the main list variable
+    def read_file(self):
+        self.clear()
+        lines = []
+
+        try:
+            with open(self.filename, "r") as file:
+                lines = [line.strip() for line in file]
+        except FileNotFoundError: #incase the file doesn't exist yet
+            pass
+
+        lines = [line for line in lines if line]
+        cached = self.load_search_index(len(lines))
+
+        self.indexing = cached is None
+        for line in lines:
+            self.apply({"op": "add", "item": line})
+        self.indexing = True
+
+        if cached is not None:
+            self.search_index = cached
+        else:
+            self.save_search_index(self.log.signature)
+
+    def sync(self):
+        """
+        Picks up changes saved by another running copy of the program: just the new log lines if it only
+        added to the log, or a fresh load if it rewrote todo.txt. Costs a couple of os.stat calls otherwise.
+        """
+
+        self.log.sync()
+
+    def apply(self, change):
+        """
+        Applies an add or delete to the items and the index, returning the id of the item it touched.
+        A delete removes the oldest item with that text, the same one find() returns.
+        """
+
+        text, priority, due = parse_item(change["item"])
+        key = item_key(text)
+
+        if change["op"] == "add":
+            item_id = self.next_id
+            self.next_id += 1
+            self.items[item_id] = change["item"]
+            self.index.setdefault(key, []).append(item_id)
+            if self.indexing:
+                self.search_index.add(item_id, text)
+            self.next_heap.push(item_id, (NO_PRIORITY if priority is None else priority, (due or date.max).toordinal()))
+            if due is not None:
+                self.due_heap.push(item_id, due.toordinal())
+            return item_id
+
+        if change["op"] == "delete" and key in self.index:
+            ids = self.index[key]
+            item_id = ids.pop(0) #only ever more than one for duplicate items
+            if not ids:
+                del self.index[key]
+            self.search_index.remove(item_id, parse_item(self.items.pop(item_id))[0])
+            self.next_heap.remove(item_id)
+            self.due_heap.remove(item_id)
+            return item_id
+
+        return None
+
+    def record(self, change):
+        """
+        Applies a change and appends it to the change log, compacting the log once it's long enough.
+        """
+
+        with self.lock:
+            self.sync()
+            item_id = self.apply(change)
+            self.log.append([change])
+
+            if self.log.lines >= max(COMPACT_LOG_LINES, len(self.items)): #keeps the total rewriting to O(1) per change on average
+                self.compact()
+
+        return item_id
+
+    def compact(self):
+        """
+        Rewrites todo.txt with every item and removes the change log.
+        The new file is written next to the old one and then swapped in, so a crash never leaves half a file.
+        """
+
+        self.log.compact()
+
+    def write_file(self): #saves todo.txt for log.compact(), along with the search index of the items in it
+        file_storage.write_lines(self.filename, self.items.values())
+        self.renumber()
+        self.save_search_index(file_storage.file_signature(self.filename))
+
+    def renumber(self):
+        """
+        Gives the items the ids 0, 1, 2... again, the ids they get when todo.txt is loaded,
+        so the saved search index matches the file.
+        """
+
+        new_ids = {item_id: position for position, item_id in enumerate(self.items)}
+
+        self.items = {new_ids[item_id]: item for item_id, item in self.items.items()}
+        self.index = {key: [new_ids[item_id] for item_id in ids] for key, ids in self.index.items()}
+        for word, ids in self.search_index.postings.items():
+            self.search_index.postings[word] = {new_ids[item_id] for item_id in ids}
+        self.next_heap.renumber(new_ids)
+        self.due_heap.renumber(new_ids)
+        self.next_id = len(self.items)
+
+    def load_search_index(self, item_count):
+        """
+        Returns the SearchIndex saved for the current todo.txt, or None if there isn't an up to date one.
+        """
+
+        try:
+            with open(self.index_filename, "r") as file:
+                cache = json.load(file)
+        except (FileNotFoundError, ValueError): #no cache yet, or a broken one
+            return None
+
+        if cache.get("file") != self.log.signature or cache.get("items") != item_count:
+            return None
+
+        return SearchIndex.from_data(cache["postings"])
+
+    def save_search_index(self, signature):
+        """
+        Saves the search index of the items in todo.txt, whose file_storage.file_signature() is signature. Only called when
+        the items are exactly the ones in todo.txt (just after loading or compacting it), so the saved index matches the file.
+        """
+
+        file_storage.write_json(self.index_filename, {"file": signature, "items": len(self.items), "postings": self.search_index.to_data()})
+
+    def find(self, text): #returns the item matching text (ignoring case), or None
+        ids = self.index.get(item_key(text))
+        return self.items[ids[0]] if ids else None
+
+    def add(self, text, priority=None, due=None):
+        self.record({"op": "add", "item": format_item(text.strip(), priority, due)})
+
+    def delete(self, text): #returns the removed item, or None if there wasn't one
+        with self.lock:
+            self.sync() #another copy of the program may have deleted it already
+            item = self.find(text)
+            if item is not None:
+                self.record({"op": "delete", "item": item})
+        return item
+
+    def search(self, query, mode="words", page=1, page_size=PAGE_SIZE):
+        """
+        Returns (the items on the given page of results, how many items matched), in list order.
+        Only the items up to the end of the page are sorted, however many items matched.
+        """
+
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}.")
+
+        matches = self.search_index.matching_ids(query, mode)
+        first_ids = heapq.nsmallest(page * page_size, matches) #ids go up in the order items were added
+        return [self.items[item_id] for item_id in first_ids[(page - 1) * page_size:]], len(matches)
+
+    def next_up(self, count): #the count items to do next: most important first, then the soonest due
+        return [self.items[item_id] for _, item_id in islice(self.next_heap.smallest(), count)]
+
+    def overdue(self, today=None): #the items due before today, the longest overdue first
+        today = (today or date.today()).toordinal()
+        found = []
+        for due, item_id in self.due_heap.smallest():
+            if due >= today:
+                break
+            found.append(self.items[item_id])
+        return found
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def __len__(self):
+        return len(self.items)
+
+Todo = None #this is the main list variable, loaded when the menu starts so importing this file doesn't create any files
 
 def show_list():
     print('Here is your To-Do list: ')
     for item in Todo:
-        print("- " + item)
+        print("- " + describe_item(item))
+
+def show_search(query, mode):
+    """
+    Prints the search results a page at a time, asking before showing the next page.
+    """
+
+    page = 1
+    while True:
+        results, total = Todo.search(query, mode, page)
+        if not total:
+            print("No matching To-Do's.")
+            return
+
+        first = (page - 1) * PAGE_SIZE + 1
+        print(f"Showing {first}-{first + len(results) - 1} of {total} matching To-Do's: ")
+        for item in results:
+            print("- " + describe_item(item))
+
+        if first + len(results) - 1 >= total or input("Press enter to see more, or type anything to stop. ").strip():
+            return
+        page += 1
+
+def ask_priority(): #returns the priority entered, or None for no priority
+    while True:
+        answer = input("Priority? (1 is the most important, press enter for none) ").strip()
+        if not answer:
+            return None
+        if answer.isdigit() and int(answer) >= 1:
+            return int(answer)
+        print("Please enter a whole number of 1 or more. ")
+
+def ask_due_date(): #returns the due date entered, or None for no due date
+    while True:
+        answer = input("Due date? (YYYY-MM-DD, press enter for none) ").strip()
+        if not answer:
+            return None
+        try:
+            return date.fromisoformat(answer)
+        except ValueError:
+            print("Please enter the date as YYYY-MM-DD. ")
 
 #main loop
-while True:
-    try:
-        instruction = input("What would you like to do? See, add, or delete To-Do's? Or end? ")
-        if instruction.upper() == "SEE":
-            show_list()
-        elif instruction.upper() == "ADD":
-            add = input("What would you like to add? ").strip()
-            Todo.append(add)
-            save_list(Todo)
-            show_list()
-        elif instruction.upper() == "DELETE":
-            delete = input("What would you like to delete? ").strip()
-            found = False
-            for item in Todo: #loops through each entry in the list
-                if item.lower() == delete.lower(): #double = means comparison whereas single means asign
-                    Todo.remove(item)
-                    save_list(Todo)
-                    print(f'"{item}" has been removed.') #f means evaluate the expression inside {} and put the values into this string
+if __name__ == "__main__": #only runs the loop when the file is run directly, not when it's imported
+    Todo = TodoStore().load()
+    while True:
+        try:
+            Todo.sync() #picks up changes saved by another copy of the program that's running
+            instruction = input("What would you like to do? See, add, delete, complete or search To-Do's, see what's next or overdue? Or end? ")
+            if instruction.upper() == "SEE":
+                show_list()
+            elif instruction.upper() == "ADD":
+                add = input("What would you like to add? ").strip()
+                if META_SEPARATOR.strip() in add:
+                    print(f"Sorry, To-Do's can't contain {META_SEPARATOR.strip()}. ")
+                elif add:
+                    Todo.add(add, ask_priority(), ask_due_date()) #appended to the change log, not a rewrite of the whole file
                     show_list()
-                    found = True
-                    break #stops the loop
-            if not found:
-                print("Item wasn't found.")
-        elif instruction.upper() == "END":
-            print("Goodbye!")
-            break
-        else:
-            print("Please enter a valid input. ")
-    except ValueError:
-        print("Please enter a valid input. ")
\ No newline at end of file
+                else:
+                    print("Please enter a valid input. ")
+            elif instruction.upper() == "DELETE":
+                delete = input("What would you like to delete? ").strip()
+                item = Todo.delete(delete) # this looks the item up in the index, not by going through the list
+                if item is not None:
+                    print(f'"{parse_item(item)[0]}" has been removed.') #f means evaluate the expression inside {} and put the values into this string
+                    show_list()
+                else:
+                    print("Item wasn't found.")
+            elif instruction.upper() == "COMPLETE":
+                done = input("Which To-Do have you done? ").strip()
+                item = Todo.delete(done) #a done To-Do comes off the list
+                if item is not None:
+                    print(f'Well done! "{parse_item(item)[0]}" is complete.')
+                else:
+                    print("Item wasn't found.")
+            elif instruction.upper() == "NEXT":
+                count = input("How many? (press enter for 5) ").strip()
+                if count and not count.isdigit():
+                    print("Please enter a valid input. ")
+                else:
+                    print("Up next: ")
+                    for item in Todo.next_up(int(count or 5)):
+                        print("- " + describe_item(item))
+            elif instruction.upper() == "OVERDUE":
+                overdue = Todo.overdue()
+                if overdue:
+                    print("Overdue: ")
+                    for item in overdue:
+                        print("- " + describe_item(item))
+                else:
+                    print("Nothing is overdue.")
+            elif instruction.upper() in ("SEARCH", "FIND"):
+                query = input("What would you like to search for? ").strip()
+                mode = input("Match whole words, the start of words or close spellings? (words/prefix/fuzzy) ").strip().lower() or "words"
+                if mode in SEARCH_MODES:
+                    show_search(query, mode)
+                else:
+                    print("Please enter a valid input. ")
+            elif instruction.upper() == "END":
+                print("Goodbye!")
+                break
+            else:
+                print("Please enter a valid input. ")
+        except ValueError:
+            print("Please enter a valid input. ")
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Compares the pure python and numpy stats engines of the Habit Tracker on a generated history
+(10 years x 500 habits by default), running the same range queries as the weekly summary.
+
+Run from the repository root: python benchmarks/bench_habit_stats_engines.py [years] [habits]
+"""
+
+import sys
+import time
+from datetime import date, timedelta
+
+from generators import generate_habit_data
+from harness import load_project
+
+tracker = load_project('Habit_Tracker', 'Habit_Tracker.py')
+
+def weekly_summary_stats(data, index, completed_weeks_by_habit):
+    """
+    Does the same range queries as view_weekly_summary() without printing, returns every habit's stats.
+    The completed weeks are worked out beforehand as they don't depend on the stats engine.
+    """
+
+    today = date.today()
+
+    current_week_start, _ = tracker.get_week_range(today)
+    last_week_end = current_week_start - timedelta(days=1)
+    last_week_start, _ = tracker.get_week_range(last_week_end)
+
+    results = {}
+    for habit_name, habit_info in data['habits'].items():
+        completed_weeks = completed_weeks_by_habit[habit_name]
+        results[habit_name] = (
+            tracker.calculate_stats_for_range(habit_name, habit_info, last_week_start, last_week_end, data, index),
+            tracker.calculate_stats_for_range(habit_name, habit_info, current_week_start, today, data, index),
+            tracker.average_weekly_stats(habit_name, habit_info, data, completed_weeks, index)
+        )
+
+    return results
+
+def time_engine(engine, data, completed_weeks_by_habit):
+    """
+    Returns (build seconds, query seconds, results) for one stats engine.
+    """
+
+    tracker.STATS_ENGINE = engine
+
+    start = time.perf_counter()
+    index = tracker.build_stats_index(data)
+    built = time.perf_counter()
+    results = weekly_summary_stats(data, index, completed_weeks_by_habit)
+    finished = time.perf_counter()
+
+    return built - start, finished - built, results
+
+if __name__ == '__main__':
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    habit_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    print(f'Generating {years} years x {habit_count} habits...')
+    data = generate_habit_data(years, habit_count)
+    completed_weeks_by_habit = {
+        habit_name: tracker.get_completed_weeks(date.fromisoformat(habit_info['created']), date.today())
+        for habit_name, habit_info in data['habits'].items()
+    }
+
+    python_build, python_queries, python_results = time_engine('python', data, completed_weeks_by_habit)
+    print(f'python engine: build {python_build:.3f}s, summary {python_queries:.3f}s')
+
+    if tracker.np is None:
+        print('numpy is not installed, skipping the numpy engine.')
+        sys.exit()
+
+    numpy_build, numpy_queries, numpy_results = time_engine('numpy', data, completed_weeks_by_habit)
+    print(f'numpy engine:  build {numpy_build:.3f}s, summary {numpy_queries:.3f}s')
+    print(f'speedup:       {(python_build + python_queries) / (numpy_build + numpy_queries):.1f}x overall')
+    print('results match:', python_results == numpy_results)
@@ -0,0 +1,80 @@
+"""
+Seeded synthetic data for the benchmarks, so every run measures exactly the same input.
+"""
+
+import random
+import string
+from datetime import date, timedelta
+
+def generate_habit_data(years, habit_count, seed=0, end_date=None):
+    """
+    Returns a habits_data.json style dictionary with a log for every day of the `years` years before end_date (default today).
+    Every third habit is quantitative, the rest are binary, and each habit is logged on roughly 80% of days.
+    """
+
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    first_day = end_date - timedelta(days=365 * years)
+
+    habits = {}
+    for i in range(habit_count):
+        if i % 3 == 0:
+            habits[f'habit {i}'] = {'type': 'quantitative', 'unit': 'minutes', 'created': first_day.isoformat(), 'active': True}
+        else:
+            habits[f'habit {i}'] = {'type': 'binary', 'created': first_day.isoformat(), 'active': True}
+
+    logs = {}
+    day = first_day
+    while day <= end_date:
+        daily_log = {}
+        for habit_name, habit_info in habits.items():
+            if rng.random() < 0.8:
+                if habit_info['type'] == 'binary':
+                    daily_log[habit_name] = rng.random() < 0.6
+                else:
+                    daily_log[habit_name] = rng.choice([0.0, 0.5, 1.25, 2.5, 10.0, 30.0])
+        logs[day.isoformat()] = daily_log
+        day += timedelta(days=1)
+
+    return {'habits': habits, 'logs': logs}
+
+def generate_password_vault(entry_count, seed=0):
+    """
+    Returns a list of `entry_count` unique 'label - password' lines in the passwords.txt format.
+    """
+
+    rng = random.Random(seed)
+    characters = string.ascii_letters + string.digits + string.punctuation
+
+    return [
+        f'Site {i} - ' + ''.join(rng.choice(characters) for _ in range(12))
+        for i in range(entry_count)
+    ]
+
+def generate_wordlist(word_count, seed=0):
+    """
+    Returns a list of `word_count` unique made-up words for a passphrase wordlist.
+    """
+
+    rng = random.Random(seed)
+
+    return [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 7))) + str(i) for i in range(word_count)]
+
+def generate_todo_list(item_count, seed=0):
+    """
+    Returns a list of `item_count` unique to-do items.
+    """
+
+    rng = random.Random(seed)
+    verbs = ['Buy', 'Call', 'Email', 'Fix', 'Book', 'Clean', 'Plan', 'Read', 'Write', 'Pay']
+    things = ['eggs', 'the plumber', 'mum', 'the bike', 'a dentist appointment', 'the garage', 'the holiday', 'chapter 3', 'a report', 'the bills']
+
+    return [f'{rng.choice(verbs)} {rng.choice(things)} #{i}' for i in range(item_count)]
+
+def generate_dice_sides(dice_count, seed=0):
+    """
+    Returns a list with the number of sides of `dice_count` dice, using the usual d4 to d20 dice.
+    """
+
+    rng = random.Random(seed)
+    return [rng.choice([4, 6, 8, 10, 12, 20]) for _ in range(dice_count)]
@@ -0,0 +1,115 @@
+"""
+Helpers shared by the benchmarks: loading the project scripts as modules, timing functions
+and saving/comparing results as JSON.
+"""
+
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # the folder above benchmarks/
+
+def load_project(folder, filename):
+    """
+    Imports a project script (e.g. load_project('To-Do_List', 'To-Do_List.py')) and returns the module.
+    Folder and file names with dashes can't be imported normally, so the file is loaded from its path.
+    The scripts only start their menus when run directly, so importing them is safe.
+    """
+
+    path = os.path.join(REPO_DIR, folder, filename)
+    module_name = os.path.splitext(filename)[0].replace('-', '_')
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module # lets worker processes and pickling find the module again
+    spec.loader.exec_module(module)
+
+    return module
+
+def measure(func, repeat=5, setup=None):
+    """
+    Runs func() `repeat` times (calling setup() before each run, untimed) and returns the timings in seconds.
+    """
+
+    timings = []
+
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'repeat': repeat
+    }
+
+def environment():
+    """
+    Returns details of the machine the benchmarks ran on, saved with the results so runs can be compared fairly.
+    """
+
+    try:
+        import numpy # the habit tracker's stats engine depends on whether numpy is installed
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    return {
+        'python': platform.python_version(),
+        'numpy': numpy_version,
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': datetime.now().isoformat(timespec='seconds')
+    }
+
+def save_results(results, path):
+    with open(path, 'w') as file:
+        json.dump({'environment': environment(), 'results': results}, file, indent=2)
+
+def load_results(path):
+    with open(path, 'r') as file:
+        return json.load(file)['results']
+
+def compare_results(old_results, new_results, threshold=0.10):
+    """
+    Prints how each benchmark's median time changed between two runs and returns the names of
+    benchmarks that got more than `threshold` (10% by default) slower. Benchmarks only in the old
+    results are listed as removed, so a renamed or replaced benchmark doesn't quietly drop out.
+    """
+
+    regressions = []
+
+    for name, new_timing in new_results.items():
+        if name not in old_results:
+            print(f'{name}: new benchmark')
+            continue
+
+        change = new_timing['median'] / old_results[name]['median'] - 1
+
+        if change > threshold:
+            regressions.append(name)
+            status = 'SLOWER'
+        elif change < -threshold:
+            status = 'faster'
+        else:
+            status = 'same'
+
+        print(f'{name}: {change:+.1%} ({status})')
+
+    for name in old_results:
+        if name not in new_results:
+            print(f'{name}: removed benchmark')
+
+    return regressions
@@ -0,0 +1,142 @@
+"""
+Load test for the Habit Tracker API: many concurrent clients logging habits and reading stats.
+
+By default it starts the API in this process on a free port, with its data in a temporary folder,
+so the real habit data is never touched. Pass --port to drive a server that's already running instead.
+
+Run from the repository root:
+    python benchmarks/load_test_habit_api.py --clients 200 --requests 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from harness import load_project
+
+HABIT_COUNT = 10
+
+async def send(reader, writer, method, path, body=None):
+    """
+    Sends one request on an open keep-alive connection and returns (status, decoded JSON body).
+    """
+
+    payload = json.dumps(body).encode() if body is not None else b''
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n'.encode() + payload)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+
+    while True:
+        line = await reader.readline()
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+
+    return status, json.loads(await reader.readexactly(length))
+
+async def client(host, port, request_count, read_share, latencies, errors, seed):
+    """
+    One client: opens a connection and sends request_count requests, mostly logs with some stats reads.
+    """
+
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+
+    for _ in range(request_count):
+        if rng.random() < read_share:
+            method, path, body = 'GET', rng.choice(['/stats', '/summary']), None
+        else:
+            habit = rng.randrange(HABIT_COUNT)
+            value = rng.random() < 0.7 if habit % 2 == 0 else round(rng.uniform(0, 60), 1)
+            method, path, body = 'POST', '/logs', {'habit': f'habit {habit}', 'value': value}
+
+        start = time.perf_counter()
+        status, _ = await send(reader, writer, method, path, body)
+        latencies.append(time.perf_counter() - start)
+
+        if status != 200:
+            errors.append(status)
+
+    writer.close()
+
+async def run_load_test(host, port, clients, requests, read_share):
+    """
+    Creates the test habits, then runs every client at once and returns the results.
+    """
+
+    reader, writer = await asyncio.open_connection(host, port)
+    for habit in range(HABIT_COUNT): # even habits are binary, odd ones quantitative (already existing habits just give a 400)
+        habit_type = 'binary' if habit % 2 == 0 else 'quantitative'
+        await send(reader, writer, 'POST', '/habits', {'name': f'habit {habit}', 'type': habit_type, 'unit': 'minutes'})
+    writer.close()
+
+    latencies = []
+    errors = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, requests, read_share, latencies, errors, seed) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'median_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000
+    }
+
+async def main(args):
+    if args.port:
+        return await run_load_test(args.host, args.port, args.clients, args.requests, args.read_share)
+
+    tracker = load_project('Habit_Tracker', 'Habit_Tracker.py')
+    api = load_project('Habit_Tracker', 'Habit_Tracker_API.py')
+
+    with tempfile.TemporaryDirectory() as temp_dir: # keeps the real data files untouched
+        tracker.data_file = os.path.join(temp_dir, 'habits_data.json')
+        tracker.journal_file = os.path.join(temp_dir, 'habits_journal.jsonl')
+        tracker.weekly_cache_file = os.path.join(temp_dir, 'habits_weekly_cache.json')
+
+        saves = []
+        persist_changes = tracker.persist_changes
+        tracker.persist_changes = lambda data, records: (saves.append(len(records)), persist_changes(data, records)) # counts the batched writes
+
+        ready = asyncio.Event()
+        server = asyncio.create_task(api.serve('127.0.0.1', 0, ready))
+        await ready.wait()
+
+        try:
+            results = await run_load_test('127.0.0.1', ready.port, args.clients, args.requests, args.read_share)
+        finally:
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+
+        results['writes'] = len(saves)
+        results['records_written'] = sum(saves)
+        return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the Habit Tracker API.')
+    parser.add_argument('--clients', type=int, default=200, help='concurrent connections')
+    parser.add_argument('--requests', type=int, default=50, help='requests per connection')
+    parser.add_argument('--read-share', type=float, default=0.2, help='fraction of requests that read stats')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='drive an already running server instead of starting one')
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+
+    for name, value in results.items():
+        print(f'{name}: {value:.2f}' if isinstance(value, float) else f'{name}: {value}')
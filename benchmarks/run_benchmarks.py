@@ -0,0 +1,235 @@
+"""
+Runs the benchmark suite for all the projects on seeded synthetic data and saves the timings as JSON.
+
+Run from the repository root:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --compare results.json    (exits with 1 if anything got more than 10% slower)
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+from generators import generate_dice_sides, generate_habit_data, generate_password_vault, generate_todo_list, generate_wordlist
+from harness import compare_results, load_project, load_results, measure, save_results
+
+END_DATE = date(2026, 1, 4) # generated histories end on a fixed Sunday so every run uses identical data
+HABIT_COUNT = 20
+HISTORY_YEARS = [1, 5, 20]
+VAULT_SIZE = 100_000
+TODO_SIZE = 10_000
+DICE_COUNT = 1_000_000
+
+def habit_tracker_benchmarks(temp_dir, repeat):
+    tracker = load_project('Habit_Tracker', 'Habit_Tracker.py')
+    tracker.STORAGE_BACKEND = 'json'
+    tracker.data_file = os.path.join(temp_dir, 'habits_data.json') # keeps the real data file untouched
+    tracker.journal_file = os.path.join(temp_dir, 'habits_journal.jsonl')
+
+    results = {}
+
+    for years in HISTORY_YEARS:
+        data = generate_habit_data(years, HABIT_COUNT, end_date=END_DATE)
+        index = tracker.build_stats_index(data)
+
+        weeks_by_habit = {
+            habit_name: tracker.get_completed_weeks(date.fromisoformat(habit_info['created']), END_DATE)
+            for habit_name, habit_info in data['habits'].items()
+        }
+
+        def every_week():
+            for habit_name, habit_info in data['habits'].items():
+                for week_start, week_end in weeks_by_habit[habit_name]:
+                    tracker.calculate_stats_for_range(habit_name, habit_info, week_start, week_end, data, index)
+
+        def average_weeks():
+            for habit_name, habit_info in data['habits'].items():
+                tracker.average_weekly_stats(habit_name, habit_info, data, weeks_by_habit[habit_name], index)
+
+        results[f'habit_tracker.build_stats_index.{years}y'] = measure(lambda: tracker.build_stats_index(data), repeat)
+        results[f'habit_tracker.calculate_stats_for_range.{years}y'] = measure(every_week, repeat)
+        results[f'habit_tracker.average_weekly_stats.{years}y'] = measure(average_weeks, repeat)
+        range_index = tracker.RangeIndex(data)
+        results[f'habit_tracker.range_index_build.{years}y'] = measure(lambda: tracker.RangeIndex(data), repeat)
+        results[f'habit_tracker.rolling_series_365.{years}y'] = measure(lambda: range_index.rolling_series('habit 1', 30, 365, END_DATE), repeat)
+        results[f'habit_tracker.save_data.{years}y'] = measure(lambda: tracker.save_data(data), repeat)
+        results[f'habit_tracker.load_data.{years}y'] = measure(tracker.load_data, repeat)
+
+    return results
+
+STRICT_POLICY = { # per-class limits, no ambiguous characters, no repeats and runs of at most 2
+    'classes': {
+        'lower': {'chars': 'abcdefghijklmnopqrstuvwxyz', 'min': 2, 'max': 6},
+        'upper': {'chars': 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'min': 2},
+        'digit': {'chars': '0123456789', 'min': 3, 'max': 4},
+        'special': {'chars': '!@#$%^&*', 'min': 1, 'max': 2}
+    },
+    'exclude': 'Il1|O0o',
+    'no_repeat': True,
+    'max_run': 2
+}
+
+def password_generator_benchmarks(temp_dir, repeat):
+    passwords = load_project('Password_Generator', 'Password_Generator.py')
+    passwords.FILENAME = os.path.join(temp_dir, 'passwords.txt')
+
+    vault = generate_password_vault(VAULT_SIZE)
+    labels = [f'Site {i}' for i in range(0, VAULT_SIZE, VAULT_SIZE // 100)] # 100 labels spread across the vault
+
+    def generate_many():
+        for _ in range(10_000):
+            passwords.generate_password(16)
+
+    password_vault = passwords.PasswordVault(os.path.join(temp_dir, 'vault.txt'))
+
+    def reset_vault():
+        password_vault.__init__(password_vault.filename) # back to an empty vault
+        for item in vault:
+            password_vault.entries[passwords.label_key(passwords.entry_label(item))] = item
+        password_vault.compact() # writes the starting vault file and removes the change log
+
+    reset_vault()
+
+    def vault_find_labels():
+        for label in labels:
+            password_vault.find(label)
+
+    def vault_generate_and_save(): # the same steps as the 'generate' menu option with the vault
+        password_vault.set(labels[-1], passwords.generate_password(16))
+
+    def vault_replace():
+        for label in labels: # saving over an existing label, as offer_to_save() does when the label is taken
+            password_vault.set(label, passwords.generate_password(16))
+
+    def vault_delete():
+        for label in labels: # the same steps as the 'delete' menu option
+            password_vault.delete(label)
+
+    dump_path = os.path.join(temp_dir, 'breached_dump.txt') # half the vault's passwords are in the dump
+    with open(dump_path, 'w', encoding='utf-8') as file:
+        file.writelines(passwords.entry_password(item) + '\n' for item in vault[::2])
+    passwords.BREACH_HASH_FILE = passwords.Path(temp_dir) / 'breached.sha1'
+    passwords.BREACH_BLOOM_FILE = passwords.Path(temp_dir) / 'breached.bloom'
+    passwords.build_breach_index(dump_path)
+    checker = passwords.BreachChecker()
+
+    wordlist_path = os.path.join(temp_dir, 'wordlist.txt')
+    with open(wordlist_path, 'w', encoding='utf-8') as file:
+        file.writelines(word + '\n' for word in generate_wordlist(100_000))
+    passwords.get_wordlist(wordlist_path) # builds the offset index once, like the first run of the real thing
+
+    def open_wordlist(): # what every later start costs: mapping the cached index
+        passwords.Wordlist(wordlist_path)
+
+    def breach_check_vault():
+        for item in vault:
+            passwords.entry_password(item) in checker
+
+    return {
+        'password_generator.generate_password.10k': measure(generate_many, repeat),
+        'password_generator.generate_many.100k': measure(lambda: passwords.generate_many(100_000, 16), repeat),
+        'password_generator.generate_many_strict.100k': measure(lambda: passwords.generate_many(100_000, 16, STRICT_POLICY), repeat),
+        'password_generator.vault_find.100k': measure(vault_find_labels, repeat),
+        'password_generator.vault_generate_and_save.100k': measure(vault_generate_and_save, repeat),
+        'password_generator.vault_replace.100k': measure(vault_replace, repeat, setup=reset_vault),
+        'password_generator.vault_delete.100k': measure(vault_delete, repeat, setup=reset_vault),
+        'password_generator.vault_load.100k': measure(lambda: passwords.PasswordVault(password_vault.filename).load(), repeat, setup=reset_vault),
+        'password_generator.wordlist_open.100k': measure(open_wordlist, repeat),
+        'password_generator.passphrases.100k': measure(lambda: list(passwords.iter_passphrases(100_000, 6, wordlist=wordlist_path)), repeat),
+        'password_generator.breach_build.50k': measure(lambda: passwords.build_breach_index(dump_path), repeat),
+        'password_generator.breach_check.100k': measure(breach_check_vault, repeat)
+    }
+
+def todo_list_benchmarks(temp_dir, repeat):
+    todo = load_project('To-Do_List', 'To-Do_List.py')
+    todo.FILENAME = os.path.join(temp_dir, 'todo.txt')
+
+    items = generate_todo_list(TODO_SIZE)
+    to_delete = items[::TODO_SIZE // 100] # 100 items spread across the list
+
+    rng = random.Random(0) # half the items get a priority and a third a due date, the same every run
+    scheduled = [
+        todo.format_item(item, rng.choice([None, 1, 2, 3]), END_DATE + timedelta(days=rng.randint(-60, 60)) if rng.random() < 0.33 else None)
+        for item in items
+    ]
+    store = todo.TodoStore(os.path.join(temp_dir, 'todo_store.txt'))
+
+    def reset_store():
+        store.__init__(store.filename) # back to an empty store
+        for item in scheduled:
+            store.apply({'op': 'add', 'item': item})
+        store.compact() # writes the starting file
+
+    def store_delete():
+        for text in to_delete: # the same steps as the 'delete' menu option with the store
+            store.delete(text)
+
+    def store_add():
+        for text in to_delete: # the same steps as the 'add' menu option with the store
+            store.add(text)
+
+    def search_store(): # one page of each kind of search
+        for mode, query in (('words', 'plumber'), ('prefix', 'pl'), ('fuzzy', 'plumbr')):
+            store.search(query, mode)
+
+    return {
+        'todo_list.store_load.10k': measure(lambda: todo.TodoStore(store.filename).load(), repeat, setup=reset_store),
+        'todo_list.store_search.10k': measure(search_store, repeat, setup=reset_store),
+        'todo_list.store_delete.10k': measure(store_delete, repeat, setup=reset_store),
+        'todo_list.store_add.10k': measure(store_add, repeat, setup=reset_store),
+        'todo_list.next_up_20.10k': measure(lambda: store.next_up(20), repeat, setup=reset_store),
+        'todo_list.overdue.10k': measure(lambda: store.overdue(END_DATE), repeat, setup=reset_store)
+    }
+
+def dice_roller_benchmarks(temp_dir, repeat):
+    dice = load_project('Dice_Roller', 'Dice_Roller.py')
+    dice_sides = generate_dice_sides(DICE_COUNT)
+
+    return {
+        'dice_roller.roll.1m': measure(lambda: dice.roll(dice_sides), repeat),
+        'dice_roller.roll_notation_total.10m': measure(lambda: dice.roll_notation('10000000d6+3', seed=0), repeat),
+        'dice_roller.roll_notation_histogram.10m': measure(lambda: dice.roll_notation('5000000d8 5000000d12', 'histogram', seed=0), repeat)
+    }
+
+SUITES = {
+    'habit_tracker': habit_tracker_benchmarks,
+    'password_generator': password_generator_benchmarks,
+    'todo_list': todo_list_benchmarks,
+    'dice_roller': dice_roller_benchmarks
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the hot paths of every project.')
+    parser.add_argument('--output', help='save the results to this JSON file')
+    parser.add_argument('--compare', help='compare against the results saved in this JSON file')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark (default 5)')
+    parser.add_argument('--suite', choices=sorted(SUITES), action='append', help='only run these suites (can be repeated)')
+    args = parser.parse_args()
+
+    results = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir: # every file the benchmarks write goes here
+        for suite_name in args.suite or SUITES:
+            print(f'Running {suite_name}...')
+            suite_results = SUITES[suite_name](temp_dir, args.repeat)
+
+            for name, timing in suite_results.items():
+                print(f'  {name}: median {timing["median"] * 1000:.2f} ms, min {timing["min"] * 1000:.2f} ms')
+
+            results.update(suite_results)
+
+    if args.output:
+        save_results(results, args.output)
+        print(f'Saved results to {args.output}')
+
+    if args.compare:
+        print(f'\nCompared with {args.compare}:')
+        suites_run = tuple(f'{suite_name}.' for suite_name in args.suite or SUITES)
+        old_results = {name: timing for name, timing in load_results(args.compare).items() if name.startswith(suites_run)} #suites that weren't run aren't "removed"
+        regressions = compare_results(old_results, results)
+        if regressions:
+            print(f'{len(regressions)} benchmarks got slower.')
+            sys.exit(1)
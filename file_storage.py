@@ -0,0 +1,350 @@
+"""
+Safe file saving shared by the projects (To-Do List, Password Generator and Habit Tracker).
+
+- atomic_write() writes a new file next to the old one and swaps it in with os.replace, so a crash
+  part way through a save leaves the old file as it was instead of half a file.
+- FSYNC (or fsync=True) also waits until the data has reached the disk, which is slower but
+  survives a power cut as well as a crash.
+- file_lock() is a lock between running programs, so two copies of a project saving at the same
+  time take turns instead of overwriting each other's changes.
+- WriteBehind saves a burst of changes with a single write once the changes stop.
+- AppendLog keeps a snapshot file and a log of changes appended after it, and picks up what other
+  running copies appended or rewrote.
+
+The projects import this from the folder above them, so it works however they are run.
+"""
+
+import atexit # WriteBehind saves anything still waiting when the program exits
+import json
+import os
+import tempfile
+import threading # WriteBehind saves on a background timer
+import time
+
+try:
+    import fcntl # file locks on Linux and macOS
+except ImportError:
+    fcntl = None
+    import msvcrt # file locks on Windows
+
+FSYNC = False # True makes every save wait until the data is on the disk
+LOCK_POLL_SECONDS = 0.05 # how often a lock that's taken is tried again on Windows, or when there's a timeout
+WRITE_BEHIND_SECONDS = 0.5 # how long WriteBehind waits for more changes before saving
+
+def fsync_folder(folder):
+    """
+    Makes sure a rename in folder has reached the disk (only possible, and only needed, outside Windows).
+    """
+
+    if os.name == "nt":
+        return
+
+    handle = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(handle)
+    finally:
+        os.close(handle)
+
+def atomic_write(path, write, mode="w", fsync=None):
+    """
+    Saves a file by calling write(file) on a temporary file in the same folder and then swapping it in
+    with os.replace, which either fully happens or doesn't happen at all. If write() fails, or the
+    program is killed part way through, the old file is untouched. fsync defaults to FSYNC.
+    """
+
+    path = os.fspath(path)
+    folder = os.path.dirname(os.path.abspath(path))
+    fsync = FSYNC if fsync is None else fsync
+
+    handle, temp_path = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + ".", suffix=".tmp")
+
+    try:
+        with os.fdopen(handle, mode) as file:
+            write(file)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+
+        if os.path.exists(path):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o777) #mkstemp makes private files, this keeps the old permissions
+        else:
+            os.chmod(temp_path, 0o666 & ~current_umask())
+
+        os.replace(temp_path, path)
+    except BaseException: #includes KeyboardInterrupt, the temporary file is never left behind
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    if fsync:
+        fsync_folder(folder)
+
+def current_umask(): #the umask can only be read by setting it, so it's set straight back
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+def write_lines(path, lines, fsync=None):
+    """
+    Atomically saves lines of text, one per line.
+    """
+
+    atomic_write(path, lambda file: file.writelines(line + "\n" for line in lines), fsync=fsync)
+
+def write_json(path, data, fsync=None, **options):
+    """
+    Atomically saves data as JSON, options are passed on to json.dump (e.g. indent=2).
+    """
+
+    atomic_write(path, lambda file: json.dump(data, file, **options), fsync=fsync)
+
+def append_lines(path, lines, fsync=None):
+    """
+    Appends lines of text to a file in a single write and returns the file's new size.
+    Appends can't be made atomic the same way, so readers should skip a half written last line.
+    """
+
+    fsync = FSYNC if fsync is None else fsync
+
+    with open(path, "a") as file:
+        file.write("".join(line + "\n" for line in lines))
+        file.flush()
+        if fsync:
+            os.fsync(file.fileno())
+        return file.tell()
+
+def file_signature(path):
+    """
+    Returns [size, modified time, inode] of a file, or None if it doesn't exist. It changes whenever the
+    file is written or replaced, so it tells whether another program has saved the file since it was read.
+    """
+
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [info.st_size, info.st_mtime_ns, info.st_ino]
+
+class FileLock:
+    """
+    A lock shared between running programs, held on a "<file>.lock" file next to the file it protects.
+    Use it with `with`. It can be taken again by the thread that holds it (nested saves), and threads
+    in the same program take turns too. Get one with file_lock(path) rather than making it directly,
+    so every part of a program uses the same lock for a file.
+    """
+
+    def __init__(self, path):
+        self.lock_path = os.fspath(path) + ".lock"
+        self.thread_lock = threading.RLock()
+        self.depth = 0 # how many times the current thread has taken the lock
+        self.handle = None
+
+    def acquire(self, timeout=None):
+        """
+        Waits for the lock, for at most timeout seconds if given (raising TimeoutError after that).
+        """
+
+        if not self.thread_lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise TimeoutError(f"{self.lock_path} is locked by another thread.")
+
+        if self.depth:
+            self.depth += 1
+            return self
+
+        try:
+            handle = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+            deadline = None if timeout is None else time.monotonic() + timeout
+
+            while True:
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_EX | (fcntl.LOCK_NB if deadline is not None else 0))
+                    else:
+                        msvcrt.locking(handle, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError: #another program has it
+                    if deadline is not None and time.monotonic() >= deadline:
+                        os.close(handle)
+                        raise TimeoutError(f"{self.lock_path} is locked by another program.")
+                    time.sleep(LOCK_POLL_SECONDS)
+        except BaseException:
+            self.thread_lock.release()
+            raise
+
+        self.handle = handle
+        self.depth = 1
+        return self
+
+    def release(self):
+        self.depth -= 1
+
+        if not self.depth:
+            if fcntl is not None:
+                fcntl.flock(self.handle, fcntl.LOCK_UN)
+            else:
+                os.lseek(self.handle, 0, os.SEEK_SET)
+                msvcrt.locking(self.handle, msvcrt.LK_UNLCK, 1)
+            os.close(self.handle)
+            self.handle = None
+
+        self.thread_lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *error):
+        self.release()
+
+file_locks = {} # absolute path -> FileLock
+file_locks_lock = threading.Lock()
+
+def file_lock(path):
+    """
+    Returns the FileLock for a file, the same one every time for the same file.
+    """
+
+    path = os.path.abspath(os.fspath(path))
+
+    with file_locks_lock:
+        if path not in file_locks:
+            file_locks[path] = FileLock(path)
+        return file_locks[path]
+
+class WriteBehind:
+    """
+    Runs save() once changes stop arriving: every schedule() restarts a countdown of delay seconds,
+    so a burst of changes is saved with one write. flush() saves straight away if anything is waiting,
+    and it also runs when the program exits. A delay of None turns the countdown off, for callers that
+    call flush() on their own schedule.
+    """
+
+    def __init__(self, save, delay=WRITE_BEHIND_SECONDS):
+        self.save = save
+        self.delay = delay
+        self.pending = False
+        self.lock = threading.RLock()
+        self.timer = None
+        atexit.register(self.flush)
+
+    def schedule(self):
+        with self.lock:
+            self.pending = True
+
+            if self.delay is None:
+                return
+
+            if self.timer is not None:
+                self.timer.cancel()
+
+            self.timer = threading.Timer(self.delay, self.flush)
+            self.timer.daemon = True # doesn't stop the program from closing, the exit save covers it
+            self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+            if not self.pending:
+                return
+
+            self.save()
+            self.pending = False #only once it's saved, so a failed save is tried again at exit
+
+class AppendLog:
+    """
+    A snapshot file plus a log of changes (one JSON object per line) appended after it, shared by every
+    running copy of a program. The store using it passes in three functions:
+      reload()      - clears the store and reads the snapshot file into it
+      apply(change) - applies one change from the log to the store
+      save()        - writes the whole store to the snapshot file
+    load() reads both files, sync() picks up what other copies saved since (just the new log lines if they
+    only appended, a fresh load if they rewrote the snapshot), append() adds the store's own changes and
+    compact() folds the log back into the snapshot. Changes should be made while holding `lock`, after a
+    sync(), so two copies never overwrite each other's changes.
+    """
+
+    def __init__(self, path, log_path, reload, apply, save):
+        self.path = os.fspath(path)
+        self.log_path = os.fspath(log_path)
+        self.reload = reload
+        self.apply = apply
+        self.save = save
+        self.lock = file_lock(path)
+        self.signature = None # file_signature() of the snapshot when it was read or written
+        self.size = 0 # bytes of the log already applied
+        self.lines = 0 # changes in the log since the last compaction
+
+    def load(self):
+        with self.lock: #nobody else can save half way through loading
+            self.signature = file_signature(self.path)
+            self.size = 0
+            self.lines = 0
+            self.reload()
+            self.replay()
+
+    def replay(self):
+        """
+        Applies the changes in the log after the first `size` bytes: the whole log when loading,
+        and only what another copy of the program has added since when syncing.
+        """
+
+        broken = False
+
+        try:
+            with open(self.log_path, "rb") as file:
+                file.seek(self.size)
+                for line in file:
+                    self.size += len(line)
+
+                    try:
+                        change = json.loads(line) if line.endswith(b"\n") else None
+                    except ValueError:
+                        change = None
+
+                    if change is None: #a half written line from a crash, the lines around it are still good
+                        broken = True
+                        continue
+
+                    self.apply(change)
+                    self.lines += 1
+        except FileNotFoundError:
+            pass
+
+        if broken:
+            self.compact() #rewrites the snapshot without the broken line, so new changes aren't appended onto it
+
+    def sync(self):
+        """
+        Picks up changes saved by another running copy of the program. Costs a couple of os.stat calls otherwise.
+        """
+
+        with self.lock:
+            if file_signature(self.path) != self.signature:
+                self.load()
+            elif os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self.size:
+                self.replay()
+
+    def append(self, changes):
+        """
+        Appends changes the store has already applied. Call it holding the lock, after a sync().
+        """
+
+        with self.lock:
+            self.size = append_lines(self.log_path, [json.dumps(change) for change in changes])
+            self.lines += len(changes)
+
+    def compact(self):
+        """
+        Saves the whole store as the new snapshot and removes the log, which the snapshot now contains.
+        """
+
+        with self.lock:
+            self.save()
+            self.signature = file_signature(self.path)
+
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+            self.size = 0
+            self.lines = 0
@@ -0,0 +1,228 @@
+"""
+Tests for file_storage.py: atomic saves surviving a failed or killed writer, and several running copies
+of the projects saving through the same files without losing each other's changes.
+Run from the repository folder with: python -m pytest tests
+"""
+
+import importlib.util
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+import file_storage
+
+PROCESSES = 4 # copies of a project saving at the same time
+CHANGES = 60 # changes each copy saves
+
+LOAD_SCRIPT = """
+import importlib.util
+def load_script(path): #the project folders and files have dashes in them, so they're loaded from their path
+    spec = importlib.util.spec_from_file_location(path.rpartition("/")[2][:-3].replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+"""
+
+def load_script(path): #the same as in LOAD_SCRIPT, for the test itself
+    spec = importlib.util.spec_from_file_location(path.stem.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+TODO_SCRIPT = REPO_DIR / "To-Do_List" / "To-Do_List.py"
+PASSWORDS_SCRIPT = REPO_DIR / "Password_Generator" / "Password_Generator.py"
+HABITS_SCRIPT = REPO_DIR / "Habit_Tracker" / "Habit_Tracker.py"
+
+def run_copies(code, tmp_path):
+    """
+    Runs PROCESSES copies of a python snippet at the same time, each with its number as sys.argv[1],
+    and fails the test if any of them fails.
+    """
+
+    script = tmp_path / "copy.py"
+    script.write_text(f"import sys\nsys.path.insert(0, {str(REPO_DIR)!r})\n" + LOAD_SCRIPT + textwrap.dedent(code))
+
+    copies = [subprocess.Popen([sys.executable, str(script), str(number)], cwd=tmp_path, stderr=subprocess.PIPE, text=True) for number in range(PROCESSES)]
+
+    for copy in copies:
+        _, errors = copy.communicate(timeout=120)
+        assert copy.returncode == 0, errors
+
+def test_atomic_write_keeps_the_old_file_when_the_writer_fails(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("old contents\n")
+
+    def write(file):
+        file.write("half of the new")
+        raise RuntimeError("the save failed part way through")
+
+    with pytest.raises(RuntimeError):
+        file_storage.atomic_write(path, write)
+
+    assert path.read_text() == "old contents\n"
+    assert os.listdir(tmp_path) == ["data.txt"] #the temporary file is cleaned up
+
+@pytest.mark.skipif(os.name == "nt", reason="needs SIGKILL")
+def test_atomic_write_keeps_the_old_file_when_the_program_is_killed(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("old contents\n")
+    started = tmp_path / "started"
+
+    script = tmp_path / "writer.py"
+    script.write_text(textwrap.dedent(f"""
+        import sys, time
+        sys.path.insert(0, {str(REPO_DIR)!r})
+        import file_storage
+
+        def write(file):
+            file.write("half of the new" * 1000)
+            file.flush()
+            open({str(started)!r}, "w").close() #tells the test it's part way through
+            time.sleep(60)
+
+        file_storage.atomic_write({str(path)!r}, write)
+    """))
+
+    writer = subprocess.Popen([sys.executable, str(script)])
+
+    deadline = time.monotonic() + 30
+    while not started.exists():
+        assert time.monotonic() < deadline and writer.poll() is None, "the writer never started writing"
+        time.sleep(0.01)
+
+    os.kill(writer.pid, signal.SIGKILL)
+    writer.wait()
+
+    assert path.read_text() == "old contents\n"
+
+def test_append_lines_returns_the_new_size(tmp_path):
+    path = tmp_path / "log.jsonl"
+
+    assert file_storage.append_lines(path, ["one", "two"]) == len("one\ntwo\n")
+    assert file_storage.append_lines(path, ["three"]) == path.stat().st_size
+
+def test_todo_stores_in_several_processes_keep_every_item(tmp_path):
+    run_copies(f"""
+        todo = load_script({TODO_SCRIPT.as_posix()!r})
+        todo.COMPACT_LOG_LINES = 7 #compacts often, so compactions race with appends
+
+        store = todo.TodoStore("todo.txt").load()
+        for change in range({CHANGES}):
+            store.add(f"copy {{sys.argv[1]}} item {{change}}")
+            if change % 3 == 0:
+                store.delete(f"copy {{sys.argv[1]}} item {{change}}")
+    """, tmp_path)
+
+    todo = load_script(TODO_SCRIPT)
+    expected = {f"copy {number} item {change}" for number in range(PROCESSES) for change in range(CHANGES) if change % 3} #every third item was deleted again
+
+    assert set(todo.TodoStore(tmp_path / "todo.txt").load()) == expected
+
+def test_password_vaults_in_several_processes_keep_every_entry(tmp_path):
+    run_copies(f"""
+        passwords = load_script({PASSWORDS_SCRIPT.as_posix()!r})
+        passwords.COMPACT_LOG_LINES = 7
+
+        vault = passwords.PasswordVault("passwords.txt").load()
+        for change in range({CHANGES}):
+            vault.set(f"copy {{sys.argv[1]}} site {{change}}", f"password{{change}}")
+            if change % 3 == 0:
+                vault.delete(f"copy {{sys.argv[1]}} site {{change}}")
+    """, tmp_path)
+
+    passwords = load_script(PASSWORDS_SCRIPT)
+    expected = {f"copy {number} site {change} - password{change}" for number in range(PROCESSES) for change in range(CHANGES) if change % 3}
+    assert set(passwords.PasswordVault(tmp_path / "passwords.txt").load()) == expected
+
+def test_habit_stores_in_several_processes_keep_every_log(tmp_path):
+    run_copies(f"""
+        import os
+        tracker = load_script({HABITS_SCRIPT.as_posix()!r})
+        tracker.data_file = os.path.abspath("habits_data.json")
+        tracker.journal_file = os.path.abspath("habits_journal.jsonl")
+        tracker.weekly_cache_file = os.path.abspath("habits_weekly_cache.json")
+        tracker.JOURNAL_COMPACT_BYTES = 2000 #compacts often, so compactions race with appends
+
+        habit = f"habit {{sys.argv[1]}}"
+        store = tracker.store
+        store.load()
+        store.record([{{"op": "habit", "name": habit, "info": {{"type": "quantitative", "unit": "reps", "created": "2025-01-01", "active": True}}}}])
+
+        for change in range({CHANGES}):
+            store.record([{{"op": "log", "date": f"2025-{{1 + change // 28:02d}}-{{1 + change % 28:02d}}", "habit": habit, "value": change}}])
+            if change % 4 == 0:
+                store.flush()
+        store.flush()
+    """, tmp_path)
+
+    tracker = load_script(HABITS_SCRIPT)
+    tracker.data_file = str(tmp_path / "habits_data.json")
+    tracker.journal_file = str(tmp_path / "habits_journal.jsonl")
+    data = tracker.load_data()
+
+    assert sorted(data["habits"]) == [f"habit {number}" for number in range(PROCESSES)]
+    for number in range(PROCESSES):
+        logged = sorted(day[f"habit {number}"] for day in data["logs"].values() if f"habit {number}" in day)
+        assert logged == list(range(CHANGES))
+
+def test_a_broken_log_line_is_skipped_and_compacted_away(tmp_path):
+    snapshot = tmp_path / "items.txt"
+    log = tmp_path / "items_changes.jsonl"
+    items = []
+
+    def read():
+        items.clear()
+        if snapshot.exists():
+            items.extend(snapshot.read_text().split())
+
+    journal = file_storage.AppendLog(snapshot, log, read, lambda change: items.append(change["item"]), lambda: file_storage.write_lines(snapshot, items))
+    journal.load()
+    journal.append([{"item": "a"}])
+    items.append("a")
+
+    with open(log, "a") as file:
+        file.write('{"item": "b"') #a copy killed half way through an append
+
+    other = file_storage.AppendLog(snapshot, log, read, lambda change: items.append(change["item"]), lambda: file_storage.write_lines(snapshot, items))
+    other.load()
+
+    assert items == ["a"]
+    assert not log.exists() #compacted, so the next append starts on a new line
+    assert snapshot.read_text() == "a\n"
+
+@pytest.mark.parametrize("compact_bytes", [256 * 1024, 0]) #0 compacts every save, so the second copy reloads the snapshot instead of replaying the journal
+def test_habit_stores_logging_the_same_day_count_it_once_in_the_weekly_cache(tmp_path, monkeypatch, compact_bytes):
+    tracker = load_script(HABITS_SCRIPT)
+    monkeypatch.setattr(tracker, "data_file", str(tmp_path / "habits_data.json"))
+    monkeypatch.setattr(tracker, "journal_file", str(tmp_path / "habits_journal.jsonl"))
+    monkeypatch.setattr(tracker, "weekly_cache_file", str(tmp_path / "habits_weekly_cache.json"))
+    monkeypatch.setattr(tracker, "JOURNAL_COMPACT_BYTES", compact_bytes)
+
+    tracker.save_changes(tracker.load_data(), [{"op": "habit", "name": "run", "info": {"type": "binary", "created": tracker.today_str, "active": True}}])
+    tracker.rebuild_weekly_cache() #the current week is cached, so saved logs are added onto it
+
+    first = tracker.HabitStore(flush_delay=None)
+    second = tracker.HabitStore(flush_delay=None)
+    first.load()
+    second.load()
+
+    first.record([{"op": "log", "date": tracker.today_str, "habit": "run", "value": True}])
+    second.record([{"op": "log", "date": tracker.today_str, "habit": "run", "value": True}])
+    first.flush()
+    second.flush()
+
+    data = tracker.load_data()
+    weekly_cache = tracker.load_weekly_cache()
+    summary = tracker.calculate_weekly_summary(data, tracker.today, weekly_cache)
+
+    assert summary["run"]["current_week"]["days_logged"] == 1
+    assert summary["run"]["current_week"]["days_completed"] == 1